@@ -1,5 +1,39 @@
 #!/bin/bash
 
+# Render the item: render <tracking 0|1> <label>
+render() {
+    if [ "$1" = "1" ]; then
+        sketchybar --set time_tracker \
+            label="$2" \
+            icon="⏱" \
+            icon.color=0xff000000 \
+            label.color=0xff000000 \
+            background.color=0xff008000 \
+            background.corner_radius=5 \
+            background.height=20
+    else
+        # Not tracking - show just red icon
+        sketchybar --set time_tracker \
+            label="" \
+            icon="⏱" \
+            icon.color=0xffff0000 \
+            background.color=0x00000000
+    fi
+}
+
+# Push mode: the running tracker sends time_tracker_update with a prepared
+# payload on state changes and minute boundaries - just render it
+if [ "$SENDER" = "time_tracker_update" ]; then
+    render "$TRACKING" "$LABEL"
+    exit 0
+fi
+
+# Keep the debug log bounded: rotate at 1 MB, keeping one previous file
+DEBUG_LOG="/tmp/time_tracker_debug.log"
+if [ -f "$DEBUG_LOG" ] && [ "$(wc -c < "$DEBUG_LOG")" -gt 1048576 ]; then
+    mv -f "$DEBUG_LOG" "$DEBUG_LOG.1"
+fi
+
 echo "time_tracker.sh started" >> /tmp/time_tracker_debug.log
 
 # Configuration file to store data folder path
@@ -70,19 +104,7 @@ if [ -n "$current_project" ]; then
         time_display="${minutes}m"
     fi
     
-    sketchybar --set time_tracker \
-        label="$current_project ($time_display)" \
-        icon="⏱" \
-        icon.color=0xff000000 \
-        label.color=0xff000000 \
-        background.color=0xff008000 \
-        background.corner_radius=5 \
-        background.height=20
+    render 1 "$current_project ($time_display)"
 else
-    # Not tracking - show just red icon
-    sketchybar --set time_tracker \
-        label="" \
-        icon="⏱" \
-        icon.color=0xffff0000 \
-        background.color=0x00000000
+    render 0 ""
 fi 
\ No newline at end of file
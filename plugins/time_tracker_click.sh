@@ -1,52 +1,54 @@
 #!/bin/bash
 
+# Keep the debug log bounded: rotate at 1 MB, keeping one previous file
+DEBUG_LOG="/tmp/time_tracker_click_debug.log"
+if [ -f "$DEBUG_LOG" ] && [ "$(wc -c < "$DEBUG_LOG")" -gt 1048576 ]; then
+    mv -f "$DEBUG_LOG" "$DEBUG_LOG.1"
+fi
+
 echo "CLICK SCRIPT EXECUTED at $(date)" >> /tmp/time_tracker_click_debug.log
 
+# All reads and writes go through the timetrack CLI (python_legacy/timetrack.py),
+# so clicks are journaled, stamped for merging and land in the live database
+# in local-first mode, exactly like the floating button's commands
+TIMETRACK="${TIMETRACK:-$(command -v timetrack)}"
+if [ -z "$TIMETRACK" ]; then
+    echo "timetrack not found; link python_legacy/timetrack.py into PATH" >> /tmp/time_tracker_click_debug.log
+    exit 1
+fi
+
 # Configuration file to store data folder path
 CONFIG_FILE="$HOME/.config/timetracker/config"
 
-# Function to get data folder from config or prompt user
-get_data_folder() {
-    if [ -f "$CONFIG_FILE" ]; then
-        # Read existing config
-        DATA_FOLDER=$(cat "$CONFIG_FILE")
-        echo "Using existing data folder: $DATA_FOLDER" >> /tmp/time_tracker_click_debug.log
-    else
-        # First run - prompt user to choose folder
-        echo "First run - prompting for data folder" >> /tmp/time_tracker_click_debug.log
-        DATA_FOLDER=$(osascript -e "
-        try
-            tell application \"System Events\"
-                activate
-                set chosenFolder to choose folder with prompt \"Choose a folder to store TimeTracker data:\" default location (path to documents folder)
-                return POSIX path of chosenFolder
-            end tell
-        on error
-            return \"$HOME/Documents/\"
-        end try
-        ")
-        
-        # Remove trailing slash - use selected folder directly
-        DATA_FOLDER=$(echo "$DATA_FOLDER" | sed 's:/$::')
-        
-        # Create config directory and save choice
-        mkdir -p "$(dirname "$CONFIG_FILE")"
-        echo "$DATA_FOLDER" > "$CONFIG_FILE"
-        echo "Saved data folder choice: $DATA_FOLDER" >> /tmp/time_tracker_click_debug.log
-    fi
-    
-    echo "$DATA_FOLDER"
-}
+# Let the user choose the data folder on first run; timetrack reads the saved choice
+if [ ! -f "$CONFIG_FILE" ]; then
+    echo "First run - prompting for data folder" >> /tmp/time_tracker_click_debug.log
+    DATA_FOLDER=$(osascript -e "
+    try
+        tell application \"System Events\"
+            activate
+            set chosenFolder to choose folder with prompt \"Choose a folder to store TimeTracker data:\" default location (path to documents folder)
+            return POSIX path of chosenFolder
+        end tell
+    on error
+        return \"$HOME/Documents/\"
+    end try
+    ")
 
-# Get data folder
-DATA_FOLDER=$(get_data_folder)
-DB_FILE="$DATA_FOLDER/.timetrack.db"
-CSV_FILE="$DATA_FOLDER/time_entries.csv"
+    # Remove trailing slash - use selected folder directly
+    DATA_FOLDER=$(echo "$DATA_FOLDER" | sed 's:/$::')
+
+    # Create config directory and save choice
+    mkdir -p "$(dirname "$CONFIG_FILE")"
+    echo "$DATA_FOLDER" > "$CONFIG_FILE"
+    echo "Saved data folder choice: $DATA_FOLDER" >> /tmp/time_tracker_click_debug.log
+fi
+
+DATA_FOLDER=$(cat "$CONFIG_FILE")
+echo "Using data folder: $DATA_FOLDER" >> /tmp/time_tracker_click_debug.log
 CHIME_PID_FILE="/tmp/time_tracker_chime.pid"
 CHIME_LOCK_FILE="$HOME/.config/timetracker/chime.lock"
 
-# Ensure directory exists
-mkdir -p "$DATA_FOLDER"
 mkdir -p "$(dirname "$CHIME_LOCK_FILE")"
 
 # Function to play chime with lock to prevent double chiming
@@ -81,46 +83,10 @@ play_chime() {
     fi
 }
 
-# Function to export CSV with formatted dates and durations
+# Function to regenerate time_entries.csv
 export_csv() {
     echo "Exporting to CSV" >> /tmp/time_tracker_click_debug.log
-    sqlite3 "$DB_FILE" <<EOF
-.mode csv
-.headers on
-.output $CSV_FILE
-SELECT 
-    id as "ID",
-    project as "Project",
-    COALESCE(activity, '') as "Activity",
-    datetime(start_time, 'unixepoch', 'localtime') as "Start Time",
-    CASE 
-        WHEN end_time IS NOT NULL THEN datetime(end_time, 'unixepoch', 'localtime')
-        ELSE ''
-    END as "End Time",
-    CASE 
-        WHEN end_time IS NOT NULL THEN 
-            printf('%02d:%02d:%02d', 
-                (end_time - start_time) / 3600,
-                ((end_time - start_time) % 3600) / 60,
-                (end_time - start_time) % 60
-            )
-        WHEN start_time IS NOT NULL THEN
-            printf('%02d:%02d:%02d (ongoing)', 
-                (strftime('%s', 'now') - start_time) / 3600,
-                ((strftime('%s', 'now') - start_time) % 3600) / 60,
-                (strftime('%s', 'now') - start_time) % 60
-            )
-        ELSE ''
-    END as "Duration",
-    CASE 
-        WHEN end_time IS NOT NULL THEN 
-            printf('%.1f', CAST((CAST((end_time - start_time) AS REAL) / 3600.0 * 10.0) + 0.9 AS INTEGER) / 10.0)
-        WHEN start_time IS NOT NULL THEN
-            printf('%.1f', CAST((CAST((strftime('%s', 'now') - start_time) AS REAL) / 3600.0 * 10.0) + 0.9 AS INTEGER) / 10.0)
-        ELSE ''
-    END as "Hours"
-FROM time_entries;
-EOF
+    "$TIMETRACK" export >> /tmp/time_tracker_click_debug.log 2>&1
 }
 
 # Function to start chime process
@@ -149,16 +115,91 @@ start_chime_process() {
     echo $! > "$CHIME_PID_FILE"
 }
 
-# Check if database exists
-if [ ! -f "$DB_FILE" ]; then
-    sqlite3 "$DB_FILE" "CREATE TABLE IF NOT EXISTS time_entries (id INTEGER PRIMARY KEY, project TEXT, activity TEXT, start_time TIMESTAMP, end_time TIMESTAMP);"
-else
-    # Add activity column if it doesn't exist (for existing databases)
-    sqlite3 "$DB_FILE" "ALTER TABLE time_entries ADD COLUMN activity TEXT;" 2>/dev/null || true
-fi
+# Function to ask for an activity: choose_activity <prompt> <title> <ok button>
+# Prints the chosen activity, or nothing if the user cancelled
+choose_activity() {
+    osascript -e "
+    try
+        tell application \"System Events\"
+            activate
+            
+            -- Load custom activities from file
+            set customActivitiesFile to (path to home folder as string) & \".config:timetracker:custom_activities\"
+            set customActivities to {}
+            try
+                set customActivitiesText to read file customActivitiesFile
+                set customActivities to paragraphs of customActivitiesText
+                -- Remove empty lines
+                set cleanCustomActivities to {}
+                repeat with activity in customActivities
+                    if activity is not \"\" then
+                        set end of cleanCustomActivities to activity
+                    end if
+                end repeat
+                set customActivities to cleanCustomActivities
+            on error
+                set customActivities to {}
+            end try
+            
+            -- Base activities
+            set baseActivities to {\"Legal research\", \"Investigation\", \"Discovery Review\", \"File Review\", \"Client Communication\"}
+            
+            -- Combine base and custom activities, then add Other
+            set allActivities to baseActivities & customActivities & {\"Other\"}
+            
+            set selectedActivity to choose from list allActivities with prompt \"$1\" default items {\"Legal research\"} with title \"$2\" OK button name \"$3\" cancel button name \"Cancel\"
+            if selectedActivity is false then
+                return \"\"
+            end if
+            
+            set chosenActivity to item 1 of selectedActivity
+            
+            -- Handle \"Other\" selection
+            if chosenActivity is \"Other\" then
+                set customActivityDialog to display dialog \"Enter custom activity type:\" default answer \"\" with title \"Custom Activity\"
+                set customActivity to text returned of customActivityDialog
+                if customActivity is \"\" then
+                    return \"\"
+                end if
+                
+                -- Save custom activity to file
+                try
+                    set customActivitiesText to read file customActivitiesFile
+                    -- Check if activity already exists
+                    if customActivitiesText does not contain customActivity then
+                        set customActivitiesText to customActivitiesText & customActivity & return
+                        set fileRef to open for access file customActivitiesFile with write permission
+                        set eof of fileRef to 0
+                        write customActivitiesText to fileRef
+                        close access fileRef
+                    end if
+                on error
+                    -- Create new file
+                    try
+                        set fileRef to open for access file customActivitiesFile with write permission
+                        write customActivity & return to fileRef
+                        close access fileRef
+                    on error
+                        -- Ignore file write errors
+                    end try
+                end try
+                
+                return customActivity
+            end if
+            
+            return chosenActivity
+        end tell
+    on error
+         return \"Legal research\"
+    end try
+    "
+}
 
 # Get current project
-current_project=$(sqlite3 "$DB_FILE" "SELECT project FROM time_entries WHERE end_time IS NULL ORDER BY start_time DESC LIMIT 1;")
+current_project=""
+if "$TIMETRACK" status --json | grep -q '"is_tracking": true'; then
+    current_project=$("$TIMETRACK" status)
+fi
 echo "Current project: '$current_project'" >> /tmp/time_tracker_click_debug.log
 
 if [ -n "$current_project" ]; then
@@ -187,86 +228,11 @@ if [ -n "$current_project" ]; then
         # Change activity for current session
         echo "Changing activity" >> /tmp/time_tracker_click_debug.log
         
-        # Get activity selection (reuse the activity selection code)
-        selected_activity=$(osascript -e "
-        try
-            tell application \"System Events\"
-                activate
-                
-                -- Load custom activities from file
-                set customActivitiesFile to (path to home folder as string) & \".config:timetracker:custom_activities\"
-                set customActivities to {}
-                try
-                    set customActivitiesText to read file customActivitiesFile
-                    set customActivities to paragraphs of customActivitiesText
-                    -- Remove empty lines
-                    set cleanCustomActivities to {}
-                    repeat with activity in customActivities
-                        if activity is not \"\" then
-                            set end of cleanCustomActivities to activity
-                        end if
-                    end repeat
-                    set customActivities to cleanCustomActivities
-                on error
-                    set customActivities to {}
-                end try
-                
-                -- Base activities
-                set baseActivities to {\"Legal research\", \"Investigation\", \"Discovery Review\", \"File Review\", \"Client Communication\"}
-                
-                -- Combine base and custom activities, then add Other
-                set allActivities to baseActivities & customActivities & {\"Other\"}
-                
-                set selectedActivity to choose from list allActivities with prompt \"Select new activity type:\" default items {\"Legal research\"} with title \"Change Activity\" OK button name \"Change\" cancel button name \"Cancel\"
-                if selectedActivity is false then
-                    return \"\"
-                end if
-                
-                set chosenActivity to item 1 of selectedActivity
-                
-                -- Handle \"Other\" selection
-                if chosenActivity is \"Other\" then
-                    set customActivityDialog to display dialog \"Enter custom activity type:\" default answer \"\" with title \"Custom Activity\"
-                    set customActivity to text returned of customActivityDialog
-                    if customActivity is \"\" then
-                        return \"\"
-                    end if
-                    
-                    -- Save custom activity to file
-                    try
-                        set customActivitiesText to read file customActivitiesFile
-                        -- Check if activity already exists
-                        if customActivitiesText does not contain customActivity then
-                            set customActivitiesText to customActivitiesText & customActivity & return
-                            set fileRef to open for access file customActivitiesFile with write permission
-                            set eof of fileRef to 0
-                            write customActivitiesText to fileRef
-                            close access fileRef
-                        end if
-                    on error
-                        -- Create new file
-                        try
-                            set fileRef to open for access file customActivitiesFile with write permission
-                            write customActivity & return to fileRef
-                            close access fileRef
-                        on error
-                            -- Ignore file write errors
-                        end try
-                    end try
-                    
-                    return customActivity
-                end if
-                
-                return chosenActivity
-            end tell
-        on error
-             return \"Legal research\"
-        end try
-        ")
+        selected_activity=$(choose_activity "Select new activity type:" "Change Activity" "Change")
         
         if [ -n "$selected_activity" ]; then
             echo "Changing activity to: $selected_activity" >> /tmp/time_tracker_click_debug.log
-            sqlite3 "$DB_FILE" "UPDATE time_entries SET activity = '$selected_activity' WHERE end_time IS NULL;"
+            "$TIMETRACK" activity "$selected_activity" >> /tmp/time_tracker_click_debug.log 2>&1
             # Regenerate CSV after activity change
             export_csv
         fi
@@ -276,7 +242,7 @@ if [ -n "$current_project" ]; then
         echo "Changing project" >> /tmp/time_tracker_click_debug.log
         
         # Get existing projects
-        existing_projects=$(sqlite3 "$DB_FILE" "SELECT DISTINCT project FROM time_entries WHERE project NOT LIKE '[HIDDEN]%' GROUP BY project ORDER BY MAX(start_time) DESC;")
+        existing_projects=$("$TIMETRACK" projects)
         
         selected_project=$(osascript -e "
         try
@@ -325,85 +291,11 @@ if [ -n "$current_project" ]; then
             echo "Changing project to: $selected_project" >> /tmp/time_tracker_click_debug.log
             
             # Also prompt for activity when changing project
-            selected_activity=$(osascript -e "
-            try
-                tell application \"System Events\"
-                    activate
-                    
-                    -- Load custom activities from file
-                    set customActivitiesFile to (path to home folder as string) & \".config:timetracker:custom_activities\"
-                    set customActivities to {}
-                    try
-                        set customActivitiesText to read file customActivitiesFile
-                        set customActivities to paragraphs of customActivitiesText
-                        -- Remove empty lines
-                        set cleanCustomActivities to {}
-                        repeat with activity in customActivities
-                            if activity is not \"\" then
-                                set end of cleanCustomActivities to activity
-                            end if
-                        end repeat
-                        set customActivities to cleanCustomActivities
-                    on error
-                        set customActivities to {}
-                    end try
-                    
-                    -- Base activities
-                    set baseActivities to {\"Legal research\", \"Investigation\", \"Discovery Review\", \"File Review\", \"Client Communication\"}
-                    
-                    -- Combine base and custom activities, then add Other
-                    set allActivities to baseActivities & customActivities & {\"Other\"}
-                    
-                    set selectedActivity to choose from list allActivities with prompt \"Select activity type for new project:\" default items {\"Legal research\"} with title \"Change Project Activity\" OK button name \"Change\" cancel button name \"Cancel\"
-                    if selectedActivity is false then
-                        return \"\"
-                    end if
-                    
-                    set chosenActivity to item 1 of selectedActivity
-                    
-                    -- Handle \"Other\" selection
-                    if chosenActivity is \"Other\" then
-                        set customActivityDialog to display dialog \"Enter custom activity type:\" default answer \"\" with title \"Custom Activity\"
-                        set customActivity to text returned of customActivityDialog
-                        if customActivity is \"\" then
-                            return \"\"
-                        end if
-                        
-                        -- Save custom activity to file
-                        try
-                            set customActivitiesText to read file customActivitiesFile
-                            -- Check if activity already exists
-                            if customActivitiesText does not contain customActivity then
-                                set customActivitiesText to customActivitiesText & customActivity & return
-                                set fileRef to open for access file customActivitiesFile with write permission
-                                set eof of fileRef to 0
-                                write customActivitiesText to fileRef
-                                close access fileRef
-                            end if
-                        on error
-                            -- Create new file
-                            try
-                                set fileRef to open for access file customActivitiesFile with write permission
-                                write customActivity & return to fileRef
-                                close access fileRef
-                            on error
-                                -- Ignore file write errors
-                            end try
-                        end try
-                        
-                        return customActivity
-                    end if
-                    
-                    return chosenActivity
-                end tell
-            on error
-                 return \"Legal research\"
-            end try
-            ")
+            selected_activity=$(choose_activity "Select activity type for new project:" "Change Project Activity" "Change")
             
             if [ -n "$selected_activity" ]; then
                 echo "Changing project to: $selected_project and activity to: $selected_activity" >> /tmp/time_tracker_click_debug.log
-                sqlite3 "$DB_FILE" "UPDATE time_entries SET project = '$selected_project', activity = '$selected_activity' WHERE end_time IS NULL;"
+                "$TIMETRACK" switch --amend "$selected_project" -a "$selected_activity" >> /tmp/time_tracker_click_debug.log 2>&1
                 # Regenerate CSV after project and activity change
                 export_csv
             fi
@@ -412,7 +304,7 @@ if [ -n "$current_project" ]; then
     elif [ "$tracking_action" = "Stop Tracking" ]; then
         # Stop tracking
         echo "Stopping tracking" >> /tmp/time_tracker_click_debug.log
-        sqlite3 "$DB_FILE" "UPDATE time_entries SET end_time = strftime('%s', 'now') WHERE end_time IS NULL;"
+        "$TIMETRACK" stop >> /tmp/time_tracker_click_debug.log 2>&1
         
         # Stop chime process when tracking stops
         if [ -f "$CHIME_PID_FILE" ]; then
@@ -434,9 +326,9 @@ else
     echo "Starting tracking - showing project selection" >> /tmp/time_tracker_click_debug.log
     
     while true; do
-        # Get existing projects and last used project (only from active/incomplete entries)
-        existing_projects=$(sqlite3 "$DB_FILE" "SELECT DISTINCT project FROM time_entries WHERE project NOT LIKE '[HIDDEN]%' GROUP BY project ORDER BY MAX(start_time) DESC;")
-        last_project=$(sqlite3 "$DB_FILE" "SELECT project FROM time_entries ORDER BY start_time DESC LIMIT 1;")
+        # Visible projects, most recently used first; the first one is the default
+        existing_projects=$("$TIMETRACK" projects)
+        last_project=$(echo "$existing_projects" | head -n 1)
         
         echo "Existing projects: $existing_projects" >> /tmp/time_tracker_click_debug.log
         echo "Last project: $last_project" >> /tmp/time_tracker_click_debug.log
@@ -464,7 +356,7 @@ else
                 
                 -- Set default selection (most recent project or New Project)
                 set defaultChoice to \"[New Project]\"
-                if \"$last_project\" is not \"\" and \"$last_project\" is not \"[HIDDEN]\" then
+                if \"$last_project\" is not \"\" then
                     set defaultChoice to \"$last_project\"
                 end if
                 
@@ -526,8 +418,7 @@ else
         if [[ "$selected_project" == HIDE:* ]]; then
             project_to_hide="${selected_project#HIDE:}"
             echo "Hiding project from list: $project_to_hide" >> /tmp/time_tracker_click_debug.log
-            # Mark project as hidden by adding a special marker to project name
-            sqlite3 "$DB_FILE" "UPDATE time_entries SET project = '[HIDDEN]' || project WHERE project = '$project_to_hide';"
+            "$TIMETRACK" projects --hide "$project_to_hide" > /dev/null
             echo "Project hidden from future selections" >> /tmp/time_tracker_click_debug.log
             # Continue loop to show project selection again
             continue
@@ -535,7 +426,7 @@ else
         elif [[ "$selected_project" == DELETE:* ]]; then
             project_to_delete="${selected_project#DELETE:}"
             echo "Deleting project and all entries: $project_to_delete" >> /tmp/time_tracker_click_debug.log
-            sqlite3 "$DB_FILE" "DELETE FROM time_entries WHERE project = '$project_to_delete';"
+            "$TIMETRACK" projects --delete "$project_to_delete" > /dev/null
             
             # Export updated CSV
             export_csv
@@ -556,82 +447,8 @@ else
         elif [ -n "$selected_project" ]; then
             echo "Starting tracking for project: $selected_project" >> /tmp/time_tracker_click_debug.log
             
-                        # Prompt for activity type
-            selected_activity=$(osascript -e "
-            try
-                tell application \"System Events\"
-                    activate
-                    
-                    -- Load custom activities from file
-                    set customActivitiesFile to (path to home folder as string) & \".config:timetracker:custom_activities\"
-                    set customActivities to {}
-                    try
-                        set customActivitiesText to read file customActivitiesFile
-                        set customActivities to paragraphs of customActivitiesText
-                        -- Remove empty lines
-                        set cleanCustomActivities to {}
-                        repeat with activity in customActivities
-                            if activity is not \"\" then
-                                set end of cleanCustomActivities to activity
-                            end if
-                        end repeat
-                        set customActivities to cleanCustomActivities
-                    on error
-                        set customActivities to {}
-                    end try
-                    
-                    -- Base activities
-                    set baseActivities to {\"Legal research\", \"Investigation\", \"Discovery Review\", \"File Review\", \"Client Communication\"}
-                    
-                    -- Combine base and custom activities, then add Other
-                    set allActivities to baseActivities & customActivities & {\"Other\"}
-                    
-                    set selectedActivity to choose from list allActivities with prompt \"Select activity type:\" default items {\"Legal research\"} with title \"Activity Type\" OK button name \"Start\" cancel button name \"Cancel\"
-                    if selectedActivity is false then
-                        return \"\"
-                    end if
-                    
-                    set chosenActivity to item 1 of selectedActivity
-                    
-                    -- Handle \"Other\" selection
-                    if chosenActivity is \"Other\" then
-                        set customActivityDialog to display dialog \"Enter custom activity type:\" default answer \"\" with title \"Custom Activity\"
-                        set customActivity to text returned of customActivityDialog
-                        if customActivity is \"\" then
-                            return \"\"
-                        end if
-                        
-                        -- Save custom activity to file
-                        try
-                            set customActivitiesText to read file customActivitiesFile
-                            -- Check if activity already exists
-                            if customActivitiesText does not contain customActivity then
-                                set customActivitiesText to customActivitiesText & customActivity & return
-                                set fileRef to open for access file customActivitiesFile with write permission
-                                set eof of fileRef to 0
-                                write customActivitiesText to fileRef
-                                close access fileRef
-                            end if
-                        on error
-                            -- Create new file
-                            try
-                                set fileRef to open for access file customActivitiesFile with write permission
-                                write customActivity & return to fileRef
-                                close access fileRef
-                            on error
-                                -- Ignore file write errors
-                            end try
-                        end try
-                        
-                        return customActivity
-                    end if
-                    
-                    return chosenActivity
-                end tell
-            on error
-                 return \"Legal research\"
-            end try
-            ")
+            # Prompt for activity type
+            selected_activity=$(choose_activity "Select activity type:" "Activity Type" "Start")
             
             if [ -n "$selected_activity" ]; then
                 echo "Starting tracking for project: $selected_project, activity: $selected_activity" >> /tmp/time_tracker_click_debug.log
@@ -640,7 +457,7 @@ else
                 echo "Starting chime process for tracking session" >> /tmp/time_tracker_click_debug.log
                 start_chime_process
                 
-                sqlite3 "$DB_FILE" "INSERT INTO time_entries (project, activity, start_time) VALUES ('$selected_project', '$selected_activity', strftime('%s', 'now'));"
+                "$TIMETRACK" start "$selected_project" -a "$selected_activity" >> /tmp/time_tracker_click_debug.log 2>&1
                 play_chime
                 break
             else
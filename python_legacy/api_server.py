@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON API for integrations.
+
+An asyncio server bound to 127.0.0.1 that lets other office tools start
+and stop timers and read entries and totals without opening
+.timetrack.db directly. Connections are kept alive, large entry ranges
+are streamed as chunked JSON, and GET responses are cached until a write
+goes through the API or the database fingerprint changes.
+
+    GET  /status
+    POST /start          {"project": "...", "activity": "..."}
+    POST /stop
+    GET  /entries?from=YYYY-MM-DD&to=YYYY-MM-DD
+    GET  /totals?from=YYYY-MM-DD&to=YYYY-MM-DD&by=project|client|activity|day
+    GET  /metrics        Prometheus text format (see metrics.py)
+    GET  /logs?limit=N   Recent log records from the app's ring buffer
+
+Run standalone with `python3 api_server.py [--port 8765]`, or put a port
+number in ~/.config/timetracker/api to have the floating button start it.
+"""
+
+import sys
+import json
+import sqlite3
+import asyncio
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+from tracker_core import TrackerCore, CONFIG_DIR, database_version
+from metrics import REGISTRY
+from applog import get_logger, recent
+
+log = get_logger("api_server")
+
+DEFAULT_PORT = 8765
+STREAM_BATCH = 500
+CACHE_LIMIT = 1024 * 1024  # Only cache responses up to 1 MB
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseStarted(Exception):
+    """A failure after the status line went out; the connection can only be closed"""
+
+
+class ResponseCache:
+    """GET response bodies keyed by request target, dropped on writes or database changes"""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.entries = {}
+        self.version = None
+
+    def get(self, key):
+        self.check_version()
+        return self.entries.get(key)
+
+    def put(self, key, body):
+        if len(body) <= CACHE_LIMIT:
+            self.entries[key] = body
+
+    def invalidate(self):
+        self.entries.clear()
+        self.version = database_version(self.db_file)
+
+    def check_version(self):
+        # Writes from the floating button or the CLI change the fingerprint
+        version = database_version(self.db_file)
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+
+
+def parse_day(params, name):
+    values = params.get(name)
+    if not values:
+        return None
+    try:
+        return int(datetime.strptime(values[0], '%Y-%m-%d').timestamp())
+    except ValueError:
+        raise HTTPError(400, f"Invalid {name} date, expected YYYY-MM-DD")
+
+
+def parse_int(params, name, default):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise HTTPError(400, f"Invalid {name}, expected an integer")
+
+
+class APIServer:
+    """Request routing over a TrackerCore"""
+
+    def __init__(self, core=None, host='127.0.0.1', port=DEFAULT_PORT):
+        self.core = core or TrackerCore()
+        self.host = host
+        self.port = port
+        self.cache = ResponseCache(self.core.db_file)
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                request_line = lines[0].split(' ')
+                if len(request_line) != 3 or not request_line[2].startswith('HTTP/'):
+                    self.write_json(writer, 400, {'error': "Malformed request line"}, False)
+                    break
+                method, target, version = request_line
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = headers.get('content-length') or '0'
+                if not length.isdigit():
+                    # The body cannot be found, so neither can the next request
+                    self.write_json(writer, 400, {'error': "Invalid Content-Length"}, False)
+                    break
+                length = int(length)
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                await self.dispatch(writer, method, target, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ResponseStarted as e:
+            log.error("Error streaming response: %s", e)
+        finally:
+            writer.close()
+
+    async def dispatch(self, writer, method, target, body, keep_alive):
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        # The core waits on the state-file lock, fsyncs and queries SQLite; keep that off the loop
+        loop = asyncio.get_running_loop()
+        try:
+            if method == 'GET':
+                cached = self.cache.get(target)
+                if cached is not None:
+                    self.write_response(writer, 200, cached, keep_alive)
+                elif url.path == '/status':
+                    self.send_cached(writer, target, await loop.run_in_executor(None, self.core.status), keep_alive)
+                elif url.path == '/totals':
+                    rows, measured_to_now = await loop.run_in_executor(None, self.totals, params)
+                    if measured_to_now:
+                        # Open entries keep growing, so the body is only right for this moment
+                        self.write_json(writer, 200, rows, keep_alive)
+                    else:
+                        self.send_cached(writer, target, rows, keep_alive)
+                elif url.path == '/entries':
+                    await self.stream_entries(writer, target, params, keep_alive)
+                elif url.path == '/logs':
+                    limit = parse_int(params, 'limit', 100)
+                    self.write_json(writer, 200, recent(limit), keep_alive)
+                elif url.path == '/metrics':
+                    self.write_response(writer, 200, REGISTRY.render().encode(), keep_alive,
+                                        content_type='text/plain; version=0.0.4')
+                else:
+                    raise HTTPError(404, "Unknown endpoint")
+            elif method == 'POST':
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    raise HTTPError(400, "Request body must be JSON")
+                if not isinstance(payload, dict):
+                    raise HTTPError(400, "Request body must be a JSON object")
+                state = await loop.run_in_executor(None, self.command, url.path, payload)
+                self.cache.invalidate()
+                self.write_json(writer, 200, state, keep_alive)
+            else:
+                raise HTTPError(405, "Only GET and POST are supported")
+        except ResponseStarted:
+            raise
+        except HTTPError as e:
+            self.write_json(writer, e.status, {'error': str(e)}, keep_alive)
+        except Exception as e:
+            self.write_json(writer, 500, {'error': str(e)}, keep_alive)
+
+    def command(self, path, payload):
+        """Run a POST command and replay it into the database; blocks, so called off the loop"""
+        current = self.core.status()
+        if path == '/start':
+            if not payload.get('project'):
+                raise HTTPError(400, "project is required")
+            if current.get('is_tracking'):
+                raise HTTPError(400, "Already tracking")
+            state = self.core.start(payload['project'], payload.get('activity', ''))
+        elif path == '/stop':
+            if not current.get('is_tracking'):
+                return current
+            state = self.core.stop()
+        else:
+            raise HTTPError(404, "Unknown endpoint")
+        self.core.replay()
+        return state
+
+    def totals(self, params):
+        """Billed totals for a range, and whether an open entry was measured up to now"""
+        import reports
+
+        by = params.get('by', ['project'])[0]
+        entries = reports.load_entries(self.core.db_file, parse_day(params, 'from'), parse_day(params, 'to'))
+        policies = reports.shared_policies()
+        if by == 'project':
+            rows = reports.totals_by_project(entries, policies)
+        elif by == 'activity':
+            rows = reports.totals_by_activity(entries, policies)
+        elif by == 'client':
+            rows = reports.totals_by_client(entries, reports.load_clients(), policies)
+        elif by == 'day':
+            rows = reports.totals_by_day(entries, policies)
+        else:
+            raise HTTPError(400, "by must be project, client, activity or day")
+        return ([{'key': label, 'hours': round(float(hours), 2), 'entries': count}
+                 for label, hours, count in rows], bool(entries.is_open.any()))
+
+    async def stream_entries(self, writer, target, params, keep_alive):
+        """Stream entries as a chunked JSON array, fetching in batches off the event loop"""
+        start = parse_day(params, 'from')
+        end = parse_day(params, 'to')
+        query = 'SELECT id, project, activity, start_time, end_time FROM time_entries WHERE 1=1'
+        args = []
+        if start is not None:
+            query += ' AND start_time >= ?'
+            args.append(start)
+        if end is not None:
+            query += ' AND start_time < ?'
+            args.append(end)
+        query += ' ORDER BY start_time'
+
+        loop = asyncio.get_running_loop()
+        conn = sqlite3.connect(str(self.core.db_file), check_same_thread=False)
+        try:
+            cursor = await loop.run_in_executor(None, conn.execute, query, args)
+            self.write_head(writer, 200, keep_alive, chunked=True)
+            try:
+                parts = [b'[']
+                first = True
+                self.write_chunk(writer, b'[')
+                while True:
+                    rows = await loop.run_in_executor(None, cursor.fetchmany, STREAM_BATCH)
+                    if not rows:
+                        break
+                    chunk = ','.join(json.dumps({'id': r[0], 'project': r[1], 'activity': r[2],
+                                                 'start_time': r[3], 'end_time': r[4]}) for r in rows)
+                    data = (chunk if first else ',' + chunk).encode()
+                    first = False
+                    self.write_chunk(writer, data)
+                    if parts is not None:
+                        parts.append(data)
+                        if sum(len(p) for p in parts) > CACHE_LIMIT:
+                            parts = None
+                    await writer.drain()
+                self.write_chunk(writer, b']')
+                self.write_chunk(writer, b'')
+                if parts is not None:
+                    parts.append(b']')
+                    self.cache.put(target, b''.join(parts))
+            except ConnectionError:
+                raise
+            except Exception as e:
+                # The 200 and part of the body are out; a second status line would corrupt the stream
+                raise ResponseStarted(e) from e
+        finally:
+            conn.close()
+
+    def send_cached(self, writer, target, obj, keep_alive):
+        body = json.dumps(obj).encode()
+        self.cache.put(target, body)
+        self.write_response(writer, 200, body, keep_alive)
+
+    def write_json(self, writer, status, obj, keep_alive):
+        self.write_response(writer, status, json.dumps(obj).encode(), keep_alive)
+
+    def write_head(self, writer, status, keep_alive, length=None, chunked=False,
+                   content_type='application/json'):
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}",
+                f"Content-Type: {content_type}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if chunked:
+            head.append("Transfer-Encoding: chunked")
+        else:
+            head.append(f"Content-Length: {length}")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+
+    def write_response(self, writer, status, body, keep_alive, content_type='application/json'):
+        self.write_head(writer, status, keep_alive, length=len(body), content_type=content_type)
+        writer.write(body)
+
+    def write_chunk(self, writer, data):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+def configured_port():
+    """Port from ~/.config/timetracker/api, or None when the API is disabled"""
+    config_file = CONFIG_DIR / "api"
+    try:
+        if config_file.exists():
+            text = config_file.read_text().strip()
+            return int(text) if text else DEFAULT_PORT
+    except Exception as e:
+        log.error("Error reading API config: %s", e)
+    return None
+
+
+def start_in_thread(core, port):
+    """Run the server on its own event loop in a daemon thread"""
+    server = APIServer(core, port=port)
+
+    def run():
+        try:
+            asyncio.run(server.serve_forever())
+        except Exception as e:
+            log.error("API server stopped: %s", e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API for the time tracker")
+    parser.add_argument('--port', type=int, default=configured_port() or DEFAULT_PORT)
+    parser.add_argument('--data-folder', help="Override the configured data folder")
+    args = parser.parse_args(argv)
+
+    server = APIServer(TrackerCore(args.data_folder), port=args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Structured logging for the floating button.
+
+Modules log through get_logger(); setup_logging() (called by the app)
+routes records through a queue to a background thread that keeps a
+fixed-size in-memory ring of recent records and appends them as JSON
+lines to a rotating file, ~/.config/timetracker/logs/timetracker.log.
+A warning or error that repeats every sync tick is logged once per
+minute; the repeats held back are reported as a count when the minute
+is up or the app exits.
+
+Records below the configured level (~/.config/timetracker/log_level,
+default INFO) are dropped by the logger's level check before anything
+is formatted, so debug calls in hot paths cost a method call; guard
+expensive arguments with log.isEnabledFor(logging.DEBUG).
+
+Command-line tools that never call setup_logging() still show warnings
+and errors on stderr through Python's last-resort handler.
+"""
+
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+
+ROOT = "timetracker"
+CONFIG_DIR = Path.home() / ".config" / "timetracker"
+LOG_FILE = CONFIG_DIR / "logs" / "timetracker.log"
+RING_SIZE = 1000
+MAX_BYTES = 1024 * 1024
+BACKUPS = 5
+REPEAT_WINDOW = 60
+
+_ring = None
+_listener = None
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def structured(record):
+    """A log record as a plain dict; extra={'fields': {...}} adds context"""
+    entry = {
+        'time': round(record.created, 3),
+        'level': record.levelname,
+        'logger': record.name,
+        'message': record.getMessage(),
+    }
+    entry.update(getattr(record, 'fields', None) or {})
+    if record.exc_text:
+        entry['exc'] = record.exc_text
+    return entry
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(structured(record), default=str)
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records in memory"""
+
+    def __init__(self, capacity=RING_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(structured(record))
+
+
+class RepeatFilter(logging.Filter):
+    """Lets an identical warning or error through once per window, then notes how often it repeated
+
+    Repeats still held back when their window ends, or at shutdown, are
+    passed to emit as one summary record.
+    """
+
+    def __init__(self, window=REPEAT_WINDOW, emit=None):
+        super().__init__()
+        self.window = window
+        self.emit = emit
+        self.seen = {}
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        with self.lock:
+            entry = self.seen.get(key)
+            if entry is not None and record.created - entry[0] < self.window:
+                entry[1] += 1
+                self.schedule_flush()
+                return False
+            if entry is not None and entry[1]:
+                record.msg, record.args = f"{message} (repeated {entry[1]} times)", None
+            if len(self.seen) > 1000:
+                self.seen = {k: v for k, v in self.seen.items() if v[1] or record.created - v[0] < self.window}
+            self.seen[key] = [record.created, 0]
+        return True
+
+    def schedule_flush(self):
+        """Start a timer for the earliest window with held-back repeats (lock held)"""
+        if self.timer is not None or self.emit is None:
+            return
+        first = min(entry[0] for entry in self.seen.values() if entry[1])
+        self.timer = threading.Timer(max(0.0, first + self.window - time.time()), self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self, final=False):
+        """Emit a summary for repeats whose window has ended, or for all of them if final"""
+        now = time.time()
+        with self.lock:
+            if final and self.timer is not None:
+                self.timer.cancel()
+            self.timer = None
+            pending = []
+            for key, entry in self.seen.items():
+                if entry[1] and (final or now - entry[0] >= self.window):
+                    pending.append((key, entry[1]))
+                    entry[1] = 0
+            if not final and any(entry[1] for entry in self.seen.values()):
+                self.schedule_flush()
+        for (name, level, message), count in pending:
+            if self.emit is not None:
+                self.emit(logging.LogRecord(name, level, __file__, 0, "%s (repeated %d times)",
+                                            (message, count), None))
+
+
+def configured_level():
+    config_file = CONFIG_DIR / "log_level"
+    try:
+        if config_file.exists():
+            return logging.getLevelName(config_file.read_text().strip().upper())
+    except Exception:
+        pass
+    return logging.INFO
+
+
+def setup_logging(log_file=LOG_FILE, level=None):
+    """Route the app's logging through the ring buffer and a rotating file (idempotent)"""
+    global _ring, _listener
+    if _listener is not None:
+        return _ring
+    # Imported here: command-line tools log without ever calling setup_logging()
+    import queue
+    import logging.handlers
+    level = level if level is not None else configured_level()
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    _ring = RingBufferHandler()
+    handlers = [_ring]
+    try:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=MAX_BYTES, backupCount=BACKUPS)
+        file_handler.setFormatter(JSONFormatter())
+        handlers.append(file_handler)
+    except Exception as e:
+        print(f"Error opening log file: {e}", file=sys.stderr)
+    if sys.stderr is not None and sys.stderr.isatty():
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+        handlers.append(console)
+
+    # Callers only enqueue; formatting and file writes happen on the listener thread
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    repeats = RepeatFilter(emit=queue_handler.emit)
+    queue_handler.addFilter(repeats)
+    logger = logging.getLogger(ROOT)
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, *handlers)
+    _listener.start()
+
+    def shutdown():
+        repeats.flush(final=True)
+        _listener.stop()
+    atexit.register(shutdown)
+    return _ring
+
+
+def recent(limit=100):
+    """The most recent records as dicts, oldest first"""
+    if _ring is None:
+        return []
+    records = list(_ring.records)
+    return records[-limit:]
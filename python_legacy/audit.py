@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Overlap and gap audit for time entries.
+
+Entries are loaded as NumPy columns and sorted by start once; overlaps,
+stale open sessions and untracked gaps inside work hours are then found
+with vectorized passes (running maximum of end times, searchsorted), so
+the whole audit is O(n log n).
+
+    python3 audit.py --from 2026-10-01 --plan repair.json
+    python3 audit.py --apply repair.json
+
+The repair plan only shortens entries: an entry that runs into the next
+one is ended where the next one starts. Entries that fully contain
+another or start at the same moment (shortening would leave nothing),
+stale open sessions and gaps are reported for review.
+Work hours come from ~/.config/timetracker/work_hours, e.g.
+
+    hours=09:00-17:30
+    days=mon,tue,wed,thu,fri
+"""
+
+import sys
+import json
+import sqlite3
+import argparse
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from reports import load_entries, parse_date
+from applog import get_logger
+from tracker_core import database_path, get_data_folder
+
+log = get_logger("audit")
+
+DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def load_work_hours():
+    """Work hours as ((start_hour, start_minute), (end_hour, end_minute), weekdays)"""
+    hours = ((9, 0), (17, 0))
+    days = {0, 1, 2, 3, 4}
+    config_file = Path.home() / ".config" / "timetracker" / "work_hours"
+    try:
+        if config_file.exists():
+            for line in config_file.read_text().splitlines():
+                if '=' not in line:
+                    continue
+                key, value = (part.strip() for part in line.split('=', 1))
+                if key == 'hours':
+                    start, end = value.split('-')
+                    hours = tuple(tuple(int(p) for p in t.split(':')) for t in (start, end))
+                elif key == 'days':
+                    days = {DAY_NAMES.index(d.strip()[:3].lower()) for d in value.split(',') if d.strip()}
+    except Exception as e:
+        log.error("Error loading work hours: %s", e)
+    return hours[0], hours[1], days
+
+
+def work_windows(start, end, work_hours):
+    """Work-hour windows between two epochs as (starts, ends) arrays, in local time"""
+    (start_h, start_m), (end_h, end_m), days = work_hours
+    day = datetime.fromtimestamp(start).date()
+    last = datetime.fromtimestamp(end).date()
+    starts, ends = [], []
+    while day <= last:
+        if day.weekday() in days:
+            starts.append(datetime(day.year, day.month, day.day, start_h, start_m).timestamp())
+            ends.append(datetime(day.year, day.month, day.day, end_h, end_m).timestamp())
+        day += timedelta(days=1)
+    starts = np.maximum(np.array(starts, dtype=np.int64), start)
+    ends = np.minimum(np.array(ends, dtype=np.int64), end)
+    keep = ends > starts
+    return starts[keep], ends[keep]
+
+
+def find_overlaps(starts, ends):
+    """Overlapping pairs in start-sorted arrays as (earlier, later) positions
+
+    Each entry is compared with the furthest-reaching entry before it,
+    found with a running maximum of end times.
+    """
+    count = len(starts)
+    if count < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    reach = np.maximum.accumulate(ends)
+    positions = np.arange(count)
+    owner = np.maximum.accumulate(np.where(ends == reach, positions, 0))
+    later = np.nonzero(starts[1:] < reach[:-1])[0] + 1
+    return owner[later - 1], later
+
+
+def find_gaps(starts, ends, windows, min_gap):
+    """Untracked stretches inside the windows as (starts, ends) arrays
+
+    The entries' union is taken from the running maximum of end times;
+    the spaces between its pieces are intersected with the windows.
+    """
+    window_starts, window_ends = windows
+    if len(starts):
+        reach = np.maximum.accumulate(ends)
+        new_piece = np.concatenate(([True], starts[1:] > reach[:-1]))
+        piece_starts = starts[new_piece]
+        piece_ends = reach[np.concatenate((np.nonzero(new_piece)[0][1:] - 1, [len(starts) - 1]))]
+    else:
+        piece_starts = piece_ends = np.empty(0, dtype=np.int64)
+    lowest, highest = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+    gap_starts = np.concatenate(([lowest], piece_ends))
+    gap_ends = np.concatenate((piece_starts, [highest]))
+
+    # Gaps touching each window: a contiguous run found by binary search
+    first = np.searchsorted(gap_ends, window_starts, side='right')
+    stop = np.searchsorted(gap_starts, window_ends, side='left')
+    counts = np.maximum(stop - first, 0)
+    window = np.repeat(np.arange(len(window_starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    gap = np.repeat(first, counts) + offsets
+    clipped_starts = np.maximum(gap_starts[gap], window_starts[window])
+    clipped_ends = np.minimum(gap_ends[gap], window_ends[window])
+    keep = clipped_ends - clipped_starts >= min_gap
+    return clipped_starts[keep], clipped_ends[keep]
+
+
+def audit(entries, now, max_open=12 * 3600, min_gap=15 * 60, work_hours=None, start=None, end=None):
+    """Find problems in loaded entries, returning (findings, repairs)
+
+    findings is a list of dicts for the report; repairs are (id, start_time,
+    old_end, new_end) updates for the repair plan.
+    """
+    order = np.argsort(entries.starts, kind='stable')
+    ids = entries.ids[order]
+    starts = entries.starts[order]
+    ends = entries.ends[order]
+    is_open = entries.is_open[order]
+    projects = [entries.projects[c] for c in entries.project_codes[order].tolist()]
+
+    findings = []
+    repairs = []
+    earlier, later = find_overlaps(starts, ends)
+    # The first overlap of an entry decides its new end; later ones go with it
+    earlier, first = np.unique(earlier, return_index=True)
+    later = later[first]
+    for e, l in zip(earlier.tolist(), later.tolist()):
+        # A forgotten open entry is closed where the next one starts, unless
+        # both start together and it would be closed at its own start
+        contains = starts[e] == starts[l] or (not is_open[e] and not is_open[l] and ends[e] > ends[l])
+        findings.append({'kind': 'contains' if contains else 'overlap',
+                         'id': int(ids[e]), 'other_id': int(ids[l]), 'project': projects[e],
+                         'start': int(starts[e]), 'end': None if is_open[e] else int(ends[e]),
+                         'other_start': int(starts[l])})
+        if not contains:
+            repairs.append((int(ids[e]), int(starts[e]), None if is_open[e] else int(ends[e]), int(starts[l])))
+
+    repaired = set(r[0] for r in repairs)
+    stale = np.nonzero(is_open & (now - starts > max_open))[0]
+    for p in stale.tolist():
+        if int(ids[p]) not in repaired:
+            findings.append({'kind': 'stale_open', 'id': int(ids[p]), 'project': projects[p],
+                             'start': int(starts[p]), 'end': None})
+
+    if work_hours is not None:
+        window_start = start if start is not None else (int(starts.min()) if len(starts) else now)
+        window_end = min(end if end is not None else now, now)
+        gap_starts, gap_ends = find_gaps(starts, ends, work_windows(window_start, window_end, work_hours),
+                                         min_gap)
+        for s, e in zip(gap_starts.tolist(), gap_ends.tolist()):
+            findings.append({'kind': 'gap', 'start': s, 'end': e})
+    return findings, repairs
+
+
+def apply_plan(db_file, repairs):
+    """Apply repairs in one transaction, skipping rows changed since the audit"""
+    conn = sqlite3.connect(str(db_file), timeout=5.0)
+    try:
+        with conn:
+            applied = 0
+            for entry_id, start_time, old_end, new_end in repairs:
+                applied += conn.execute('''
+                    UPDATE time_entries SET end_time = ?
+                    WHERE id = ? AND start_time = ? AND end_time IS ?
+                ''', (new_end, entry_id, start_time, old_end)).rowcount
+        return applied
+    finally:
+        conn.close()
+
+
+def format_time(epoch):
+    return '(ongoing)' if epoch is None else datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find overlapping, unclosed and missing time")
+    parser.add_argument('--from', dest='start', help="First day to include (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', help="Day after the last day to include (YYYY-MM-DD)")
+    parser.add_argument('--max-open-hours', type=float, default=12, help="Report open sessions older than this")
+    parser.add_argument('--min-gap-minutes', type=float, default=15, help="Ignore shorter gaps in work hours")
+    parser.add_argument('--plan', help="Write the repair plan to this JSON file")
+    parser.add_argument('--apply', help="Apply a repair plan written by --plan")
+    parser.add_argument('--db', help="Database file (defaults to the configured data folder)")
+    args = parser.parse_args(argv)
+
+    db_file = args.db or database_path(get_data_folder())
+    if args.apply:
+        repairs = [tuple(r) for r in json.loads(Path(args.apply).read_text())['repairs']]
+        applied = apply_plan(db_file, repairs)
+        print(f"Applied {applied} of {len(repairs)} repairs")
+        return 0
+
+    now = int(time.time())
+    start = parse_date(args.start) if args.start else None
+    end = parse_date(args.end) if args.end else None
+    entries = load_entries(db_file, start, end, now, read_only=True)
+    findings, repairs = audit(entries, now, int(args.max_open_hours * 3600), int(args.min_gap_minutes * 60),
+                              load_work_hours(), start, end)
+
+    for f in findings:
+        if f['kind'] == 'gap':
+            print(f"gap\t{format_time(f['start'])}\t{format_time(f['end'])}")
+        elif f['kind'] == 'stale_open':
+            print(f"stale_open\t#{f['id']}\t{format_time(f['start'])}\t{f['project']}")
+        else:
+            print(f"{f['kind']}\t#{f['id']}\t{format_time(f['start'])}\t{format_time(f['end'])}\t"
+                  f"{f['project']}\twith #{f['other_id']} from {format_time(f['other_start'])}")
+    print(f"{len(findings)} findings, {len(repairs)} repairs")
+    if args.plan:
+        Path(args.plan).write_text(json.dumps({'created_at': now, 'repairs': repairs}, indent=2))
+        print(f"Wrote repair plan to {args.plan}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the tracker's hot paths on synthetic databases.
+
+Each size gets a generated database (see synthetic_db.py), cached in the
+work directory between runs. The core paths are timed directly; the
+floating button's export_to_csv, get_projects and sync_state are timed
+headlessly on Qt's offscreen platform. Results are written as JSON so
+runs can be compared:
+
+    python3 benchmark.py --sizes 10000 100000 1000000 -o results.json
+    python3 benchmark.py --compare results.json
+
+HOME is pointed at the work directory, so your own configuration and
+data folder are never touched.
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def measure(func, repeat, warmup=1):
+    """Wall-clock seconds of repeat calls after warmup calls"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(name, entries, samples):
+    ordered = sorted(samples)
+    return {
+        'name': name,
+        'entries': entries,
+        'repeat': len(samples),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def prepare_data_folder(workdir, entries, seed):
+    """Data folder holding a generated database of the given size"""
+    from synthetic_db import generate
+    data_folder = Path(workdir) / f"data-{entries}-{seed}"
+    db_file = data_folder / ".timetrack.db"
+    if not db_file.exists():
+        data_folder.mkdir(parents=True, exist_ok=True)
+        print(f"Generating {entries} entries...", file=sys.stderr)
+        generate(str(db_file) + ".tmp", entries, seed=seed)
+        os.replace(str(db_file) + ".tmp", db_file)
+    # Point the app's configuration at this folder
+    config_dir = Path.home() / ".config" / "timetracker"
+    config_dir.mkdir(parents=True, exist_ok=True)
+    (config_dir / "config").write_text(str(data_folder))
+    return data_folder
+
+
+def bench_core(data_folder, entries, repeat):
+    from tracker_core import TrackerCore
+    core = TrackerCore(data_folder)
+    return [
+        summarize('get_current_state', entries, measure(core.state_manager.get_current_state, repeat)),
+        summarize('core.get_projects', entries, measure(core.get_projects, repeat)),
+        summarize('core.status', entries, measure(core.status, repeat)),
+        summarize('core.export_csv', entries, measure(core.export_csv, repeat)),
+    ]
+
+
+def bench_qt(data_folder, entries, repeat):
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    from floating_button import FloatingButton
+
+    started = time.perf_counter()
+    button = FloatingButton()
+    results = [summarize('FloatingButton()', entries, [time.perf_counter() - started])]
+    try:
+        results.append(summarize('export_to_csv', entries, measure(button.export_to_csv, repeat)))
+        results.append(summarize('get_projects', entries, measure(button.get_projects, repeat)))
+        results.append(summarize('sync_state', entries, measure(button.sync_state, repeat)))
+    finally:
+        for timer in ('chime_timer', 'sync_timer', 'display_timer', 'journal_timer', 'heartbeat_timer',
+                      'metrics_timer'):
+            if hasattr(button, timer):
+                getattr(button, timer).stop()
+        if button.watchdog is not None:
+            button.watchdog.stop()
+        button.lease.release()
+        if button.conn is not None:
+            button.conn.close()
+        button.deleteLater()
+        app.processEvents()
+    return results
+
+
+def environment():
+    """Where the numbers came from"""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'created_at': int(time.time()),
+    }
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                        text=True, cwd=Path(__file__).parent).stdout.strip()
+    except Exception:
+        pass
+    return info
+
+
+def compare(current, baseline_file):
+    """Print the median change of each result against a baseline run"""
+    baseline = {(r['name'], r['entries']): r for r in json.loads(Path(baseline_file).read_text())['results']}
+    for result in current['results']:
+        before = baseline.get((result['name'], result['entries']))
+        if not before or not before['median_ms']:
+            continue
+        ratio = result['median_ms'] / before['median_ms']
+        print(f"{result['name']}\t{result['entries']}\t{before['median_ms']:.1f} -> "
+              f"{result['median_ms']:.1f} ms\t{ratio:.2f}x", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tracker on synthetic databases")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Entry counts to test")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default=str(Path(tempfile.gettempdir()) / "timetracker-bench"),
+                        help="Where generated databases are cached")
+    parser.add_argument('--no-qt', action='store_true', help="Only benchmark the Qt-free core")
+    parser.add_argument('-o', '--output', help="Write JSON results here instead of stdout")
+    parser.add_argument('--compare', help="Baseline JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    workdir = Path(args.workdir)
+    (workdir / "home").mkdir(parents=True, exist_ok=True)
+    # Before anything reads Path.home()
+    os.environ['HOME'] = str(workdir / "home")
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    run = {'environment': environment(), 'results': []}
+    for entries in args.sizes:
+        data_folder = prepare_data_folder(workdir, entries, args.seed)
+        results = bench_core(data_folder, entries, args.repeat)
+        if not args.no_qt:
+            results += bench_qt(data_folder, entries, args.repeat)
+        for result in results:
+            print(f"{result['name']}\t{entries}\t{result['median_ms']:.1f} ms", file=sys.stderr)
+        run['results'] += results
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(run, indent=2))
+    else:
+        print(json.dumps(run, indent=2))
+    if args.compare:
+        compare(run, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
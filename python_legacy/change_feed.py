@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Trigger-maintained change-data-capture feed for time_entries.
+
+SQLite triggers append a compact record (entry id and operation) to a
+`changes` table on every insert, update and delete, whoever makes the
+write: the floating button, the CLI or the SketchyBar shell scripts.
+Consumers keep a named cursor and fetch everything after it in batches,
+so incremental work costs O(changes) instead of O(table).
+
+    python3 change_feed.py tail --consumer billing
+    python3 change_feed.py compact --retention-days 30
+"""
+
+import sys
+import sqlite3
+import argparse
+import time
+from pathlib import Path
+
+DEFAULT_RETENTION_DAYS = 30
+
+
+def install_triggers(conn):
+    """Create the changes table, consumer cursors and the capture triggers"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_cursors (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            updated_at INTEGER
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_feed_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS time_entries_capture_insert
+        AFTER INSERT ON time_entries
+        BEGIN
+            INSERT INTO changes (entry_id, op) VALUES (NEW.id, 'I');
+        END
+    ''')
+    # Only edits of the entry itself are changes; merge.py's stamping
+    # triggers rewrite uid/hlc right after every write and must not show
+    # up as extra updates. Databases from before this get the trigger
+    # replaced.
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'time_entries_capture_update'").fetchone()
+    if row is not None and 'UPDATE OF' not in row[0]:
+        conn.execute('DROP TRIGGER time_entries_capture_update')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS time_entries_capture_update
+        AFTER UPDATE OF project, activity, start_time, end_time ON time_entries
+        BEGIN
+            INSERT INTO changes (entry_id, op) VALUES (NEW.id, 'U');
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS time_entries_capture_delete
+        AFTER DELETE ON time_entries
+        BEGIN
+            INSERT INTO changes (entry_id, op) VALUES (OLD.id, 'D');
+        END
+    ''')
+
+
+def fetch_changes(conn, after, batch_size=500):
+    """Changes with seq greater than after as (seq, op, entry_id, row), row None for deletes"""
+    rows = conn.execute('''
+        SELECT c.seq, c.op, c.entry_id, t.project, t.activity, t.start_time, t.end_time
+        FROM changes c
+        LEFT JOIN time_entries t ON t.id = c.entry_id
+        WHERE c.seq > ?
+        ORDER BY c.seq
+        LIMIT ?
+    ''', (after, batch_size)).fetchall()
+    batch = []
+    for seq, op, entry_id, project, activity, start_time, end_time in rows:
+        row = None
+        if op != 'D' and start_time is not None:
+            row = {'id': entry_id, 'project': project, 'activity': activity,
+                   'start_time': start_time, 'end_time': end_time}
+        batch.append((seq, op, entry_id, row))
+    return batch
+
+
+def latest_seq(conn):
+    """Seq of the newest change ever captured (kept by AUTOINCREMENT through compaction)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    return row[0] if row else 0
+
+
+def expired_through(conn):
+    """Highest seq dropped by retention; readers behind it have missed changes"""
+    row = conn.execute("SELECT value FROM change_feed_meta WHERE key = 'expired_through'").fetchone()
+    return row[0] if row else 0
+
+
+class ChangeConsumer:
+    """Named reader of the change feed with a cursor saved in the database"""
+
+    def __init__(self, db_file, name):
+        self.db_file = Path(db_file)
+        self.name = name
+        self.conn = sqlite3.connect(str(self.db_file))
+        install_triggers(self.conn)
+        self.conn.execute('INSERT OR IGNORE INTO change_cursors (consumer, seq, updated_at) VALUES (?, 0, ?)',
+                          (name, int(time.time())))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def cursor(self):
+        row = self.conn.execute('SELECT seq FROM change_cursors WHERE consumer = ?', (self.name,)).fetchone()
+        return row[0] if row else 0
+
+    def needs_resync(self):
+        """True when retention dropped changes this consumer has not seen
+
+        Only happens to consumers registered after a retention pass; they
+        should read time_entries in full once, then follow the feed.
+        """
+        return self.cursor < expired_through(self.conn)
+
+    def fetch(self, batch_size=500):
+        """Next batch after the cursor as (seq, op, entry_id, row) with row None for deletes
+
+        Each change is joined with the current row, so a batch carries the
+        latest values; the cursor only moves when commit() is called.
+        """
+        return fetch_changes(self.conn, self.cursor, batch_size)
+
+    def commit(self, seq):
+        """Save the cursor after a batch has been processed"""
+        self.conn.execute('UPDATE change_cursors SET seq = ?, updated_at = ? WHERE consumer = ?',
+                          (seq, int(time.time()), self.name))
+        self.conn.commit()
+
+    def batches(self, batch_size=500):
+        """Yield batches until caught up, committing the cursor after each one is consumed"""
+        while True:
+            batch = self.fetch(batch_size)
+            if not batch:
+                return
+            yield batch
+            self.commit(batch[-1][0])
+
+
+def compact(conn, retention_days=DEFAULT_RETENTION_DAYS):
+    """Retention and compaction for the changes table
+
+    Changes every consumer has read are dropped once older than the
+    retention window. Among changes some consumer still needs, only the
+    latest per entry is kept, since fetch() joins with the current row.
+    Returns the number of records removed.
+    """
+    install_triggers(conn)
+    min_cursor = conn.execute('SELECT MIN(seq) FROM change_cursors').fetchone()[0]
+    if min_cursor is None:
+        # No consumers registered yet
+        min_cursor = conn.execute('SELECT MAX(seq) FROM changes').fetchone()[0] or 0
+    cutoff = int(time.time()) - int(retention_days * 86400)
+    with conn:
+        expired_through = conn.execute('SELECT MAX(seq) FROM changes WHERE seq <= ? AND changed_at < ?',
+                                       (min_cursor, cutoff)).fetchone()[0]
+        expired = 0
+        if expired_through is not None:
+            expired = conn.execute('DELETE FROM changes WHERE seq <= ?', (expired_through,)).rowcount
+            conn.execute("INSERT OR REPLACE INTO change_feed_meta (key, value) VALUES ('expired_through', ?)",
+                         (expired_through,))
+        superseded = conn.execute('''
+            DELETE FROM changes
+            WHERE seq > ?
+              AND seq NOT IN (SELECT MAX(seq) FROM changes WHERE seq > ? GROUP BY entry_id)
+        ''', (min_cursor, min_cursor)).rowcount
+    return expired + superseded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time entry change feed")
+    parser.add_argument('--db', help="Database file (defaults to the configured data folder)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    tail = commands.add_parser('tail', help="Print changes after a consumer's cursor and advance it")
+    tail.add_argument('--consumer', required=True)
+    tail.add_argument('--batch-size', type=int, default=500)
+
+    prune = commands.add_parser('compact', help="Apply retention and collapse superseded changes")
+    prune.add_argument('--retention-days', type=float, default=DEFAULT_RETENTION_DAYS)
+    args = parser.parse_args(argv)
+
+    # tracker_core imports the journal, which installs these triggers
+    from tracker_core import database_path, get_data_folder
+    db_file = args.db or database_path(get_data_folder())
+    if args.command == 'tail':
+        consumer = ChangeConsumer(db_file, args.consumer)
+        try:
+            if consumer.needs_resync():
+                print("Cursor is behind the retained changes; do a full re-read", file=sys.stderr)
+            for batch in consumer.batches(args.batch_size):
+                for seq, op, entry_id, row in batch:
+                    print(f"{seq}\t{op}\t{entry_id}\t{row or ''}")
+        finally:
+            consumer.close()
+    else:
+        conn = sqlite3.connect(str(db_file))
+        try:
+            print(f"Removed {compact(conn, args.retention_days)} change records")
+        finally:
+            conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
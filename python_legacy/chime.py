@@ -0,0 +1,34 @@
+"""
+When to chime: once at every 6-minute mark of a tracking session.
+"""
+
+CHIME_INTERVAL = 360
+
+
+class ChimeSchedule:
+    """Decides on each timer tick whether a 6-minute mark has been reached
+
+    A chime is due on the first tick at or after each mark, so a tick
+    that arrives a little late or early never skips or repeats a mark.
+    Marks passed entirely during a stall are reported as missed rather
+    than chimed in a burst.
+    """
+
+    def __init__(self, interval=CHIME_INTERVAL):
+        self.interval = interval
+        self.session = None
+        self.mark = 0
+
+    def due(self, session_start, now):
+        """Return (chime, missed) for a tick at epoch now"""
+        mark = int((now - session_start) // self.interval)
+        if session_start != self.session:
+            # New session (or app start mid-session): count marks from here on
+            self.session = session_start
+            self.mark = max(mark, 0)
+            return False, 0
+        if mark <= self.mark:
+            return False, 0
+        missed = mark - self.mark - 1
+        self.mark = mark
+        return True, missed
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Chime-accuracy benchmark on a virtual clock.
+
+Simulates days of tracking sessions at accelerated speed: a 1-second
+chime timer that fires with Qt's coarse-timer jitter, occasional
+event-loop stalls, and the 2-second block in play_chime after every
+chime. Each tick asks the chime schedule whether to chime, and every
+chime is compared with the ideal 6-minute schedule of its session:
+
+    missed   marks that got no chime
+    double   extra chimes for a mark that already had one
+    drift    how late the first chime of each mark was
+
+The app's schedule (chime.py) is measured alongside the original
+exact-second rule for comparison:
+
+    python3 chime_benchmark.py --days 30 --seed 1 -o chimes.json
+"""
+
+import sys
+import json
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+from chime import ChimeSchedule, CHIME_INTERVAL
+from clock import VirtualClock
+
+TICK_SECONDS = 1.0
+CHIME_BLOCK_SECONDS = 2.0
+
+
+class ExactSecondSchedule:
+    """The original rule: chime when the whole elapsed seconds are a multiple of 360"""
+
+    def due(self, session_start, now):
+        elapsed = int(now - session_start)
+        return elapsed > 0 and elapsed % CHIME_INTERVAL == 0, 0
+
+
+def simulate_session(schedule, clock, length, rng, jitter, stall_rate, stall_mean):
+    """Run one session from clock.time(); returns the chime offsets from its start"""
+    start = clock.time()
+    end = start + length
+    chimes = []
+    while True:
+        # Coarse timers fire up to +/- jitter of the interval; stalls delay the next tick
+        delay = TICK_SECONDS * (1 + rng.uniform(-jitter, jitter))
+        if rng.random() < stall_rate:
+            delay += rng.expovariate(1 / stall_mean)
+        clock.advance(delay)
+        if clock.time() >= end:
+            return chimes
+        chime, _ = schedule.due(start, clock.time())
+        if chime:
+            chimes.append(clock.time() - start)
+            # play_chime holds the event loop while it keeps the chime lock
+            clock.sleep(CHIME_BLOCK_SECONDS)
+
+
+def score(sessions):
+    """Missed, double and drift figures for [(length, chime_offsets)]"""
+    missed = double = marks = 0
+    drifts = []
+    for length, offsets in sessions:
+        session_marks = int(length // CHIME_INTERVAL)
+        marks += session_marks
+        per_mark = {}
+        for offset in offsets:
+            mark = int(offset // CHIME_INTERVAL)
+            per_mark.setdefault(mark, []).append(offset)
+        for mark in range(1, session_marks + 1):
+            hits = per_mark.get(mark)
+            if not hits:
+                missed += 1
+                continue
+            double += len(hits) - 1
+            drifts.append(hits[0] - mark * CHIME_INTERVAL)
+    drifts.sort()
+    return {
+        'marks': marks,
+        'chimes': sum(len(offsets) for _, offsets in sessions),
+        'missed': missed,
+        'double': double,
+        'drift_mean_ms': round(statistics.fmean(drifts) * 1000, 1) if drifts else None,
+        'drift_p95_ms': round(drifts[int(len(drifts) * 0.95)] * 1000, 1) if drifts else None,
+        'drift_max_ms': round(drifts[-1] * 1000, 1) if drifts else None,
+    }
+
+
+def session_layout(days, sessions_per_day, seed):
+    """(length, gap after) of every session, the same for every schedule"""
+    rng = random.Random(seed)
+    return [(rng.uniform(10 * 60, 120 * 60), rng.uniform(60, 3600)) for _ in range(days * sessions_per_day)]
+
+
+def run(schedule_factory, days, sessions_per_day, seed, jitter, stall_rate, stall_mean):
+    clock = VirtualClock(start=0)
+    sessions = []
+    for index, (length, gap) in enumerate(session_layout(days, sessions_per_day, seed)):
+        # Tick noise has its own stream per session, so a schedule that
+        # chimes (and blocks) differently cannot shift the noise of later sessions
+        noise = random.Random(f"{seed}:{index}")
+        offsets = simulate_session(schedule_factory(), clock, length, noise, jitter, stall_rate, stall_mean)
+        sessions.append((length, offsets))
+        clock.advance(gap)
+    return score(sessions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate chime timing on a virtual clock")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--sessions-per-day', type=int, default=8)
+    parser.add_argument('--jitter', type=float, default=0.05, help="Timer jitter as a fraction of the interval")
+    parser.add_argument('--stall-rate', type=float, default=0.001, help="Chance of a stall on each tick")
+    parser.add_argument('--stall-mean', type=float, default=3.0, help="Mean stall length in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, factory in (('schedule', ChimeSchedule), ('exact_second', ExactSecondSchedule)):
+        results[name] = run(factory, args.days, args.sessions_per_day, args.seed,
+                            args.jitter, args.stall_rate, args.stall_mean)
+        r = results[name]
+        print(f"{name}\tmarks {r['marks']}\tmissed {r['missed']}\tdouble {r['double']}\t"
+              f"drift mean {r['drift_mean_ms']} ms\tp95 {r['drift_p95_ms']} ms\tmax {r['drift_max_ms']} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({'parameters': vars(args), 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Clocks for the tracker.
+
+Code that needs the current time takes a clock instead of calling
+time.time() or datetime.now() directly, so chime timing and elapsed-time
+display can be driven by a VirtualClock in simulations (see
+chime_benchmark.py) instead of waiting in real time.
+"""
+
+import time
+from datetime import datetime
+
+
+class SystemClock:
+    """Wall-clock time"""
+
+    def time(self):
+        return time.time()
+
+    def now(self):
+        return datetime.now()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Time that only moves when advanced, starting at epoch start"""
+
+    def __init__(self, start=None):
+        self.current = float(start if start is not None else time.time())
+
+    def time(self):
+        return self.current
+
+    def now(self):
+        return datetime.fromtimestamp(self.current)
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        self.current += seconds
+        return self.current
+
+    def set(self, epoch):
+        self.current = float(epoch)
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+time_entries.csv export shared by both front ends.
+
+Each entry is written with local start and end times, its duration and
+the hours billed under its project's rounding policy (see rounding.py).
+Only the standard library and numpy are needed, so exporting no longer
+imports pandas.
+"""
+
+import os
+import csv
+import time
+from datetime import datetime
+
+from rounding import local_days, format_hours, shared_policies
+from metrics import EXPORT_DURATION, EXPORT_ROWS
+
+COLUMNS = ['ID', 'Project', 'Activity', 'Start Time', 'End Time', 'Duration', 'Hours']
+
+
+def parse_timestamp(value):
+    """Epoch seconds from an epoch or a datetime string (older Windows rows); None if missing or unreadable"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace(' ', 'T')).timestamp()
+    except ValueError:
+        return None
+
+
+def format_duration(total_seconds):
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def format_local(epoch):
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S') if epoch is not None else ''
+
+
+def export_records(rows, now, policies=None):
+    """CSV records for (id, project, activity, start_time, end_time) rows"""
+    records = []
+    entry_seconds = []
+    entry_starts = []
+    for id_val, project, activity, start_value, end_value in rows:
+        start_time = parse_timestamp(start_value)
+        if start_value and start_time is None:
+            # Unreadable start: the row cannot be placed in time
+            continue
+        end_time = parse_timestamp(end_value)
+
+        # Billed hours are rounded in one batch below
+        duration_str = ''
+        total_seconds = 0
+        if start_time is not None and end_time is not None:
+            total_seconds = int(end_time - start_time)
+            duration_str = format_duration(total_seconds)
+        elif start_time is not None:
+            # Currently tracking
+            total_seconds = int(now - start_time)
+            duration_str = f"{format_duration(total_seconds)} (ongoing)"
+        entry_seconds.append(max(total_seconds, 0))
+        entry_starts.append(int(start_time) if start_time is not None else 0)
+
+        records.append([id_val, project or '', activity or '', format_local(start_time),
+                        format_local(end_time), duration_str, ''])
+
+    # Apply each project's rounding policy (default: up to the next 0.1 hour)
+    if records:
+        projects = [record[1] for record in records]
+        labels = list(dict.fromkeys(projects))
+        index = {project: code for code, project in enumerate(labels)}
+        codes = [index[project] for project in projects]
+        billed = (policies or shared_policies()).billed_seconds(entry_seconds, local_days(entry_starts), codes, labels)
+        for record, seconds in zip(records, billed.tolist()):
+            record[6] = format_hours(seconds / 3600.0)
+    return records
+
+
+@EXPORT_DURATION.timed
+def export_csv(conn, csv_path, now=None):
+    """Write every entry in the database to csv_path, returning the row count"""
+    rows = conn.execute('SELECT id, project, activity, start_time, end_time FROM time_entries').fetchall()
+    records = export_records(rows, now if now is not None else time.time())
+    # Same layout pandas' to_csv(index=False) produced
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(COLUMNS)
+        writer.writerows(records)
+    EXPORT_ROWS.set(len(records))
+    return len(records)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Event-sourced storage mode.
+
+With "events" in ~/.config/timetracker/storage, every replayed command is
+also appended to an `events` table as a typed event (start, stop,
+change_activity, change_project) with a monotonically increasing seq,
+in the same transaction that updates time_entries.
+
+time_entries is still the table the app reads, and merges and repairs
+(merge.py, audit.py) still write to it directly, so it is never rebuilt
+from the log. The log keeps the history that in-place updates lose:
+materialize() folds the latest snapshot and the events after it into
+the tracked entries as of any seq, and consumers tail the log from an
+offset instead of diffing whole tables.
+"""
+
+import json
+import time
+
+EVENT_TYPES = ('start', 'stop', 'change_activity', 'change_project')
+
+# Write a materialized snapshot every this many events
+SNAPSHOT_INTERVAL = 500
+
+
+def ensure_event_schema(conn):
+    """Create the event log and snapshot tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id TEXT UNIQUE,
+            type TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            project TEXT,
+            activity TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS snapshots (
+            seq INTEGER PRIMARY KEY,
+            created_at INTEGER,
+            state TEXT
+        )
+    ''')
+
+
+def append_event(conn, event):
+    """Append a journal event to the log, returning its seq (None if already logged)"""
+    if event['command'] not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type: {event['command']}")
+    cursor = conn.execute('''
+        INSERT OR IGNORE INTO events (event_id, type, timestamp, project, activity)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (event['event_id'], event['command'], event['timestamp'],
+          event.get('project'), event.get('activity')))
+    return cursor.lastrowid if cursor.rowcount else None
+
+
+def read_events(conn, after=0, limit=1000):
+    """Events with seq greater than after, oldest first"""
+    cursor = conn.execute('''
+        SELECT seq, event_id, type, timestamp, project, activity
+        FROM events
+        WHERE seq > ?
+        ORDER BY seq
+        LIMIT ?
+    ''', (after, limit))
+    keys = ('seq', 'event_id', 'type', 'timestamp', 'project', 'activity')
+    return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+
+def empty_state():
+    """Materialized state: entries keyed by origin, plus the keys still open"""
+    return {'seq': 0, 'entries': {}, 'open': []}
+
+
+def fold(state, events):
+    """Apply events to a materialized state, mirroring the time_entries updates"""
+    entries = state['entries']
+    open_keys = state['open']
+    for event in events:
+        kind = event['type']
+        if kind == 'start':
+            key = f"e{event['seq']}"
+            entries[key] = [event['project'], event['activity'], event['timestamp'], None]
+            open_keys.append(key)
+        elif kind == 'stop':
+            # Like stop_tracking, closes every open entry
+            for key in open_keys:
+                entries[key][3] = event['timestamp']
+            open_keys.clear()
+        elif kind == 'change_activity':
+            for key in open_keys:
+                entries[key][1] = event['activity']
+        elif kind == 'change_project':
+            for key in open_keys:
+                entries[key][0] = event['project']
+                entries[key][1] = event['activity']
+        state['seq'] = event['seq']
+    return state
+
+
+def latest_snapshot(conn, upto=None):
+    """Most recent snapshot at or before seq upto, or an empty state"""
+    if upto is None:
+        row = conn.execute('SELECT state FROM snapshots ORDER BY seq DESC LIMIT 1').fetchone()
+    else:
+        row = conn.execute('SELECT state FROM snapshots WHERE seq <= ? ORDER BY seq DESC LIMIT 1',
+                           (upto,)).fetchone()
+    return json.loads(row[0]) if row else empty_state()
+
+
+def materialize(conn, upto=None, batch_size=5000):
+    """State after seq upto (default: the whole log), from the nearest snapshot forward"""
+    state = latest_snapshot(conn, upto)
+    while True:
+        events = read_events(conn, state['seq'], batch_size)
+        if upto is not None:
+            events = [e for e in events if e['seq'] <= upto]
+        if not events:
+            return state
+        fold(state, events)
+
+
+def write_snapshot(conn, state):
+    conn.execute('INSERT OR REPLACE INTO snapshots (seq, created_at, state) VALUES (?, ?, ?)',
+                 (state['seq'], int(time.time()), json.dumps(state)))
+
+
+def maybe_snapshot(conn, interval=SNAPSHOT_INTERVAL):
+    """Write a snapshot once enough events have accumulated since the last one"""
+    last_event = conn.execute('SELECT MAX(seq) FROM events').fetchone()[0] or 0
+    last_snapshot = conn.execute('SELECT MAX(seq) FROM snapshots').fetchone()[0] or 0
+    if last_event - last_snapshot >= interval:
+        write_snapshot(conn, materialize(conn))
+        return True
+    return False
+
+
+def bootstrap(conn):
+    """Seed the log with a snapshot of existing time_entries when the mode is first enabled"""
+    ensure_event_schema(conn)
+    has_history = conn.execute('SELECT 1 FROM snapshots LIMIT 1').fetchone() or \
+        conn.execute('SELECT 1 FROM events LIMIT 1').fetchone()
+    if has_history:
+        return False
+    state = empty_state()
+    for id_val, project, activity, start_time, end_time in conn.execute(
+            'SELECT id, project, activity, start_time, end_time FROM time_entries ORDER BY id'):
+        key = f"t{id_val}"
+        state['entries'][key] = [project, activity, start_time, end_time]
+        if end_time is None:
+            state['open'].append(key)
+    write_snapshot(conn, state)
+    return True
+
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Firm-wide roll-up of many attorneys' and clerks' time tracker databases.
+
+Data folders are discovered under one or more root directories; each
+.timetrack.db is opened read-only and pre-aggregated in a worker process
+into billed seconds per (matter, week). The partial aggregates are then
+merged into firm-wide totals by matter, person and week.
+
+    python3 firm_rollup.py /Volumes/Shared/TimeTracking --from 2026-01-01 -o firm_totals.csv
+
+The person is the first directory under the root that contains the
+database, e.g. <root>/jdoe/TimeTracker/.timetrack.db belongs to jdoe.
+"""
+
+import os
+import sys
+import csv
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from reports import load_entries, parse_date
+from rounding import shared_policies
+
+DB_NAME = ".timetrack.db"
+COLUMNS = ['Matter', 'Person', 'Week', 'Hours']
+
+
+def discover(roots):
+    """Find (person, db_file) pairs under the given root directories"""
+    found = []
+    for root in roots:
+        root = Path(root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Skip hidden folders other than the database itself
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            if DB_NAME in filenames:
+                relative = Path(dirpath).relative_to(root)
+                person = relative.parts[0] if relative.parts else root.name
+                found.append((person, str(Path(dirpath) / DB_NAME)))
+    return sorted(found)
+
+
+def week_starts(days):
+    """Monday of the week for each day number (days since 1970-01-01, a Thursday)"""
+    return days - (days + 3) % 7
+
+
+def aggregate_database(job):
+    """Worker: billed seconds per (matter, week) for one database
+
+    Runs in a separate process; returns (person, db_file, partial, error)
+    so a single unreadable database does not abort the roll-up.
+    """
+    person, db_file, start, end, policies = job
+    try:
+        entries = load_entries(db_file, start, end, read_only=True)
+        if not len(entries):
+            return person, db_file, {}, None
+        billed = entries.billed_seconds(policies)
+        weeks = week_starts(entries.day_codes())
+        keys = np.stack([entries.project_codes, weeks], axis=1)
+        unique_keys, groups = np.unique(keys, axis=0, return_inverse=True)
+        totals = np.bincount(groups.reshape(-1), weights=billed)
+        partial = {(entries.projects[code], int(week)): int(total)
+                   for (code, week), total in zip(unique_keys.tolist(), totals.tolist())}
+        return person, db_file, partial, None
+    except Exception as e:
+        return person, db_file, {}, str(e)
+
+
+def rollup(databases, start=None, end=None, workers=None, policies=None):
+    """Aggregate every database in parallel and merge into {(matter, person, week): seconds}"""
+    policies = policies or shared_policies()
+    jobs = [(person, db_file, start, end, policies) for person, db_file in databases]
+    totals = Counter()
+    errors = []
+    if not jobs:
+        return totals, errors
+
+    workers = workers or os.cpu_count() or 1
+    # Several databases per task keeps inter-process overhead low for hundreds of small files
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for person, db_file, partial, error in pool.map(aggregate_database, jobs, chunksize=chunksize):
+            if error:
+                errors.append((db_file, error))
+                continue
+            for (matter, week), seconds in partial.items():
+                totals[(matter, person, week)] += seconds
+    return totals, errors
+
+
+def week_label(day):
+    return (datetime(1970, 1, 1) + timedelta(days=day)).strftime('%Y-%m-%d')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Firm-wide totals by matter, person and week")
+    parser.add_argument('roots', nargs='+', help="Directories containing people's data folders")
+    parser.add_argument('--from', dest='start', help="First day to include (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', help="Day after the last day to include (YYYY-MM-DD)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per core)")
+    parser.add_argument('-o', '--output', help="Write CSV here instead of printing")
+    args = parser.parse_args(argv)
+
+    databases = discover(args.roots)
+    totals, errors = rollup(databases,
+                            parse_date(args.start) if args.start else None,
+                            parse_date(args.end) if args.end else None,
+                            args.workers)
+    for db_file, error in errors:
+        print(f"Error reading {db_file}: {error}", file=sys.stderr)
+
+    rows = [{'Matter': matter, 'Person': person, 'Week': week_label(week),
+             'Hours': round(seconds / 3600.0, 2)}
+            for (matter, person, week), seconds in sorted(totals.items())]
+    if args.output:
+        # Same layout as csv_export.py
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, COLUMNS, lineterminator=os.linesep)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Wrote {len(rows)} rows from {len(databases) - len(errors)} databases to {args.output}")
+    else:
+        for row in rows:
+            print(f"{row['Matter']}\t{row['Person']}\t{row['Week']}\t{row['Hours']:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,18 @@
 #!/usr/bin/env python3
 
 import sys
-import sqlite3
+
+if __name__ == "__main__":
+    # A second launch hands its arguments to the running instance before loading Qt
+    from single_instance import Launch, configured_data_folder
+    launch = Launch(configured_data_folder())
+    if not launch.claim(sys.argv[1:]):
+        sys.exit(0)
 from datetime import datetime
 import os
-import json
-import fcntl
-import time
-import math
+import signal
 from pathlib import Path
 
-# Only import what we need from pandas
-from pandas import DataFrame
-
 # Only import what we need from PyQt6
 from PyQt6.QtWidgets import (QApplication, QPushButton, QComboBox, QDialog, 
                             QVBoxLayout, QLineEdit, QDialogButtonBox, QWidget, QHBoxLayout)
@@ -20,105 +20,27 @@ from PyQt6.QtCore import Qt, QTimer, QUrl
 from PyQt6.QtGui import QColor, QPainter, QPen
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 
-class StateManager:
-    """Manages shared state between different time tracking apps with file locking"""
-    
-    def __init__(self, data_folder):
-        self.data_folder = Path(data_folder)
-        self.state_file = self.data_folder / ".app_state.json"
-        self.lock_file = self.data_folder / ".app_state.lock"
-        self.db_file = self.data_folder / ".timetrack.db"
-        
-    def acquire_lock(self, timeout=5):
-        """Acquire exclusive lock on state file"""
-        try:
-            self.lock_fd = open(self.lock_file, 'w')
-            # Try to acquire lock with timeout
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                try:
-                    fcntl.flock(self.lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                    return True
-                except IOError:
-                    time.sleep(0.1)
-            return False
-        except Exception:
-            return False
-    
-    def release_lock(self):
-        """Release the lock"""
-        try:
-            if hasattr(self, 'lock_fd'):
-                fcntl.flock(self.lock_fd.fileno(), fcntl.LOCK_UN)
-                self.lock_fd.close()
-                delattr(self, 'lock_fd')
-        except Exception:
-            pass
-    
-    def get_current_state(self):
-        """Get current tracking state from database"""
-        try:
-            conn = sqlite3.connect(str(self.db_file))
-            cursor = conn.cursor()
-            cursor.execute("SELECT project, activity, start_time FROM time_entries WHERE end_time IS NULL ORDER BY start_time DESC LIMIT 1")
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'is_tracking': True,
-                    'project': result[0],
-                    'activity': result[1] if len(result) > 1 else '',
-                    'start_time': result[2] if len(result) > 2 else result[1],
-                    'last_updated': int(time.time())
-                }
-            else:
-                return {
-                    'is_tracking': False,
-                    'project': None,
-                    'activity': None,
-                    'start_time': None,
-                    'last_updated': int(time.time())
-                }
-        except Exception:
-            return None
-    
-    def save_state(self, state):
-        """Save current state to file with locking"""
-        if self.acquire_lock():
-            try:
-                state['last_updated'] = int(time.time())
-                with open(self.state_file, 'w') as f:
-                    json.dump(state, f)
-                return True
-            except Exception:
-                return False
-            finally:
-                self.release_lock()
-        return False
-    
-    def load_state(self):
-        """Load state from file with locking"""
-        if self.acquire_lock():
-            try:
-                if self.state_file.exists():
-                    with open(self.state_file, 'r') as f:
-                        state = json.load(f)
-                    return state
-                return None
-            except Exception:
-                return None
-            finally:
-                self.release_lock()
-        return None
-    
-    def sync_with_database(self):
-        """Synchronize state file with database state"""
-        db_state = self.get_current_state()
-        if db_state:
-            self.save_state(db_state)
-            return db_state
-        return None
+from clock import SYSTEM_CLOCK
+from chime import ChimeSchedule
+from locking import FileLock
+from leader import LeaderLease
+from single_instance import parse_launch_arguments
+from tracker_core import TrackerCore, get_data_folder, local_first_enabled, open_database
+from replication import Replicator
+from sketchybar import SketchyBarPublisher
+from api_server import configured_port, start_in_thread
+import startup_probe
+from applog import get_logger, setup_logging
+import profiler
+from metrics import DATABASE_SETUP, DATABASE_BYTES, SYNC_TICK, CHIME_MISSES, metrics_file, write_textfile
+from stall_watchdog import StallWatchdog, configured_threshold, HEARTBEAT_MS
+
+log = get_logger("floating_button")
+
+# Handlers timed in --profile mode (see profiler.py)
+PROFILED_SLOTS = ('check_chime_time', 'sync_state', 'update_appearance', 'replay_journal', 'play_chime',
+                  'export_to_csv', 'mousePressEvent', 'mouseMoveEvent', 'mouseReleaseEvent')
+PROFILE_CAPTURE_SECONDS = 10
 
 class DraggableHandle(QWidget):
     def __init__(self, parent=None):
@@ -127,6 +49,9 @@ class DraggableHandle(QWidget):
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.old_pos = None
+        if profiler.get_profiler():
+            profiler.get_profiler().instrument(self, ('paintEvent', 'mousePressEvent', 'mouseMoveEvent',
+                                                      'mouseReleaseEvent'))
         
         layout = QHBoxLayout()
         layout.setContentsMargins(10, 10, 10, 10)
@@ -139,6 +64,7 @@ class DraggableHandle(QWidget):
         self.load_position()
 
     def paintEvent(self, event):
+        startup_probe.mark('first_paint')
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
@@ -210,7 +136,7 @@ class DraggableHandle(QWidget):
             with open(config_file, 'w') as f:
                 f.write(f"{pos.x()},{pos.y()}")
         except Exception as e:
-            print(f"Error saving position: {e}")
+            log.error("Error saving position: %s", e)
     
     def load_position(self):
         """Load saved position from config file"""
@@ -221,7 +147,7 @@ class DraggableHandle(QWidget):
                     x, y = map(int, f.read().strip().split(','))
                     self.move(x, y)
         except Exception as e:
-            print(f"Error loading position: {e}")
+            log.error("Error loading position: %s", e)
             # Keep default position if loading fails
 
 class ProjectDialog(QDialog):
@@ -331,7 +257,7 @@ class ActivityDialog(QDialog):
                     for act in existing:
                         f.write(f"{act}\n")
         except Exception as e:
-            print(f"Error saving custom activity: {e}")
+            log.error("Error saving custom activity: %s", e)
     
     def get_activity(self):
         """Get the selected activity, handling custom activities"""
@@ -368,6 +294,11 @@ class TrackingMenuDialog(QDialog):
         layout.addWidget(change_project_btn)
         layout.addWidget(stop_tracking_btn)
         
+        if profiler.get_profiler():
+            profile_btn = QPushButton(f"Capture Profile ({PROFILE_CAPTURE_SECONDS}s)")
+            profile_btn.clicked.connect(lambda: self.select_action("capture_profile"))
+            layout.addWidget(profile_btn)
+        
         # Cancel button
         cancel_btn = QPushButton("Cancel")
         cancel_btn.clicked.connect(self.reject)
@@ -383,10 +314,20 @@ class TrackingMenuDialog(QDialog):
         return self.selected_action
 
 class FloatingButton(QPushButton):
-    def __init__(self):
+    def __init__(self, clock=None):
         super().__init__()
         self.setFixedSize(120, 120)  # Circular button
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        
+        # Profiling mode: time every timer slot and mouse handler before they are connected
+        self.profiler = profiler.get_profiler()
+        if self.profiler:
+            self.profiler.instrument(self, PROFILED_SLOTS)
+        
+        # All time reads go through the clock so simulations can drive it (see clock.py)
+        self.clock = clock or SYSTEM_CLOCK
+        self.chime_schedule = ChimeSchedule()
+        
         self.is_tracking = False
         self.current_project = None
         self.current_activity = None
@@ -394,12 +335,23 @@ class FloatingButton(QPushButton):
         self.last_known_session_start = None  # Track when we last knew a session started
         
         # Setup data folder and state manager
-        self.data_folder = self.get_data_folder()
-        self.state_manager = StateManager(self.data_folder)
+        self.data_folder = get_data_folder()
+        
+        # Every command is journaled locally first so it survives an unreachable data folder
+        self.core = TrackerCore(self.data_folder, clock=self.clock)
+        self.journal = self.core.journal
+        self.state_manager = self.core.state_manager
+        
+        # Pushes state to SketchyBar only when the displayed text changes
+        self.bar = SketchyBarPublisher()
         
         self.setup_database()
         self.setup_sound()
         
+        # Only the leader among instances on this database exports, publishes state and chimes
+        self.lease = LeaderLease(self.core.db_file, clock=self.clock)
+        self.lease.start()
+        
         # Load initial state from database/state file
         self.sync_state()
         self.update_appearance()
@@ -418,23 +370,38 @@ class FloatingButton(QPushButton):
         self.display_timer = QTimer()
         self.display_timer.timeout.connect(self.update_appearance)
         self.display_timer.start(1000)  # 1 second
-
-    def get_data_folder(self):
-        config_file = Path.home() / ".config" / "timetracker" / "config"
         
-        if config_file.exists():
-            # Read existing config
-            data_folder = config_file.read_text().strip()
-        else:
-            # First run - use default location
-            data_folder = str(Path.home() / "Documents" / "TimeTracker")
-            # Create config directory and save choice
-            config_file.parent.mkdir(parents=True, exist_ok=True)
-            config_file.write_text(data_folder)
-        
-        # Ensure data directory exists
-        Path(data_folder).mkdir(parents=True, exist_ok=True)
-        return data_folder
+        # Journal replay timer - retry pending commands while the data folder is unavailable
+        self.journal_timer = QTimer()
+        self.journal_timer.timeout.connect(self.replay_journal)
+        self.journal_timer.start(10000)  # 10 seconds
+        self.replay_journal()
+        
+        # Local-first mode: ship snapshots of the local database to the data folder
+        self.replicator = None
+        if local_first_enabled():
+            self.replicator = Replicator(self.core.db_file, Path(self.data_folder) / ".timetrack.db")
+            self.replicator.start()
+        
+        # Optional localhost API for integrations
+        api_port = configured_port()
+        if api_port:
+            self.api_thread = start_in_thread(self.core, api_port)
+        
+        # Stall detector: a watchdog thread samples our stack when these heartbeats stop
+        self.watchdog = None
+        stall_threshold = configured_threshold()
+        if stall_threshold:
+            self.watchdog = StallWatchdog(stall_threshold)
+            self.heartbeat_timer = QTimer()
+            self.heartbeat_timer.timeout.connect(self.watchdog.beat)
+            self.heartbeat_timer.start(HEARTBEAT_MS)
+            self.watchdog.start()
+        
+        # Metrics file for local collectors (see metrics.py)
+        self.metrics_timer = QTimer()
+        self.metrics_timer.timeout.connect(self.write_metrics)
+        self.metrics_timer.start(60000)  # 1 minute
 
     def setup_sound(self):
         self.player = QMediaPlayer()
@@ -464,23 +431,20 @@ class FloatingButton(QPushButton):
             lock_file = Path.home() / ".config" / "timetracker" / "chime.lock"
             lock_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Try to acquire lock (non-blocking)
-            try:
-                with open(lock_file, 'w') as f:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                    
+            # Try to acquire lock (non-blocking); if another process holds it, skip chiming
+            chime_lock = FileLock(lock_file)
+            if chime_lock.acquire(timeout=0):
+                try:
                     self.player.setPosition(0)
                     self.player.play()
                     
                     # Keep lock for 2 seconds to prevent immediate double chiming
-                    time.sleep(2)
-                    
-            except (IOError, OSError):
-                # Lock is held by another process, skip chiming
-                pass
+                    self.clock.sleep(2)
+                finally:
+                    chime_lock.release()
                 
         except Exception as e:
-            print(f"Error playing chime: {e}")
+            log.error("Error playing chime: %s", e)
 
     def check_chime_time(self):
         """Check if it's time to chime (every 6 minutes from start time)"""
@@ -488,59 +452,56 @@ class FloatingButton(QPushButton):
             return
             
         try:
-            # Calculate elapsed time since tracking started
-            elapsed = datetime.now() - self.start_time
-            elapsed_seconds = int(elapsed.total_seconds())
-            
-            # Check if we're at a 6-minute mark (360 seconds)
-            if elapsed_seconds > 0 and elapsed_seconds % 360 == 0:
-                # We're exactly at a 6-minute mark - play chime
+            # Chime on the first tick at or after each 6-minute mark; a tick that
+            # lands a little early or late no longer skips or repeats a mark
+            chime, missed = self.chime_schedule.due(self.start_time.timestamp(), self.clock.time())
+            # Followers keep the schedule current but the leader chimes for everyone
+            if not self.lease.is_leader:
+                return
+            if missed:
+                CHIME_MISSES.inc(missed)
+            if chime:
                 self.play_chime()
                 
         except Exception as e:
-            print(f"Error checking chime time: {e}")
+            log.error("Error checking chime time: %s", e)
 
+    @DATABASE_SETUP.timed
     def setup_database(self):
-        db_path = Path(self.data_folder) / ".timetrack.db"
-        self.csv_path = Path(self.data_folder) / "time_entries.csv"
-        
-        self.conn = sqlite3.connect(str(db_path))
-        self.cursor = self.conn.cursor()
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS time_entries (
-                id INTEGER PRIMARY KEY,
-                project TEXT,
-                activity TEXT,
-                start_time TIMESTAMP,
-                end_time TIMESTAMP
-            )
-        ''')
-        
-        # Add activity column if it doesn't exist (for existing databases)
+        self.csv_path = self.core.csv_path()
+        
         try:
-            self.cursor.execute('ALTER TABLE time_entries ADD COLUMN activity TEXT')
-            self.conn.commit()
-        except sqlite3.OperationalError:
-            # Column already exists
-            pass
-        self.conn.commit()
+            # Creates or migrates the schema, change feed and merge columns included
+            self.conn = open_database(self.core.db_file)
+            self.cursor = self.conn.cursor()
+        except Exception as e:
+            # Data folder unavailable - commands are journaled and replayed later
+            log.error("Error opening database: %s", e)
+            self.conn = None
+            self.cursor = None
+
+    def replay_journal(self):
+        """Replay journaled commands into the database without blocking the UI"""
+        self.core.replay_in_background(self.journal_replayed)
 
+    def journal_replayed(self):
+        """Runs on the replay thread; the leader regenerates the CSV on its next sync tick"""
+        if self.replicator:
+            self.replicator.request()
+
+    @SYNC_TICK.timed
     def sync_state(self):
         """Synchronize state with other apps"""
         try:
-            # Get current state from database
-            db_state = self.state_manager.get_current_state()
-            if not db_state:
-                return
+            if self.conn is None and not self.journal.has_pending():
+                self.setup_database()
             
-            # Check if state has changed
-            state_changed = False
-            if db_state['is_tracking'] != self.is_tracking:
-                state_changed = True
-            elif db_state['is_tracking'] and db_state['project'] != self.current_project:
-                state_changed = True
+            # Shared with the Windows button; the leader also exports and publishes the state file
+            db_state, transition = self.core.sync(self.is_tracking, self.current_project, self.current_activity,
+                                                  self.lease.is_leader, self.conn, self.export_to_csv)
             
-            if state_changed:
+            # Check if state has changed
+            if transition:
                 # Check if we're starting tracking from external source
                 was_tracking = self.is_tracking
                 
@@ -559,13 +520,15 @@ class FloatingButton(QPushButton):
                     session_start_time = db_state['start_time']
                     if self.last_known_session_start != session_start_time:
                         # This is a new tracking session - play chime and start timer
-                        self.play_chime()
+                        if self.lease.is_leader:
+                            self.play_chime()
                         self.last_known_session_start = session_start_time
                     # Always ensure timer is running when tracking
                     self.chime_timer.start()
                 elif not self.is_tracking and was_tracking:
                     # Stopped tracking externally - play chime and stop timer
-                    self.play_chime()
+                    if self.lease.is_leader:
+                        self.play_chime()
                     self.chime_timer.stop()
                     self.last_known_session_start = None
                 elif self.is_tracking and not self.chime_timer.isActive():
@@ -578,13 +541,21 @@ class FloatingButton(QPushButton):
                 # Update appearance
                 self.update_appearance()
             
-            # Save current state to state file
-            self.state_manager.save_state(db_state)
-            
         except Exception as e:
-            print(f"Error syncing state: {e}")
+            log.error("Error syncing state: %s", e)
+
+    def write_metrics(self):
+        """Write the metrics registry into the data folder for local collectors"""
+        try:
+            if Path(self.core.db_file).exists():
+                DATABASE_BYTES.set(os.path.getsize(self.core.db_file))
+            write_textfile(metrics_file(self.data_folder))
+        except Exception as e:
+            log.error("Error writing metrics: %s", e)
 
     def get_projects(self):
+        if self.cursor is None:
+            return []
         self.cursor.execute('SELECT DISTINCT project FROM time_entries WHERE project NOT LIKE "[HIDDEN]%" ORDER BY project')
         projects = [row[0] for row in self.cursor.fetchall()]
         return projects
@@ -594,7 +565,7 @@ class FloatingButton(QPushButton):
         if self.is_tracking and self.current_project:
             # Calculate elapsed time
             if self.start_time:
-                elapsed = datetime.now() - self.start_time
+                elapsed = self.clock.now() - self.start_time
                 hours = int(elapsed.total_seconds() // 3600)
                 minutes = int((elapsed.total_seconds() % 3600) // 60)
                 if hours > 0:
@@ -624,6 +595,12 @@ class FloatingButton(QPushButton):
             }}
         """)
         self.setText(text)
+        
+        self.bar.publish({
+            'is_tracking': self.is_tracking,
+            'project': self.current_project,
+            'start_time': int(self.start_time.timestamp()) if self.start_time else None
+        })
 
     def mousePressEvent(self, event):
         # Only accept the event if it's in the inner circle (excluding white border)
@@ -685,6 +662,14 @@ class FloatingButton(QPushButton):
                 self.change_project()
             elif action == "stop_tracking":
                 self.stop_tracking()
+            elif action == "capture_profile":
+                self.capture_profile()
+
+    def capture_profile(self, seconds=PROFILE_CAPTURE_SECONDS):
+        """Record a cProfile capture of the next few seconds (profiling mode only)"""
+        if self.profiler and self.profiler.start_capture():
+            log.info("Capturing profile for %s seconds", seconds)
+            QTimer.singleShot(int(seconds * 1000), self.profiler.stop_capture)
 
     def change_activity(self):
         """Change the activity for current tracking session"""
@@ -692,28 +677,14 @@ class FloatingButton(QPushButton):
         if activity_dialog.exec() == QDialog.DialogCode.Accepted:
             new_activity = activity_dialog.get_activity()
             if new_activity:
-                # Update the current activity in the database
-                self.cursor.execute('''
-                    UPDATE time_entries 
-                    SET activity = ? 
-                    WHERE end_time IS NULL
-                ''', (new_activity,))
-                self.conn.commit()
+                # Journal the change and update the state file
+                self.core.change_activity(new_activity, int(self.start_time.timestamp()) if self.start_time else None)
                 
                 # Update internal state
                 self.current_activity = new_activity
                 
-                # Update state file
-                state = {
-                    'is_tracking': True,
-                    'project': self.current_project,
-                    'activity': new_activity,
-                    'start_time': int(self.start_time.timestamp()) if self.start_time else None
-                }
-                self.state_manager.save_state(state)
-                
-                # Regenerate CSV
-                self.export_to_csv()
+                # Replay regenerates the CSV
+                self.replay_journal()
                 
                 self.update_appearance()
 
@@ -728,55 +699,45 @@ class FloatingButton(QPushButton):
                 if activity_dialog.exec() == QDialog.DialogCode.Accepted:
                     new_activity = activity_dialog.get_activity()
                     if new_activity:
-                        # Update both project and activity in the database
-                        self.cursor.execute('''
-                            UPDATE time_entries 
-                            SET project = ?, activity = ? 
-                            WHERE end_time IS NULL
-                        ''', (new_project, new_activity))
-                        self.conn.commit()
+                        # Journal the change and update the state file
+                        self.core.change_project(new_project, new_activity,
+                                                 int(self.start_time.timestamp()) if self.start_time else None)
                         
                         # Update internal state
                         self.current_project = new_project
                         self.current_activity = new_activity
                         
-                        # Update state file
-                        state = {
-                            'is_tracking': True,
-                            'project': new_project,
-                            'activity': new_activity,
-                            'start_time': int(self.start_time.timestamp()) if self.start_time else None
-                        }
-                        self.state_manager.save_state(state)
-                        
-                        # Regenerate CSV
-                        self.export_to_csv()
+                        # Replay regenerates the CSV
+                        self.replay_journal()
                         
                         self.update_appearance()
 
+    def handle_arguments(self, argv):
+        """Apply launch arguments, from this launch or forwarded by a later one"""
+        args = parse_launch_arguments(argv)
+        if args is None:
+            log.warning("Ignoring launch arguments: %s", argv)
+            return
+        if args.stop:
+            self.stop_tracking()
+        elif args.start:
+            if self.is_tracking:
+                if args.start == self.current_project and args.activity in ('', self.current_activity):
+                    return
+                self.stop_tracking()
+            self.start_tracking(args.start, args.activity)
+
     def start_tracking(self, project, activity):
         """Start tracking a project with activity"""
         try:
             self.current_project = project
             self.current_activity = activity
             self.is_tracking = True
-            self.start_time = datetime.now()
+            self.start_time = self.clock.now()
             
-            # Insert into database
-            self.cursor.execute('''
-                INSERT INTO time_entries (project, activity, start_time)
-                VALUES (?, ?, ?)
-            ''', (project, activity, int(self.start_time.timestamp())))
-            self.conn.commit()
-            
-            # Update state file
-            state = {
-                'is_tracking': True,
-                'project': project,
-                'activity': activity,
-                'start_time': int(self.start_time.timestamp())
-            }
-            self.state_manager.save_state(state)
+            # Journal the start and update the state file; replay inserts it into the database
+            self.core.start(project, activity, self.start_time.timestamp())
+            self.replay_journal()
             
             # Play initial chime and start 6-minute chime timer
             self.play_chime()
@@ -786,7 +747,7 @@ class FloatingButton(QPushButton):
             self.update_appearance()
             
         except Exception as e:
-            print(f"Error starting tracking: {e}")
+            log.error("Error starting tracking: %s", e)
 
     def stop_tracking(self):
         """Stop tracking"""
@@ -794,18 +755,11 @@ class FloatingButton(QPushButton):
             if not self.is_tracking:
                 return
                 
-            end_time = datetime.now()
-            
-            # Update database
-            self.cursor.execute('''
-                UPDATE time_entries 
-                SET end_time = ? 
-                WHERE end_time IS NULL
-            ''', (int(end_time.timestamp()),))
-            self.conn.commit()
+            end_time = self.clock.now()
             
-            # Export to CSV
-            self.export_to_csv()
+            # Journal the stop and update the state file; replay closes the entry and regenerates the CSV
+            self.core.stop(end_time.timestamp())
+            self.replay_journal()
             
             # Update state
             self.is_tracking = False
@@ -814,15 +768,6 @@ class FloatingButton(QPushButton):
             self.start_time = None
             self.last_known_session_start = None
             
-            # Update state file
-            state = {
-                'is_tracking': False,
-                'project': None,
-                'activity': None,
-                'start_time': None
-            }
-            self.state_manager.save_state(state)
-            
             # Play final chime and stop chime timer
             self.play_chime()
             self.chime_timer.stop()
@@ -830,73 +775,47 @@ class FloatingButton(QPushButton):
             self.update_appearance()
             
         except Exception as e:
-            print(f"Error stopping tracking: {e}")
+            log.error("Error stopping tracking: %s", e)
 
     def export_to_csv(self):
+        if self.conn is None:
+            return
         try:
-            self.cursor.execute('SELECT id, project, activity, start_time, end_time FROM time_entries')
-            rows = self.cursor.fetchall()
-            
-            # Process data for CSV with local times and durations
-            csv_data = []
-            for row in rows:
-                id_val, project, activity, start_time, end_time = row
-                
-                # Convert timestamps to local datetime strings
-                start_dt = datetime.fromtimestamp(start_time) if start_time else None
-                end_dt = datetime.fromtimestamp(end_time) if end_time else None
-                
-                start_str = start_dt.strftime('%Y-%m-%d %H:%M:%S') if start_dt else ''
-                end_str = end_dt.strftime('%Y-%m-%d %H:%M:%S') if end_dt else ''
-                
-                # Calculate duration and decimal hours
-                duration_str = ''
-                decimal_hours = 0.0
-                if start_dt and end_dt:
-                    duration = end_dt - start_dt
-                    total_seconds = int(duration.total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    seconds = total_seconds % 60
-                    duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                    # Calculate decimal hours rounded up to nearest tenth
-                    exact_hours = total_seconds / 3600.0
-                    decimal_hours = math.ceil(exact_hours * 10) / 10
-                elif start_dt and not end_dt:
-                    # Currently tracking
-                    duration = datetime.now() - start_dt
-                    total_seconds = int(duration.total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    seconds = total_seconds % 60
-                    duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d} (ongoing)"
-                    # Calculate decimal hours for ongoing sessions too
-                    exact_hours = total_seconds / 3600.0
-                    decimal_hours = math.ceil(exact_hours * 10) / 10
-                
-                csv_data.append({
-                    'ID': id_val,
-                    'Project': project or '',
-                    'Activity': activity or '',
-                    'Start Time': start_str,
-                    'End Time': end_str,
-                    'Duration': duration_str,
-                    'Hours': f"{decimal_hours:.1f}"
-                })
-            
-            df = DataFrame(csv_data)
-            df.to_csv(self.csv_path, index=False)
+            self.core.export_csv(self.conn)
         except Exception as e:
-            print(f"Error exporting CSV: {e}")
+            log.error("Error exporting CSV: %s", e)
 
-def main():
+def main(launch=None):
+    startup_probe.mark('imports')
+    setup_logging()
+    if '--profile' in sys.argv:
+        profiler.enable()
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)  # Keep app running when window is closed
+    startup_probe.mark('qapplication')
     
     handle = DraggableHandle()
     handle.show()
+    # Hand leadership over at once instead of when the lease expires
+    app.aboutToQuit.connect(handle.button.lease.release)
+    
+    # Later launches forward their arguments here instead of starting another app
+    def on_arguments(argv):
+        handle.show()
+        handle.raise_()
+        handle.activateWindow()
+        handle.button.handle_arguments(argv)
+    if launch is not None and not launch.listen(on_arguments):
+        log.warning("Not listening for other launches; a second launch will start another instance")
+    handle.button.handle_arguments(sys.argv[1:])
+    startup_probe.quit_when_idle(app)
+    
+    if profiler.get_profiler():
+        # kill -USR1 <pid> captures a profile; handled when the next timer runs Python code
+        signal.signal(signal.SIGUSR1, lambda signum, frame: handle.button.capture_profile())
+        log.info("Profiling mode: kill -USR1 %d to capture %ds", os.getpid(), PROFILE_CAPTURE_SECONDS)
     
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(launch) 
\ No newline at end of file
@@ -5,12 +5,16 @@ A cross-platform time tracking application with project management.
 """
 
 import sys
-import sqlite3
-import json
-import fcntl
+
+if __name__ == "__main__":
+    # A second launch hands its arguments to the running instance before loading Qt
+    from single_instance import Launch, configured_data_folder
+    launch = Launch(configured_data_folder())
+    if not launch.claim(sys.argv[1:]):
+        sys.exit(0)
+
 from datetime import datetime
 from pathlib import Path
-import pandas as pd
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, 
                             QHBoxLayout, QDialog, QComboBox, QLineEdit, 
                             QDialogButtonBox, QLabel, QMessageBox)
@@ -18,66 +22,12 @@ from PyQt6.QtCore import Qt, QTimer, QUrl
 from PyQt6.QtGui import QPainter, QColor, QPen
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 
-class StateManager:
-    """Manages application state with file locking for cross-platform compatibility"""
-    
-    def __init__(self, data_folder):
-        self.data_folder = Path(data_folder)
-        self.state_file = self.data_folder / ".app_state.json"
-        self.lock_file = self.data_folder / ".app_state.lock"
-        self.lock_handle = None
-        
-    def acquire_lock(self, timeout=5):
-        """Acquire file lock for state management"""
-        try:
-            self.lock_handle = open(self.lock_file, 'w')
-            if sys.platform == "win32":
-                # Windows file locking
-                import msvcrt
-                msvcrt.locking(self.lock_handle.fileno(), msvcrt.LK_NBLCK, 1)
-            else:
-                # Unix-style file locking
-                fcntl.flock(self.lock_handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            return True
-        except (IOError, OSError):
-            if self.lock_handle:
-                self.lock_handle.close()
-                self.lock_handle = None
-            return False
-    
-    def release_lock(self):
-        """Release file lock"""
-        if self.lock_handle:
-            try:
-                if sys.platform == "win32":
-                    import msvcrt
-                    msvcrt.locking(self.lock_handle.fileno(), msvcrt.LK_UNLCK, 1)
-                else:
-                    fcntl.flock(self.lock_handle.fileno(), fcntl.LOCK_UN)
-            except:
-                pass
-            finally:
-                self.lock_handle.close()
-                self.lock_handle = None
-    
-    def save_state(self, state):
-        """Save application state to file"""
-        if self.acquire_lock():
-            try:
-                with open(self.state_file, 'w') as f:
-                    json.dump(state, f)
-            finally:
-                self.release_lock()
-    
-    def load_state(self):
-        """Load application state from file"""
-        if self.state_file.exists():
-            try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {}
+from tracker_core import TrackerCore, get_data_folder, open_database
+from leader import LeaderLease
+from single_instance import parse_launch_arguments
+from applog import get_logger, setup_logging
+
+log = get_logger("floating_button_windows")
 
 class DraggableHandle(QWidget):
     """Draggable container for the floating button"""
@@ -121,7 +71,7 @@ class DraggableHandle(QWidget):
             with open(position_file, 'w') as f:
                 f.write(f"{self.x()},{self.y()}")
         except Exception as e:
-            print(f"Error saving position: {e}")
+            log.error("Error saving position: %s", e)
     
     def load_position(self):
         """Load saved position from config file"""
@@ -132,7 +82,7 @@ class DraggableHandle(QWidget):
                     x, y = map(int, f.read().strip().split(','))
                     self.move(x, y)
         except Exception as e:
-            print(f"Error loading position: {e}")
+            log.error("Error loading position: %s", e)
     
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -264,7 +214,7 @@ class ActivityDialog(QDialog):
                     for act in existing:
                         f.write(f"{act}\n")
         except Exception as e:
-            print(f"Error saving custom activity: {e}")
+            log.error("Error saving custom activity: %s", e)
     
     def get_activity(self):
         selected = self.combo.currentText()
@@ -324,13 +274,18 @@ class FloatingButton(QPushButton):
         self.current_activity = None
         self.start_time = None
         
-        # Setup data folder and state manager
-        self.data_folder = self.get_data_folder()
-        self.state_manager = StateManager(self.data_folder)
+        # Setup data folder and the tracking core shared with the macOS button
+        self.data_folder = get_data_folder()
+        self.core = TrackerCore(self.data_folder)
+        self.state_manager = self.core.state_manager
         
         self.setup_database()
         self.setup_sound()
         
+        # Only the leader among instances on this database exports the CSV
+        self.lease = LeaderLease(self.core.db_file)
+        self.lease.start()
+        
         # Load initial state
         self.sync_state()
         self.update_appearance()
@@ -344,30 +299,11 @@ class FloatingButton(QPushButton):
         self.display_timer.timeout.connect(self.update_appearance)
         self.display_timer.start(1000)  # 1 second
         
-        # CSV export timer - ensure CSV is updated regularly
+        # CSV export timer - keeps the leader's ongoing durations current
         self.csv_timer = QTimer()
-        self.csv_timer.timeout.connect(self.export_to_csv)
+        self.csv_timer.timeout.connect(self.export_if_leader)
         self.csv_timer.start(30000)  # 30 seconds
     
-    def get_data_folder(self):
-        """Get or prompt for data folder"""
-        config_file = Path.home() / ".config" / "timetracker" / "config"
-        
-        if config_file.exists():
-            data_folder = config_file.read_text().strip()
-        else:
-            # Default to Documents/TimeTracker on Windows
-            if sys.platform == "win32":
-                data_folder = str(Path.home() / "Documents" / "TimeTracker")
-            else:
-                data_folder = str(Path.home() / "Documents" / "TimeTracker")
-            
-            config_file.parent.mkdir(parents=True, exist_ok=True)
-            config_file.write_text(data_folder)
-        
-        Path(data_folder).mkdir(parents=True, exist_ok=True)
-        return data_folder
-    
     def setup_sound(self):
         """Setup audio player (simplified for cross-platform)"""
         try:
@@ -381,7 +317,7 @@ class FloatingButton(QPushButton):
             if sound_path.exists():
                 self.player.setSource(QUrl.fromLocalFile(str(sound_path)))
         except Exception as e:
-            print(f"Audio setup failed: {e}")
+            log.error("Audio setup failed: %s", e)
             self.player = None
     
     def play_chime(self):
@@ -390,66 +326,49 @@ class FloatingButton(QPushButton):
             try:
                 self.player.play()
             except Exception as e:
-                print(f"Error playing chime: {e}")
+                log.error("Error playing chime: %s", e)
     
     def setup_database(self):
         """Setup SQLite database"""
-        self.db_path = Path(self.data_folder) / ".timetrack.db"
-        self.csv_path = Path(self.data_folder) / "time_entries.csv"
-        
-        self.conn = sqlite3.connect(str(self.db_path))
-        self.cursor = self.conn.cursor()
-        
-        # Create table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS time_entries (
-                id INTEGER PRIMARY KEY,
-                project TEXT,
-                activity TEXT,
-                start_time TIMESTAMP,
-                end_time TIMESTAMP
-            )
-        ''')
-        
-        # Add activity column if it doesn't exist
-        try:
-            self.cursor.execute('ALTER TABLE time_entries ADD COLUMN activity TEXT')
-        except sqlite3.OperationalError:
-            pass  # Column already exists
+        self.csv_path = self.core.csv_path()
         
-        self.conn.commit()
+        try:
+            self.conn = open_database(self.core.db_file)
+        except Exception as e:
+            # Data folder unavailable - commands are journaled and replayed later
+            log.error("Error opening database: %s", e)
+            self.conn = None
+    
+    def replay_journal(self):
+        """Replay journaled commands into the database without blocking the UI"""
+        self.core.replay_in_background()
     
     def sync_state(self):
         """Sync state with other instances"""
         try:
-            # Check database for current tracking state
-            self.cursor.execute('SELECT project, activity, start_time FROM time_entries WHERE end_time IS NULL ORDER BY start_time DESC LIMIT 1')
-            result = self.cursor.fetchone()
+            # Local commands not yet in the database are newer than what it shows
+            if self.core.journal.has_pending():
+                self.replay_journal()
+                return
             
-            if result:
-                project, activity, start_time = result
-                if not self.is_tracking or self.current_project != project:
-                    self.is_tracking = True
-                    self.current_project = project
-                    self.current_activity = activity or "Legal research"
-                    self.start_time = datetime.fromtimestamp(start_time) if start_time else datetime.now()
-                    # Export CSV when state changes
-                    self.export_to_csv()
-            else:
-                if self.is_tracking:
-                    self.is_tracking = False
-                    self.current_project = None
-                    self.current_activity = None
-                    self.start_time = None
-                    # Export CSV when state changes
-                    self.export_to_csv()
+            if self.conn is None:
+                self.setup_database()
+            # Shared with the macOS button; this one has never published the state file
+            db_state, transition = self.core.sync(self.is_tracking, self.current_project, self.current_activity,
+                                                  self.lease.is_leader, self.conn, self.export_to_csv,
+                                                  publish=False)
+            if transition:
+                self.is_tracking = db_state['is_tracking']
+                self.current_project = db_state['project']
+                self.current_activity = (db_state['activity'] or "Legal research") if self.is_tracking else None
+                start_time = db_state['start_time']
+                self.start_time = datetime.fromtimestamp(start_time) if start_time else (datetime.now() if self.is_tracking else None)
         except Exception as e:
-            print(f"Error syncing state: {e}")
+            log.error("Error syncing state: %s", e)
     
     def get_projects(self):
-        """Get list of existing projects"""
-        self.cursor.execute('SELECT DISTINCT project FROM time_entries WHERE project NOT LIKE "[HIDDEN]%" ORDER BY MAX(start_time) DESC')
-        return [row[0] for row in self.cursor.fetchall() if row[0]]
+        """Get list of existing projects, most recently used first"""
+        return [project for project in self.core.get_projects(order='recent') if project]
     
     def update_appearance(self):
         """Update button appearance"""
@@ -542,10 +461,10 @@ class FloatingButton(QPushButton):
         if activity_dialog.exec() == QDialog.DialogCode.Accepted:
             new_activity = activity_dialog.get_activity()
             if new_activity:
-                self.cursor.execute('UPDATE time_entries SET activity = ? WHERE end_time IS NULL', (new_activity,))
-                self.conn.commit()
+                # Journal the change and update the state file; replay regenerates the CSV
+                self.core.change_activity(new_activity, int(self.start_time.timestamp()) if self.start_time else None)
                 self.current_activity = new_activity
-                self.export_to_csv()
+                self.replay_journal()
                 self.update_appearance()
     
     def change_project(self):
@@ -558,14 +477,28 @@ class FloatingButton(QPushButton):
                 if activity_dialog.exec() == QDialog.DialogCode.Accepted:
                     new_activity = activity_dialog.get_activity()
                     if new_activity:
-                        self.cursor.execute('UPDATE time_entries SET project = ?, activity = ? WHERE end_time IS NULL', 
-                                          (new_project, new_activity))
-                        self.conn.commit()
+                        self.core.change_project(new_project, new_activity,
+                                                 int(self.start_time.timestamp()) if self.start_time else None)
                         self.current_project = new_project
                         self.current_activity = new_activity
-                        self.export_to_csv()
+                        self.replay_journal()
                         self.update_appearance()
     
+    def handle_arguments(self, argv):
+        """Apply launch arguments, from this launch or forwarded by a later one"""
+        args = parse_launch_arguments(argv)
+        if args is None:
+            log.warning("Ignoring launch arguments: %s", argv)
+            return
+        if args.stop:
+            self.stop_tracking()
+        elif args.start:
+            if self.is_tracking:
+                if args.start == self.current_project and args.activity in ('', self.current_activity):
+                    return
+                self.stop_tracking()
+            self.start_tracking(args.start, args.activity)
+
     def start_tracking(self, project, activity):
         """Start tracking a project"""
         try:
@@ -574,23 +507,14 @@ class FloatingButton(QPushButton):
             self.is_tracking = True
             self.start_time = datetime.now()
             
-            self.cursor.execute('INSERT INTO time_entries (project, activity, start_time) VALUES (?, ?, ?)',
-                              (project, activity, int(self.start_time.timestamp())))
-            self.conn.commit()
-            
-            # Save state
-            state = {
-                'is_tracking': True,
-                'project': project,
-                'activity': activity,
-                'start_time': int(self.start_time.timestamp())
-            }
-            self.state_manager.save_state(state)
+            # Journal the start and update the state file; replay inserts it into the database
+            self.core.start(project, activity, self.start_time.timestamp())
+            self.replay_journal()
             
             self.play_chime()
             self.update_appearance()
         except Exception as e:
-            print(f"Error starting tracking: {e}")
+            log.error("Error starting tracking: %s", e)
     
     def stop_tracking(self):
         """Stop tracking"""
@@ -599,126 +523,56 @@ class FloatingButton(QPushButton):
                 return
             
             end_time = datetime.now()
-            self.cursor.execute('UPDATE time_entries SET end_time = ? WHERE end_time IS NULL',
-                              (int(end_time.timestamp()),))
-            self.conn.commit()
             
-            self.export_to_csv()
+            # Journal the stop and update the state file; replay closes the entry and regenerates the CSV
+            self.core.stop(end_time.timestamp())
+            self.replay_journal()
             
             self.is_tracking = False
             self.current_project = None
             self.current_activity = None
             self.start_time = None
             
-            # Save state
-            state = {
-                'is_tracking': False,
-                'project': None,
-                'activity': None,
-                'start_time': None
-            }
-            self.state_manager.save_state(state)
-            
             self.play_chime()
             self.update_appearance()
         except Exception as e:
-            print(f"Error stopping tracking: {e}")
+            log.error("Error stopping tracking: %s", e)
+    
+    def export_if_leader(self):
+        if self.lease.is_leader:
+            self.export_to_csv()
     
     def export_to_csv(self):
         """Export data to CSV"""
+        if self.conn is None:
+            return
         try:
-            self.cursor.execute('SELECT id, project, activity, start_time, end_time FROM time_entries')
-            rows = self.cursor.fetchall()
-            
-            csv_data = []
-            for row in rows:
-                id_val, project, activity, start_time, end_time = row
-                
-                # Handle mixed timestamp formats (Unix timestamps vs datetime strings)
-                start_dt = None
-                end_dt = None
-                
-                # Convert start_time
-                if start_time:
-                    try:
-                        if isinstance(start_time, (int, float)):
-                            # Unix timestamp
-                            start_dt = datetime.fromtimestamp(start_time)
-                        else:
-                            # String datetime
-                            start_dt = datetime.fromisoformat(str(start_time).replace(' ', 'T'))
-                    except (ValueError, TypeError, OSError) as e:
-                        print(f"Error parsing start_time {start_time}: {e}")
-                        continue
-                
-                # Convert end_time
-                if end_time:
-                    try:
-                        if isinstance(end_time, (int, float)):
-                            # Unix timestamp
-                            end_dt = datetime.fromtimestamp(end_time)
-                        else:
-                            # String datetime
-                            end_dt = datetime.fromisoformat(str(end_time).replace(' ', 'T'))
-                    except (ValueError, TypeError, OSError) as e:
-                        print(f"Error parsing end_time {end_time}: {e}")
-                        # If end_time is invalid but start_time is valid, treat as ongoing
-                        pass
-                
-                start_str = start_dt.strftime('%Y-%m-%d %H:%M:%S') if start_dt else ''
-                end_str = end_dt.strftime('%Y-%m-%d %H:%M:%S') if end_dt else ''
-                
-                duration_str = ''
-                decimal_hours = 0.0
-                if start_dt and end_dt:
-                    duration = end_dt - start_dt
-                    total_seconds = int(duration.total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    seconds = total_seconds % 60
-                    duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                    # Calculate decimal hours rounded up to nearest tenth
-                    exact_hours = total_seconds / 3600.0
-                    import math
-                    decimal_hours = math.ceil(exact_hours * 10) / 10
-                elif start_dt and not end_dt:
-                    duration = datetime.now() - start_dt
-                    total_seconds = int(duration.total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    seconds = total_seconds % 60
-                    duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d} (ongoing)"
-                    # Calculate decimal hours for ongoing sessions too
-                    exact_hours = total_seconds / 3600.0
-                    import math
-                    decimal_hours = math.ceil(exact_hours * 10) / 10
-                
-                csv_data.append({
-                    'ID': id_val,
-                    'Project': project or '',
-                    'Activity': activity or '',
-                    'Start Time': start_str,
-                    'End Time': end_str,
-                    'Duration': duration_str,
-                    'Hours': f"{decimal_hours:.1f}"
-                })
-            
-            df = pd.DataFrame(csv_data)
-            df.to_csv(self.csv_path, index=False)
-            print(f"CSV exported successfully to {self.csv_path} with {len(csv_data)} entries")
+            rows = self.core.export_csv(self.conn)
+            log.debug("CSV exported to %s with %d entries", self.csv_path, rows)
         except Exception as e:
-            print(f"Error exporting CSV: {e}")
-            import traceback
-            traceback.print_exc()
+            log.error("Error exporting CSV: %s", e)
 
-def main():
+def main(launch=None):
+    setup_logging()
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
     
     handle = DraggableHandle()
     handle.show()
+    # Hand leadership over at once instead of when the lease expires
+    app.aboutToQuit.connect(handle.button.lease.release)
+    
+    # Later launches forward their arguments here instead of starting another app
+    def on_arguments(argv):
+        handle.show()
+        handle.raise_()
+        handle.activateWindow()
+        handle.button.handle_arguments(argv)
+    if launch is not None and not launch.listen(on_arguments):
+        log.warning("Not listening for other launches; a second launch will start another instance")
+    handle.button.handle_arguments(sys.argv[1:])
     
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(launch) 
\ No newline at end of file
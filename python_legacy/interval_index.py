@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Interval index over time entries for point-in-time and range queries.
+
+Entries are kept in arrays sorted by start time with a max-of-end segment
+tree on top (an augmented interval tree in array form), so "what was I
+working on at 14:32" and "entries touching this range" cost O(log n) plus
+the size of the answer instead of a table scan. The index follows the
+change feed (see change_feed.py): changed entries go to a small overlay
+that is folded into the arrays once it grows past a threshold.
+
+    python3 interval_index.py at "2026-10-13 14:32"
+    python3 interval_index.py range 2026-10-12 2026-10-19
+"""
+
+import sys
+import sqlite3
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from change_feed import install_triggers, fetch_changes, expired_through, latest_seq
+from tracker_core import database_path, get_data_folder
+
+# End used for open entries, so they match any time after their start
+OPEN_END = np.iinfo(np.int64).max
+
+
+def _is_time(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class IntervalIndex:
+    """Stabbing and range queries over time_entries, kept current from the change feed"""
+
+    def __init__(self, db_file, rebuild_threshold=1024):
+        self.db_file = db_file
+        self.rebuild_threshold = rebuild_threshold
+        self.conn = sqlite3.connect(str(db_file))
+        install_triggers(self.conn)
+        self.conn.commit()
+        self.build()
+
+    def close(self):
+        self.conn.close()
+
+    def build(self):
+        """Load every entry and rebuild the sorted arrays and the segment tree"""
+        # One read transaction so the snapshot and the feed position agree
+        self.conn.execute('BEGIN')
+        try:
+            # Not MAX(seq): compaction can leave the changes table empty
+            self.seq = latest_seq(self.conn)
+            rows = self.conn.execute('''
+                SELECT id, project, activity, start_time, end_time
+                FROM time_entries
+                WHERE typeof(start_time) IN ('integer', 'real')
+                  AND (end_time IS NULL OR typeof(end_time) IN ('integer', 'real'))
+            ''').fetchall()
+        finally:
+            self.conn.execute('COMMIT')
+
+        self.rows = {row[0]: row[1:] for row in rows}
+        self.overlay = {}
+        self.stale = set()
+        self._build_arrays(self.rows)
+
+    def _build_arrays(self, rows):
+        count = len(rows)
+        ids = np.fromiter(rows, dtype=np.int64, count=count)
+        starts = np.fromiter((rows[i][2] for i in rows), dtype=np.int64, count=count)
+        ends = np.fromiter((OPEN_END if rows[i][3] is None else rows[i][3] for i in rows),
+                           dtype=np.int64, count=count)
+        order = np.argsort(starts, kind='stable')
+        self.ids = ids[order]
+        self.starts = starts[order]
+
+        # Segment tree of the largest end in each block of start-sorted entries
+        size = 1
+        while size < count:
+            size *= 2
+        tree = np.full(2 * size, np.iinfo(np.int64).min, dtype=np.int64)
+        tree[size:size + count] = ends[order]
+        level = size
+        while level > 1:
+            tree[level // 2:level] = np.maximum(tree[level:2 * level:2], tree[level + 1:2 * level:2])
+            level //= 2
+        self.size = size
+        self.tree = tree.tolist()
+
+    def refresh(self, batch_size=500):
+        """Apply changes made since the last refresh; returns how many were read"""
+        if expired_through(self.conn) > self.seq:
+            # Retention dropped changes we never saw
+            self.build()
+            return 0
+        applied = 0
+        while True:
+            batch = fetch_changes(self.conn, self.seq, batch_size)
+            if not batch:
+                break
+            for seq, op, entry_id, row in batch:
+                self.stale.add(entry_id)
+                self.overlay.pop(entry_id, None)
+                self.rows.pop(entry_id, None)
+                if row and _is_time(row['start_time']) and (row['end_time'] is None or _is_time(row['end_time'])):
+                    self.rows[entry_id] = (row['project'], row['activity'], row['start_time'], row['end_time'])
+                    self.overlay[entry_id] = self.rows[entry_id]
+                self.seq = seq
+            applied += len(batch)
+        if len(self.stale) + len(self.overlay) > self.rebuild_threshold:
+            self.overlay.clear()
+            self.stale.clear()
+            self._build_arrays(self.rows)
+        return applied
+
+    def _ending_after(self, count, threshold):
+        """Positions among the first count start-sorted entries whose end is after threshold"""
+        found = []
+        if not count:
+            return found
+        tree = self.tree
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= count or tree[node] <= threshold:
+                continue
+            if node >= self.size:
+                found.append(node - self.size)
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return found
+
+    def _entries(self, positions, overlay_ids):
+        ids = [int(self.ids[p]) for p in positions if int(self.ids[p]) not in self.stale]
+        ids.extend(overlay_ids)
+        entries = [{'id': i, 'project': self.rows[i][0], 'activity': self.rows[i][1],
+                    'start_time': self.rows[i][2], 'end_time': self.rows[i][3]} for i in ids]
+        entries.sort(key=lambda e: (e['start_time'], e['id']))
+        return entries
+
+    def at(self, moment):
+        """Entries in progress at epoch second moment (start <= moment < end)"""
+        count = int(np.searchsorted(self.starts, moment, side='right'))
+        overlay = [i for i, (_, _, start, end) in self.overlay.items()
+                   if start <= moment and (end is None or end > moment)]
+        return self._entries(self._ending_after(count, moment), overlay)
+
+    def overlapping(self, start, end):
+        """Entries touching the range [start, end)"""
+        count = int(np.searchsorted(self.starts, end, side='left'))
+        overlay = [i for i, (_, _, s, e) in self.overlay.items()
+                   if s < end and (e is None or e > start)]
+        return self._entries(self._ending_after(count, start), overlay)
+
+
+def parse_moment(text):
+    """Parse "YYYY-MM-DD HH:MM" or YYYY-MM-DD as local time in epoch seconds"""
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            return int(datetime.strptime(text, fmt).timestamp())
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"Invalid time: {text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Point-in-time and range queries over time entries")
+    parser.add_argument('--db', help="Database file (defaults to the configured data folder)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    at = commands.add_parser('at', help="Entries in progress at a moment")
+    at.add_argument('moment', type=parse_moment)
+    span = commands.add_parser('range', help="Entries touching [start, end)")
+    span.add_argument('start', type=parse_moment)
+    span.add_argument('end', type=parse_moment)
+    args = parser.parse_args(argv)
+
+    index = IntervalIndex(args.db or database_path(get_data_folder()))
+    try:
+        if args.command == 'at':
+            entries = index.at(args.moment)
+        else:
+            entries = index.overlapping(args.start, args.end)
+    finally:
+        index.close()
+
+    for entry in entries:
+        start = datetime.fromtimestamp(entry['start_time']).strftime('%Y-%m-%d %H:%M')
+        end = ('(ongoing)' if entry['end_time'] is None
+               else datetime.fromtimestamp(entry['end_time']).strftime('%Y-%m-%d %H:%M'))
+        print(f"{entry['id']}\t{start}\t{end}\t{entry['project']}\t{entry['activity'] or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
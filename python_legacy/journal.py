@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Offline write-ahead journal for tracking commands.
+
+Every start/stop/change command is appended to a journal on local disk
+before it touches the database, so nothing is lost when the data folder
+(for example a Google Drive folder) is unmounted or slow. The journal is
+replayed into .timetrack.db in batches once the folder is reachable again.
+"""
+
+import sqlite3
+import json
+import os
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from metrics import COMMIT_LATENCY
+from locking import locked
+from change_feed import install_triggers
+from merge import install_merge_schema
+
+JOURNAL_DIR = Path.home() / ".config" / "timetracker"
+# Where every folder's commands were journaled before journals were kept per folder
+LEGACY_JOURNAL = JOURNAL_DIR / "journal.jsonl"
+
+
+def journal_path(data_folder):
+    """Local journal for one data folder, so commands never replay into another folder's database"""
+    key = hashlib.sha1(str(Path(data_folder).expanduser().resolve()).encode()).hexdigest()[:16]
+    return JOURNAL_DIR / f"journal-{key}.jsonl"
+
+
+def adopt_legacy_journal(data_folder):
+    """Move commands queued in the old shared journal into data_folder's journal"""
+    target = journal_path(data_folder)
+    if not LEGACY_JOURNAL.exists() or target.exists():
+        return
+    try:
+        os.replace(LEGACY_JOURNAL, target)
+    except OSError:
+        # Another instance adopted it first
+        pass
+
+
+class CommandJournal:
+    """Append-only journal of tracking commands, replayed idempotently by event id"""
+
+    def __init__(self, journal_file):
+        self.journal_file = Path(journal_file)
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        self.replay_lock = threading.Lock()
+
+    def record(self, command, timestamp=None, **fields):
+        """Append a command to the journal and return the recorded event"""
+        import uuid
+        event = {
+            'event_id': uuid.uuid4().hex,
+            'command': command,
+            'timestamp': int(timestamp if timestamp is not None else time.time()),
+        }
+        event.update(fields)
+        line = json.dumps(event) + "\n"
+        with open(self.journal_file, 'a') as f, locked(f):
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        return event
+
+    def has_pending(self):
+        """Check whether there are journaled commands not yet replayed"""
+        try:
+            return self.journal_file.stat().st_size > 0
+        except OSError:
+            return False
+
+    def pending(self):
+        """Return all journaled events in the order they were recorded"""
+        if not self.journal_file.exists():
+            return []
+        with open(self.journal_file, 'r') as f, locked(f, shared=True):
+            lines = f.readlines()
+
+        events = []
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Torn last line from a crash mid-write
+                continue
+            if isinstance(event, dict) and 'event_id' in event:
+                events.append(event)
+        return events
+
+    def replay(self, db_file, batch_size=100, timeout=2.0, use_event_log=False):
+        """Replay pending events into the database, returning how many were applied
+
+        With use_event_log, applied events are also appended to the event log
+        (see event_log.py) in the same transaction.
+        """
+        if use_event_log:
+            import event_log
+        if not self.replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            events = self.pending()
+            if not events:
+                return 0
+
+            conn = sqlite3.connect(str(db_file), timeout=timeout)
+            try:
+                ensure_journal_schema(conn)
+                if use_event_log:
+                    event_log.bootstrap(conn)
+                    conn.commit()
+                applied = 0
+                done = set()
+                for offset in range(0, len(events), batch_size):
+                    batch = events[offset:offset + batch_size]
+                    try:
+                        for event in batch:
+                            if self.apply_event(conn, event):
+                                applied += 1
+                                if use_event_log:
+                                    event_log.append_event(conn, event)
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    with COMMIT_LATENCY.time():
+                        conn.commit()
+                    done.update(event['event_id'] for event in batch)
+                if use_event_log:
+                    with conn:
+                        event_log.maybe_snapshot(conn)
+            finally:
+                conn.close()
+
+            self.compact(done)
+            return applied
+        finally:
+            self.replay_lock.release()
+
+    def apply_event(self, conn, event):
+        """Apply one event inside the caller's transaction, skipping it if already applied"""
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO journal_events (event_id, command, applied_at) VALUES (?, ?, ?)',
+            (event['event_id'], event['command'], int(time.time())))
+        if cursor.rowcount == 0:
+            return False
+
+        command = event['command']
+        if command == 'start':
+            # The event id doubles as the entry's globally unique id (see merge.py)
+            conn.execute('''
+                INSERT INTO time_entries (uid, project, activity, start_time)
+                VALUES (?, ?, ?, ?)
+            ''', (event['event_id'], event.get('project'), event.get('activity'), event['timestamp']))
+        elif command == 'stop':
+            conn.execute('''
+                UPDATE time_entries
+                SET end_time = ?
+                WHERE end_time IS NULL
+            ''', (event['timestamp'],))
+        elif command == 'change_activity':
+            conn.execute('''
+                UPDATE time_entries
+                SET activity = ?
+                WHERE end_time IS NULL
+            ''', (event.get('activity'),))
+        elif command == 'change_project':
+            conn.execute('''
+                UPDATE time_entries
+                SET project = ?, activity = ?
+                WHERE end_time IS NULL
+            ''', (event.get('project'), event.get('activity')))
+        return True
+
+    def compact(self, done_ids):
+        """Drop replayed events from the journal, keeping anything appended meanwhile"""
+        if not done_ids or not self.journal_file.exists():
+            return
+        with open(self.journal_file, 'r+') as f, locked(f):
+            remaining = []
+            for line in f.readlines():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get('event_id') not in done_ids:
+                    remaining.append(line)
+            f.seek(0)
+            f.writelines(remaining)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def ensure_journal_schema(conn):
+    """Create the tables journal replay writes to"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS time_entries (
+            id INTEGER PRIMARY KEY,
+            project TEXT,
+            activity TEXT,
+            start_time TIMESTAMP,
+            end_time TIMESTAMP
+        )
+    ''')
+    try:
+        conn.execute('ALTER TABLE time_entries ADD COLUMN activity TEXT')
+    except sqlite3.OperationalError:
+        # Column already exists
+        pass
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS journal_events (
+            event_id TEXT PRIMARY KEY,
+            command TEXT,
+            applied_at INTEGER
+        )
+    ''')
+    install_triggers(conn)
+    install_merge_schema(conn)
+    conn.commit()
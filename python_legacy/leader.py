@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Lease-based leader election among instances sharing a database.
+
+One row in a leader_lease table names the instance holding the lease
+and when it expires. Every instance tries to take or renew the lease a
+few times per lease period; an UPSERT succeeds only for the current
+holder or once the lease has expired, so at most one instance leads.
+A leader that quits releases the lease; one that crashes or loses the
+data folder is replaced when its lease runs out.
+
+The lease is a small database under ~/.local/share/timetracker, one per
+tracker database, and is renewed on a background thread. Keeping it out
+of the data folder means renewals never change the tracker database's
+fingerprint (see tracker_core.database_version) and are never uploaded
+by the sync client; a lease in a synced folder would be rewritten every
+few seconds on every device and keep colliding.
+
+Leadership is therefore per host: each computer sharing a data folder
+elects its own leader among its own instances. The leader does the
+periodic work (CSV export, publishing the state file, chimes); the
+others only read. Two hosts' leaders may both export the CSV, but they
+export the same database contents, which sync keeps converging (see
+merge.py), and each host chimes for the person sitting at it.
+"""
+
+import os
+import uuid
+import hashlib
+import socket
+import sqlite3
+import threading
+from pathlib import Path
+
+from applog import get_logger
+from clock import SYSTEM_CLOCK
+from metrics import LEADER
+
+log = get_logger("leader")
+
+LEASE_NAME = 'leader'
+LEASE_SECONDS = 15
+RENEW_SECONDS = 5
+LEASE_DIR = Path.home() / ".local" / "share" / "timetracker"
+
+
+def lease_path(db_file):
+    """Lease database shared by this host's instances on db_file"""
+    key = hashlib.sha1(str(Path(db_file).expanduser().resolve()).encode()).hexdigest()[:16]
+    return LEASE_DIR / f"leader-{key}.db"
+
+
+def install_lease_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS leader_lease (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+
+
+class LeaderLease:
+    """This instance's claim on the leader lease"""
+
+    def __init__(self, db_file, ttl=LEASE_SECONDS, clock=None, name=LEASE_NAME, on_change=None, lease_file=None):
+        self.lease_file = Path(lease_file) if lease_file else lease_path(db_file)
+        self.ttl = ttl
+        self.clock = clock or SYSTEM_CLOCK
+        self.name = name
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        # Called with the new leadership whenever it changes, on the renewing thread
+        self.on_change = on_change
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def try_acquire(self):
+        """Take or renew the lease; True while this instance holds it"""
+        now = self.clock.time()
+        self.lease_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.lease_file), timeout=2.0)
+        try:
+            install_lease_schema(conn)
+            with conn:
+                conn.execute('''
+                    INSERT INTO leader_lease (name, holder, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                    WHERE leader_lease.holder = excluded.holder OR leader_lease.expires_at < ?
+                ''', (self.name, self.holder, now + self.ttl, now))
+            row = conn.execute('SELECT holder FROM leader_lease WHERE name = ?', (self.name,)).fetchone()
+            return row is not None and row[0] == self.holder
+        finally:
+            conn.close()
+
+    def renew(self):
+        """try_acquire for a timer: logs leadership changes and treats errors as not leading"""
+        try:
+            leading = self.try_acquire()
+        except Exception as e:
+            log.error("Error renewing leader lease: %s", e)
+            leading = False
+        changed = leading != self.is_leader
+        if changed:
+            log.info("%s leader lease (%s)", "Acquired" if leading else "Lost", self.holder)
+        self.is_leader = leading
+        LEADER.set(1 if leading else 0)
+        if changed and self.on_change:
+            self.on_change(leading)
+        return leading
+
+    def start(self, interval=RENEW_SECONDS):
+        """Renew now and then every interval seconds on a daemon thread"""
+        if self.thread is not None:
+            return
+
+        def run():
+            while not self.stopping.is_set():
+                self.renew()
+                self.stopping.wait(interval)
+        self.stopping.clear()
+        self.thread = threading.Thread(target=run, name="leader-lease", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=3.0):
+        """Stop renewing; the lease itself is kept until release() or expiry"""
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout)
+        self.thread = None
+
+    def release(self):
+        """Give up the lease so another instance can take over at once"""
+        self.stop()
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        LEADER.set(0)
+        try:
+            conn = sqlite3.connect(str(self.lease_file), timeout=2.0)
+            try:
+                with conn:
+                    conn.execute('DELETE FROM leader_lease WHERE name = ? AND holder = ?', (self.name, self.holder))
+            finally:
+                conn.close()
+        except Exception as e:
+            log.error("Error releasing leader lease: %s", e)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Lock acquire latency and fairness under N contenders.
+
+Every contender loops on one lock file: acquire, hold it for a while
+(a state-file write), release, pause, repeat. Each mode is run in turn:
+
+    timeout    locking.FileLock with a timeout, as the state file uses
+    blocking   locking.FileLock without a timeout (the kernel's queue)
+    legacy     the old non-blocking flock retried every 100 ms
+    thread     the in-process backend, contenders as threads
+
+Fairness is Jain's index over acquisitions per contender: 1.0 when all
+got the same share, 1/N when one contender got everything.
+
+    python3 lock_benchmark.py --contenders 2 4 8 --duration 5 -o locks.json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+
+import locking
+
+MODES = ('timeout', 'blocking', 'legacy', 'thread')
+
+
+# Shared by the thread-mode contenders of one process
+THREAD_BACKEND = locking.ThreadBackend()
+
+
+def legacy_acquire(path, timeout):
+    """StateManager.acquire_lock as it was: LOCK_NB retried every 100 ms"""
+    import fcntl
+    f = open(path, 'w')
+    started = time.time()
+    while time.time() - started < timeout:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return f
+        except OSError:
+            time.sleep(0.1)
+    f.close()
+    return None
+
+
+def contend(mode, path, start_at, end_at, hold, think, timeout, seed):
+    """One contender's loop; returns its acquire latencies and timeouts"""
+    rng = random.Random(seed)
+    # Thread-mode contenders share this process's in-process backend
+    backend = THREAD_BACKEND if mode == 'thread' else None
+    latencies = []
+    timeouts = 0
+    time.sleep(max(0, start_at - time.time()))
+    while time.time() < end_at:
+        started = time.perf_counter()
+        if mode == 'legacy':
+            handle = legacy_acquire(path, timeout)
+            acquired = handle is not None
+        else:
+            handle = locking.FileLock(path, backend)
+            acquired = handle.acquire(None if mode == 'blocking' else timeout)
+        waited = time.perf_counter() - started
+        if not acquired:
+            timeouts += 1
+            continue
+        latencies.append(waited)
+        time.sleep(hold * rng.uniform(0.5, 1.5))
+        if mode == 'legacy':
+            handle.close()
+        else:
+            handle.release()
+        time.sleep(think * rng.uniform(0.5, 1.5))
+    return {'latencies': latencies, 'timeouts': timeouts}
+
+
+def contend_into(queue, *args):
+    queue.put(contend(*args))
+
+
+def run_mode(mode, contenders, duration, hold, think, timeout, workdir):
+    path = str(Path(workdir) / f"{mode}-{contenders}.lock")
+    start_at = time.time() + 0.5 + 0.05 * contenders
+    end_at = start_at + duration
+    args = [(mode, path, start_at, end_at, hold, think, timeout, seed) for seed in range(contenders)]
+
+    if mode == 'thread':
+        results = [None] * contenders
+
+        def run(index):
+            results[index] = contend(*args[index])
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(contenders)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        processes = [context.Process(target=contend_into, args=(queue, *a)) for a in args]
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    return summarize(mode, contenders, results)
+
+
+def summarize(mode, contenders, results):
+    latencies = sorted(latency for r in results for latency in r['latencies'])
+    counts = [len(r['latencies']) for r in results]
+    total = sum(counts)
+    squares = sum(count * count for count in counts)
+    summary = {
+        'mode': mode,
+        'contenders': contenders,
+        'acquisitions': total,
+        'timeouts': sum(r['timeouts'] for r in results),
+        'fairness': round(total * total / (len(counts) * squares), 3) if squares else None,
+        'min_share': round(min(counts) / total, 3) if total else None,
+        'max_share': round(max(counts) / total, 3) if total else None,
+    }
+    if latencies:
+        summary.update({
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+            'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+            'max_ms': round(latencies[-1] * 1000, 3),
+        })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark lock acquisition under contention")
+    parser.add_argument('--contenders', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=None,
+                        help="Default: every mode this platform supports")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per run")
+    parser.add_argument('--hold', type=float, default=0.002, help="Mean seconds the lock is held")
+    parser.add_argument('--think', type=float, default=0.01, help="Mean seconds between acquisitions")
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('-o', '--output', help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    modes = args.modes
+    if modes is None:
+        modes = [m for m in MODES if m not in ('blocking', 'legacy') or locking.BACKEND.name == 'posix']
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="timetracker-locks-") as workdir:
+        for contenders in args.contenders:
+            for mode in modes:
+                result = run_mode(mode, contenders, args.duration, args.hold, args.think, args.timeout, workdir)
+                results.append(result)
+                print(f"{mode}\t{contenders}\tacquired {result['acquisitions']}\t"
+                      f"p50 {result.get('p50_ms')} ms\tp99 {result.get('p99_ms')} ms\t"
+                      f"max {result.get('max_ms')} ms\tfairness {result['fairness']}\t"
+                      f"timeouts {result['timeouts']}", file=sys.stderr)
+
+    report = {'backend': locking.BACKEND.name, 'parameters': vars(args), 'results': results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
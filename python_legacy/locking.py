@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+File locks with one behaviour on every platform.
+
+The state file, the command journal and the chime all coordinate
+through file locks. The backend is chosen once per process:
+
+    posix     flock(2); shared and exclusive, queued by the kernel
+    windows   msvcrt byte-range locks; always exclusive
+    thread    a lock per path inside this process, for platforms with
+              neither (it cannot see other processes)
+
+acquire() waits without limit when timeout is None and tries once when
+it is 0. With a timeout, the posix backend waits in the kernel's queue
+on a helper thread, so the lock passes to the longest waiter the moment
+it is released; the others retry with short randomized backoff. A helper
+whose caller timed out stays queued until it gets the lock, so at most
+MAX_KERNEL_WAITERS of them exist per process; past that, timed waits
+poll with backoff instead.
+"""
+
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+# Backoff between attempts while waiting with a timeout (seconds)
+FIRST_BACKOFF = 0.001
+MAX_BACKOFF = 0.005
+# Helper threads (each with a duplicate descriptor) the posix backend may have queued
+MAX_KERNEL_WAITERS = 8
+
+
+class PosixBackend:
+    name = 'posix'
+
+    def __init__(self):
+        import fcntl
+        self.fcntl = fcntl
+        self.waiters_guard = threading.Lock()
+        self.waiters = 0
+
+    def try_lock(self, f, shared=False):
+        mode = self.fcntl.LOCK_SH if shared else self.fcntl.LOCK_EX
+        try:
+            self.fcntl.flock(f.fileno(), mode | self.fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def lock(self, f, shared=False):
+        self.fcntl.flock(f.fileno(), self.fcntl.LOCK_SH if shared else self.fcntl.LOCK_EX)
+
+    def timed_lock(self, f, shared, timeout):
+        """Blocking flock with a timeout
+
+        flock(2) has no timeout, so a helper thread blocks on a duplicate
+        descriptor (same open file, same lock). If the caller gives up
+        first, the helper drops the lock as soon as it gets it. While
+        MAX_KERNEL_WAITERS helpers are still queued, this polls instead.
+        """
+        with self.waiters_guard:
+            queue = self.waiters < MAX_KERNEL_WAITERS
+            if queue:
+                self.waiters += 1
+        if not queue:
+            return wait(self, f, shared, timeout)
+        try:
+            fd = os.dup(f.fileno())
+        except OSError:
+            with self.waiters_guard:
+                self.waiters -= 1
+            raise
+        guard = threading.Lock()
+        done = threading.Event()
+        state = {'abandoned': False, 'error': None}
+
+        def wait_in_kernel():
+            try:
+                self.fcntl.flock(fd, self.fcntl.LOCK_SH if shared else self.fcntl.LOCK_EX)
+                with guard:
+                    if state['abandoned']:
+                        self.fcntl.flock(fd, self.fcntl.LOCK_UN)
+            except OSError as e:
+                state['error'] = e
+            finally:
+                os.close(fd)
+                with self.waiters_guard:
+                    self.waiters -= 1
+                done.set()
+
+        threading.Thread(target=wait_in_kernel, daemon=True).start()
+        done.wait(timeout)
+        with guard:
+            if done.is_set():
+                if state['error'] is not None:
+                    raise state['error']
+                return True
+            state['abandoned'] = True
+            return False
+
+    def unlock(self, f):
+        self.fcntl.flock(f.fileno(), self.fcntl.LOCK_UN)
+
+
+class WindowsBackend:
+    """Locks the first byte of the file; shared requests are exclusive"""
+
+    name = 'windows'
+
+    def __init__(self):
+        import msvcrt
+        self.msvcrt = msvcrt
+
+    def try_lock(self, f, shared=False):
+        # msvcrt locks from the current position; appends still go to the end
+        f.seek(0)
+        try:
+            self.msvcrt.locking(f.fileno(), self.msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def lock(self, f, shared=False):
+        # LK_LOCK gives up after ten seconds, so wait by retrying instead
+        wait(self, f, shared, None)
+
+    def unlock(self, f):
+        f.seek(0)
+        self.msvcrt.locking(f.fileno(), self.msvcrt.LK_UNLCK, 1)
+
+
+class ThreadBackend:
+    """Excludes threads of this process only"""
+
+    name = 'thread'
+
+    def __init__(self):
+        self.guard = threading.Lock()
+        self.locks = {}
+        self.held = {}
+
+    def _lock_for(self, f):
+        key = os.path.realpath(f.name)
+        with self.guard:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def try_lock(self, f, shared=False):
+        lock = self._lock_for(f)
+        if lock.acquire(blocking=False):
+            self.held[id(f)] = lock
+            return True
+        return False
+
+    def lock(self, f, shared=False):
+        lock = self._lock_for(f)
+        lock.acquire()
+        self.held[id(f)] = lock
+
+    def unlock(self, f):
+        lock = self.held.pop(id(f), None)
+        if lock is not None:
+            lock.release()
+
+
+def default_backend():
+    """The best backend this platform supports"""
+    for backend in (PosixBackend, WindowsBackend):
+        try:
+            return backend()
+        except ImportError:
+            continue
+    return ThreadBackend()
+
+
+BACKEND = default_backend()
+
+
+def wait(backend, f, shared, timeout):
+    """Retry try_lock with backoff until it succeeds or timeout seconds pass"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = FIRST_BACKOFF
+    while True:
+        if backend.try_lock(f, shared):
+            return True
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+        else:
+            remaining = delay
+        time.sleep(min(delay * random.uniform(0.5, 1.0), remaining))
+        delay = min(delay * 2, MAX_BACKOFF)
+
+
+def acquire(f, timeout=None, shared=False, backend=None):
+    """Lock an open file; True once held, False if timeout seconds passed first"""
+    backend = backend or BACKEND
+    if backend.try_lock(f, shared):
+        return True
+    if timeout is None:
+        backend.lock(f, shared)
+        return True
+    if timeout <= 0:
+        return False
+    if hasattr(backend, 'timed_lock'):
+        return backend.timed_lock(f, shared, timeout)
+    return wait(backend, f, shared, timeout)
+
+
+def release(f, backend=None):
+    (backend or BACKEND).unlock(f)
+
+
+@contextmanager
+def locked(f, shared=False, backend=None):
+    """Hold a lock on an open file for the duration of the block"""
+    acquire(f, None, shared, backend)
+    try:
+        yield f
+    finally:
+        release(f, backend)
+
+
+class FileLock:
+    """Exclusive lock on a dedicated lock file, such as .app_state.lock"""
+
+    def __init__(self, path, backend=None):
+        self.path = path
+        self.backend = backend or BACKEND
+        self.file = None
+
+    def acquire(self, timeout=None):
+        """True once held; False if timeout seconds passed or the file cannot be opened"""
+        if self.file is not None:
+            raise RuntimeError(f"{self.path} is already locked by this FileLock")
+        try:
+            # Append mode: truncating a file another process has locked fails on Windows
+            f = open(self.path, 'a')
+        except OSError:
+            return False
+        try:
+            if acquire(f, timeout, backend=self.backend):
+                self.file = f
+                return True
+        except Exception:
+            pass
+        f.close()
+        return False
+
+    def release(self):
+        if self.file is None:
+            return
+        try:
+            self.backend.unlock(self.file)
+        finally:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise OSError(f"Cannot lock {self.path}")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
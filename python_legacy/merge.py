@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Conflict-free merge of time tracker databases edited on several devices.
+
+Every entry carries a globally unique id (uid) and a hybrid logical clock
+stamp (hlc) maintained by triggers, so the floating button, the CLI and
+the SketchyBar scripts are all covered. An hlc is the wall clock in
+milliseconds shifted left by HLC_SHIFT bits plus a logical counter; each
+write stamps max(now, newest stamp in the database + 1), so stamps merged
+in from another device push the local clock forward.
+
+Merging reads each database sorted by uid and walks them together in a
+single pass: the highest stamp wins for each uid (last writer wins), a
+deletion wins if its tombstone is newest, and distinct uids with an
+identical interval are collapsed into the lowest uid.
+
+    python3 merge.py                       # merge conflicted copies in the data folder
+    python3 merge.py laptop.db desktop.db --into .timetrack.db
+"""
+
+import sys
+import sqlite3
+import argparse
+import heapq
+from itertools import groupby
+from pathlib import Path
+
+HLC_SHIFT = 16
+
+# Wall clock in ms, shifted; SQLite has no sub-second unixepoch before 3.42
+HLC_NOW_SQL = f"(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER) << {HLC_SHIFT})"
+NEXT_HLC_SQL = f"MAX({HLC_NOW_SQL}, COALESCE((SELECT MAX(hlc) FROM time_entries), 0) + 1)"
+
+FIELDS = ('project', 'activity', 'start_time', 'end_time')
+
+
+def install_merge_schema(conn):
+    """Add uid/hlc columns, back-fill existing rows and create the stamping triggers"""
+    for column, kind in (('uid', 'TEXT'), ('hlc', 'INTEGER')):
+        try:
+            conn.execute(f'ALTER TABLE time_entries ADD COLUMN {column} {kind}')
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+    # Rows from before this migration get the same uid on every device that
+    # shares them, so common history lines up instead of doubling
+    conn.execute('''
+        UPDATE time_entries
+        SET uid = 'legacy-' || id || '-' || COALESCE(start_time, ''), hlc = 0
+        WHERE uid IS NULL
+    ''')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS time_entries_uid ON time_entries (uid)')
+    conn.execute('CREATE INDEX IF NOT EXISTS time_entries_hlc ON time_entries (hlc)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS merge_tombstones (
+            uid TEXT PRIMARY KEY,
+            hlc INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS time_entries_stamp_insert
+        AFTER INSERT ON time_entries
+        WHEN NEW.hlc IS NULL
+        BEGIN
+            UPDATE time_entries
+            SET uid = COALESCE(NEW.uid, lower(hex(randomblob(16)))), hlc = {NEXT_HLC_SQL}
+            WHERE id = NEW.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS time_entries_stamp_update
+        AFTER UPDATE OF project, activity, start_time, end_time ON time_entries
+        WHEN NEW.hlc IS OLD.hlc
+        BEGIN
+            UPDATE time_entries SET hlc = {NEXT_HLC_SQL} WHERE id = NEW.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS time_entries_stamp_delete
+        AFTER DELETE ON time_entries
+        WHEN OLD.uid IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO merge_tombstones (uid, hlc)
+            VALUES (OLD.uid, MAX({HLC_NOW_SQL}, COALESCE(OLD.hlc, 0) + 1));
+        END
+    ''')
+
+
+def hlc_millis(hlc):
+    """Wall-clock part of a stamp, in milliseconds since the epoch"""
+    return hlc >> HLC_SHIFT
+
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (name,)).fetchone() is not None
+
+
+def read_versions(conn, source):
+    """Rows and tombstones of one database as (uid, hlc, deleted, fields, source), sorted by uid
+
+    Databases that predate the merge schema are read as they would be
+    back-filled, so read-only copies need no migration.
+    """
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(time_entries)')}
+    if 'uid' in columns:
+        uid, hlc = "COALESCE(uid, 'legacy-' || id || '-' || COALESCE(start_time, ''))", 'COALESCE(hlc, 0)'
+    else:
+        uid, hlc = "'legacy-' || id || '-' || COALESCE(start_time, '')", '0'
+    activity = 'activity' if 'activity' in columns else 'NULL'
+    query = f'''
+        SELECT {uid} AS uid, {hlc}, 0, project, {activity}, start_time, end_time
+        FROM time_entries
+    '''
+    if _has_table(conn, 'merge_tombstones'):
+        query += '''
+            UNION ALL
+            SELECT uid, hlc, 1, NULL, NULL, NULL, NULL FROM merge_tombstones
+        '''
+    query += ' ORDER BY uid'
+    for row in conn.execute(query):
+        yield row[0], row[1], bool(row[2]), tuple(row[3:]), source
+
+
+def _version_rank(version):
+    """Order versions of one uid: newest stamp, then deletions, then content
+
+    The content tie-break only matters for identical stamps (e.g. two
+    back-filled copies edited before upgrading) and keeps the winner the
+    same on every device.
+    """
+    uid, hlc, deleted, fields, source = version
+    return hlc, deleted, tuple('' if value is None else str(value) for value in fields)
+
+
+def merge_versions(streams, target_source=0):
+    """Single sorted pass over uid-ordered streams, returning the plan for the target
+
+    Returns (upserts, deletes, tombstones): rows the target must gain or
+    change as (uid, hlc, fields), uids it must drop, and tombstones
+    (uid, hlc) it must record.
+    """
+    upserts, deletes, tombstones = [], [], []
+    seen_intervals = set()
+    for uid, versions in groupby(heapq.merge(*streams, key=lambda v: v[0]), key=lambda v: v[0]):
+        versions = list(versions)
+        winner = max(versions, key=_version_rank)
+        current = [v for v in versions if v[4] == target_source and not v[2]]
+        current = current[0] if current else None
+        target_tombstone = any(v[4] == target_source and v[2] for v in versions)
+
+        _, hlc, deleted, fields, _ = winner
+        if not deleted:
+            # Identical interval under another uid: keep the lowest uid, which comes first
+            if fields in seen_intervals:
+                deleted = True
+            else:
+                seen_intervals.add(fields)
+
+        if deleted:
+            if current is not None:
+                deletes.append(uid)
+            if winner[2] and not (target_tombstone and winner[4] == target_source):
+                tombstones.append((uid, hlc))
+        elif current is None or (current[1], current[3]) != (hlc, fields):
+            upserts.append((uid, hlc, fields))
+    return upserts, deletes, tombstones
+
+
+def merge_databases(target, sources):
+    """Merge sources into the target database in one transaction
+
+    The target's own rows take part in the merge, so it can also be one
+    of the divergent copies. Returns (updated, deleted) counts.
+    """
+    conn = sqlite3.connect(str(target), timeout=5.0)
+    readers = []
+    try:
+        install_merge_schema(conn)
+        conn.commit()
+        for source in sources:
+            readers.append(sqlite3.connect(f"file:{Path(source)}?mode=ro", uri=True))
+        # The target is read in full up front because it is rewritten below
+        streams = [iter(list(read_versions(conn, 0)))]
+        streams += [read_versions(reader, index) for index, reader in enumerate(readers, start=1)]
+        upserts, deletes, tombstones = merge_versions(streams)
+
+        with conn:
+            # Deletions first so a surviving duplicate's uid is free, and
+            # tombstones last so the merge's own deletes keep remote stamps
+            conn.executemany('DELETE FROM time_entries WHERE uid = ?', [(uid,) for uid in deletes])
+            conn.executemany('''
+                UPDATE time_entries
+                SET project = ?, activity = ?, start_time = ?, end_time = ?, hlc = ?
+                WHERE uid = ?
+            ''', [(*fields, hlc, uid) for uid, hlc, fields in upserts])
+            conn.executemany('''
+                INSERT OR IGNORE INTO time_entries (uid, hlc, project, activity, start_time, end_time)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(uid, hlc, *fields) for uid, hlc, fields in upserts])
+            conn.executemany('INSERT OR REPLACE INTO merge_tombstones (uid, hlc) VALUES (?, ?)', tombstones)
+        return len(upserts), len(deletes)
+    finally:
+        for reader in readers:
+            reader.close()
+        conn.close()
+
+
+def conflicted_copies(db_file):
+    """Copies of the database that sync clients left next to it"""
+    db_file = Path(db_file)
+    stem = db_file.name[:-len('.db')]
+    return sorted(path for path in db_file.parent.glob(f"{stem}*.db") if path != db_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge time tracker databases from several devices")
+    parser.add_argument('sources', nargs='*', help="Databases to merge in (default: conflicted copies in the data folder)")
+    parser.add_argument('--into', help="Database to merge into (defaults to the configured data folder)")
+    args = parser.parse_args(argv)
+
+    from tracker_core import database_path, get_data_folder
+    target = Path(args.into) if args.into else Path(database_path(get_data_folder()))
+    sources = args.sources or conflicted_copies(target)
+    if not sources:
+        print("Nothing to merge")
+        return 0
+    updated, deleted = merge_databases(target, sources)
+    print(f"Merged {len(sources)} database(s) into {target}: {updated} entries added or updated, {deleted} removed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Operational metrics in Prometheus text format.
+
+A process-wide registry of counters, gauges and histograms. The
+floating button writes it periodically to .metrics-<host>.prom in the
+data folder, where a node_exporter textfile collector or a local script
+can pick it up; with the API enabled it is also served at GET /metrics.
+"""
+
+import os
+import functools
+import threading
+import time
+from pathlib import Path
+
+# Seconds; wide enough for a slow network drive
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self):
+        return [(self.name, '', self.value)]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value):
+        self.value = value
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager observing the duration of its block"""
+        return _Timer(self)
+
+    def timed(self, func):
+        """Decorator observing the duration of each call"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(self):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def samples(self):
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            samples.append((f"{self.name}_bucket", f'le="{_format_value(bound)}"', cumulative))
+        samples.append((f"{self.name}_sum", '', total))
+        samples.append((f"{self.name}_count", '', count))
+        return samples
+
+
+class Registry:
+    """Named metrics, created on first use"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, *args):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, *args)
+            return metric
+
+    def counter(self, name, help_text):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample, labels, value in metric.samples():
+                label_text = f"{{{labels}}}" if labels else ''
+                lines.append(f"{sample}{label_text} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def metrics_file(data_folder):
+    """Per-machine metrics file in the (possibly shared) data folder"""
+    import socket
+    return Path(data_folder) / f".metrics-{socket.gethostname()}.prom"
+
+
+def write_textfile(path, registry=REGISTRY):
+    """Write the registry atomically, so a scraper never sees half a file"""
+    path = Path(path)
+    temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp.write_text(registry.render())
+    os.replace(temp, path)
+
+
+# Metrics shared by the app, the CLI and the API
+LOCK_WAIT = REGISTRY.histogram('timetracker_state_lock_wait_seconds', "Time spent waiting for the state file lock")
+LOCK_TIMEOUTS = REGISTRY.counter('timetracker_state_lock_timeouts_total', "State file lock acquisitions that gave up")
+STATE_QUERY = REGISTRY.histogram('timetracker_state_query_seconds', "Current-state database query time")
+STATE_SAVE = REGISTRY.histogram('timetracker_state_save_seconds', "State file write time, including locking")
+COMMIT_LATENCY = REGISTRY.histogram('timetracker_commit_seconds', "Journal replay transaction commit time")
+DATABASE_SETUP = REGISTRY.histogram('timetracker_database_setup_seconds', "Database open and migration time")
+DATABASE_BYTES = REGISTRY.gauge('timetracker_database_bytes', "Size of the live database file")
+SYNC_TICK = REGISTRY.histogram('timetracker_sync_tick_seconds', "Duration of one sync_state tick")
+EXPORT_DURATION = REGISTRY.histogram('timetracker_csv_export_seconds', "CSV export duration")
+EXPORT_ROWS = REGISTRY.gauge('timetracker_csv_export_rows', "Rows in the last CSV export")
+CHIME_MISSES = REGISTRY.counter('timetracker_chime_misses_total', "6-minute marks passed entirely while the chime timer was stalled")
+LEADER = REGISTRY.gauge('timetracker_leader', "1 while this instance holds the leader lease")
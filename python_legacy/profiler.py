@@ -0,0 +1,153 @@
+"""
+Profiling mode for the floating button (launch with --profile).
+
+Timer slots and mouse handlers are wrapped with perf_counter_ns timing
+and each keeps a rolling histogram of its recent durations. A cProfile
+capture of the main thread can be taken on demand, from SIGUSR1 or the
+tracking menu, and is saved with the histograms under
+~/.config/timetracker/profiles/:
+
+    kill -USR1 <pid>
+    python3 -m pstats ~/.config/timetracker/profiles/profile-<time>.prof
+"""
+
+import sys
+import json
+import time
+import cProfile
+import functools
+from collections import deque
+from pathlib import Path
+
+from applog import get_logger
+
+log = get_logger("profiler")
+
+PROFILE_DIR = Path.home() / ".config" / "timetracker" / "profiles"
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_profiler = None
+
+
+class RollingHistogram:
+    """Durations of the most recent calls, summarized on demand"""
+
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+
+    def add(self, nanoseconds):
+        self.samples.append(nanoseconds)
+        self.calls += 1
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {'calls': self.calls}
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))] / 1e6
+
+        buckets = [0] * (len(BUCKETS_MS) + 1)
+        for ns in ordered:
+            ms = ns / 1e6
+            index = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+            buckets[index] += 1
+        return {
+            'calls': self.calls,
+            'window': len(ordered),
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': ordered[-1] / 1e6,
+            'buckets_ms': dict(zip([str(b) for b in BUCKETS_MS] + ['inf'], buckets)),
+        }
+
+
+class SlotProfiler:
+    """Per-handler timing plus on-demand cProfile captures"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.histograms = {}
+        self.capture = None
+        self.capture_started = None
+
+    def wrap(self, name, func):
+        """Return func timed into the histogram called name"""
+        histogram = self.histograms.setdefault(name, RollingHistogram(self.window))
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.add(time.perf_counter_ns() - started)
+        return timed
+
+    def instrument(self, obj, names, prefix=None):
+        """Replace obj's bound methods with timed ones
+
+        Qt looks virtual handlers such as mousePressEvent up on the
+        instance, so the timed versions are used for events too.
+        """
+        prefix = prefix or type(obj).__name__
+        for name in names:
+            setattr(obj, name, self.wrap(f"{prefix}.{name}", getattr(obj, name)))
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def start_capture(self):
+        """Start a cProfile capture of the calling (main) thread; False if one is running"""
+        if self.capture is not None:
+            return False
+        self.capture = cProfile.Profile()
+        self.capture_started = time.time()
+        self.capture.enable()
+        return True
+
+    def stop_capture(self):
+        """Stop the capture and save it with the histograms, returning the .prof path"""
+        if self.capture is None:
+            return None
+        self.capture.disable()
+        try:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.capture_started))
+            profile_file = PROFILE_DIR / f"profile-{stamp}.prof"
+            self.capture.dump_stats(str(profile_file))
+            profile_file.with_suffix('.json').write_text(json.dumps({
+                'started_at': self.capture_started,
+                'seconds': time.time() - self.capture_started,
+                'handlers': self.summary(),
+            }, indent=2))
+            self.print_summary()
+            log.info("Saved profile to %s", profile_file)
+            return profile_file
+        except Exception as e:
+            log.error("Error saving profile: %s", e)
+            return None
+        finally:
+            self.capture = None
+
+    def print_summary(self, file=sys.stdout):
+        for name, stats in self.summary().items():
+            if 'p50_ms' in stats:
+                print(f"{name}\tcalls {stats['calls']}\tp50 {stats['p50_ms']:.2f} ms\t"
+                      f"p95 {stats['p95_ms']:.2f} ms\tmax {stats['max_ms']:.2f} ms", file=file)
+
+
+def enable(window=1000):
+    """Turn on profiling mode for this process"""
+    global _profiler
+    _profiler = SlotProfiler(window)
+    return _profiler
+
+
+def get_profiler():
+    """The active profiler, or None outside profiling mode"""
+    return _profiler
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Local-first database with background replication to the data folder.
+
+When ~/.config/timetracker/local_first exists, the live database sits on
+local disk and a worker thread ships consistent snapshots of it to the
+shared (often cloud-synced) data folder using SQLite's online backup API.
+Each snapshot is written to a temporary file and renamed into place, so
+the sync client never uploads a torn database. The time each copy takes
+is logged and fed back into the replication interval.
+
+The shared copy still takes writes from elsewhere: the SketchyBar
+plugin scripts, and other devices whose copies the sync client brings
+down. Before each snapshot the worker compares the shared file with the
+one it last shipped; if it changed, its entries are merged into the
+local database first (see merge.py), and a snapshot is only renamed
+into place if the shared file did not change again while it was being
+copied.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from applog import get_logger
+from tracker_core import database_version
+from merge import merge_databases
+
+log = get_logger("replication")
+
+
+def backup_database(source, target, pages=256, sleep=0.005, expected=None):
+    """Copy source to target with the online backup API, throttled in page batches
+
+    The copy goes to a temporary file first and is renamed over target.
+    With expected (a database_version of target), the copy is discarded
+    and False returned if target changed meanwhile.
+    """
+    target = Path(target)
+    temp = target.with_name(f"{target.name}.replicating")
+    src = sqlite3.connect(str(source))
+    try:
+        dst = sqlite3.connect(str(temp))
+        try:
+            src.backup(dst, pages=pages, sleep=sleep)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    with open(temp, 'rb') as f:
+        os.fsync(f.fileno())
+    if expected is not None and database_version(target) != expected:
+        temp.unlink()
+        return False
+    os.replace(temp, target)
+    return True
+
+
+def seed_local(local_db, shared_db):
+    """Create the local database from the shared copy the first time local-first is used"""
+    local_db, shared_db = Path(local_db), Path(shared_db)
+    if local_db.exists() or not shared_db.exists():
+        return False
+    local_db.parent.mkdir(parents=True, exist_ok=True)
+    backup_database(shared_db, local_db, pages=-1, sleep=0)
+    return True
+
+
+class Replicator:
+    """Background worker shipping snapshots of the local database to the data folder"""
+
+    def __init__(self, local_db, shared_db, min_interval=15, max_interval=600,
+                 latency_factor=20, pages=256, sleep=0.005):
+        self.local_db = Path(local_db)
+        self.shared_db = Path(shared_db)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Spend at most ~1/latency_factor of wall time copying to a slow folder
+        self.latency_factor = latency_factor
+        self.pages = pages
+        self.sleep = sleep
+        self.interval = min_interval
+        self.avg_latency = None
+        self.last_version = None
+        # Shared copy as this worker last wrote it; None merges on the first run
+        self.shipped_version = None
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def request(self):
+        """Ask for a replication soon, e.g. after a write; still throttled by the interval"""
+        self.wakeup.set()
+
+    def merge_foreign_writes(self):
+        """Merge the shared copy into the local one if someone else wrote it
+
+        Returns the shared copy's version as seen before merging.
+        """
+        shared_version = database_version(self.shared_db)
+        if shared_version[0] is not None and shared_version != self.shipped_version:
+            updated, deleted = merge_databases(self.local_db, [self.shared_db])
+            if updated or deleted:
+                log.info("Merged writes from %s: %d entries added or updated, %d removed",
+                         self.shared_db, updated, deleted)
+        return shared_version
+
+    def replicate_once(self, force=False):
+        """Copy the local database if it or the shared copy changed; returns the copy time in seconds or None"""
+        shared_version = self.merge_foreign_writes()
+        version = database_version(self.local_db)
+        if not force and version == self.last_version and shared_version == self.shipped_version:
+            return None
+        started = time.monotonic()
+        if not backup_database(self.local_db, self.shared_db, self.pages, self.sleep, expected=shared_version):
+            # Written to while copying; merge that write on the next run
+            log.info("%s changed during replication, retrying", self.shared_db)
+            self.wakeup.set()
+            return None
+        elapsed = time.monotonic() - started
+        self.last_version = version
+        self.shipped_version = database_version(self.shared_db)
+        self.record_latency(elapsed)
+        return elapsed
+
+    def record_latency(self, elapsed):
+        """Adapt the interval to the folder's write latency (exponential moving average)"""
+        if self.avg_latency is None:
+            self.avg_latency = elapsed
+        else:
+            self.avg_latency = 0.7 * self.avg_latency + 0.3 * elapsed
+        self.interval = min(self.max_interval,
+                            max(self.min_interval, self.avg_latency * self.latency_factor))
+        log.info("Replicated database to %s in %.0f ms (avg %.0f ms, next interval %.0f s)",
+                 self.shared_db, elapsed * 1000, self.avg_latency * 1000, self.interval,
+                 extra={'fields': {'latency_ms': round(elapsed * 1000), 'interval_s': self.interval}})
+
+    def run(self):
+        last_run = 0.0
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if self.stopping.is_set():
+                break
+            # Throttle: never replicate more often than the current interval
+            wait = self.interval - (time.monotonic() - last_run)
+            if wait > 0 and self.stopping.wait(wait):
+                break
+            try:
+                self.replicate_once()
+            except Exception as e:
+                # Folder unavailable; back off and keep the local copy authoritative
+                self.interval = min(self.max_interval, self.interval * 2)
+                log.error("Error replicating database: %s", e)
+            last_run = time.monotonic()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Billing reports over time entries.
+
+Entries are loaded once as NumPy columns (start and end epochs plus
+integer project and activity codes); durations, billing rounding (see
+rounding.py) and group-by totals are then computed with vectorized operations.
+"""
+
+import sys
+import sqlite3
+import argparse
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from rounding import PolicySet, local_days, format_hours, shared_policies
+from applog import get_logger
+from tracker_core import database_version, database_path, get_data_folder
+
+log = get_logger("reports")
+
+
+class EntryColumns:
+    """Column-oriented view of time entries"""
+
+    def __init__(self, ids, starts, ends, is_open, project_codes, activity_codes, projects, activities,
+                 data_version=None):
+        self.ids = ids
+        self.starts = starts
+        self.ends = ends
+        self.is_open = is_open
+        self.project_codes = project_codes
+        self.activity_codes = activity_codes
+        self.projects = projects
+        self.activities = activities
+        self.data_version = data_version
+
+    def __len__(self):
+        return len(self.ids)
+
+    def durations(self):
+        """Exact duration of each entry in seconds"""
+        return np.maximum(self.ends - self.starts, 0)
+
+    def day_codes(self):
+        """Local calendar day of each entry's start, as days since the epoch"""
+        return local_days(self.starts)
+
+    def billed_seconds(self, policies=None):
+        """Duration of each entry after its project's rounding policy"""
+        policies = policies or PolicySet()
+        return policies.billed_seconds(self.durations(), self.day_codes(), self.project_codes,
+                                       self.projects, self.data_version)
+
+    def billed_hours(self, policies=None):
+        """Billed duration of each entry in hours"""
+        return self.billed_seconds(policies) / 3600.0
+
+
+# Separates labels in the group_concat strings load_entries reads
+LABEL_SEPARATOR = '\x1f'
+
+
+def factorize(values):
+    """Map values to dense integer codes in label order, returning (codes, labels)"""
+    values = [v or '' for v in values]
+    labels = sorted(set(values))
+    index = {label: code for code, label in enumerate(labels)}
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values))
+    return codes, labels
+
+
+def load_entries(db_file, start=None, end=None, now=None, read_only=False):
+    """Load entries whose start falls in [start, end) as NumPy columns
+
+    start and end are epoch seconds (None for unbounded). Open entries are
+    measured up to now, like the ongoing rows in the CSV export.
+
+    Each column comes back from SQLite as one comma-separated string
+    (group_concat, with every aggregate stepping through the rows in the
+    same scan) and is parsed by NumPy, so no Python object is built per
+    row except for the project and activity labels.
+    """
+    now = int(now if now is not None else time.time())
+    version = database_version(db_file)
+    where = '''
+        FROM time_entries
+        WHERE typeof(start_time) IN ('integer', 'real')
+          AND (end_time IS NULL OR typeof(end_time) IN ('integer', 'real'))
+    '''
+    params = []
+    if start is not None:
+        where += ' AND start_time >= ?'
+        params.append(int(start))
+    if end is not None:
+        where += ' AND start_time < ?'
+        params.append(int(end))
+
+    if read_only:
+        conn = sqlite3.connect(f"{Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(str(db_file))
+    try:
+        # One snapshot in case the fallback below reads again
+        conn.execute('BEGIN')
+        count, ids, starts, ends, projects, activities = conn.execute(f'''
+            SELECT count(*), group_concat(id), group_concat(CAST(start_time AS INTEGER)),
+                   group_concat(COALESCE(CAST(end_time AS INTEGER), -1)),
+                   group_concat(COALESCE(project, ''), char(31)),
+                   group_concat(COALESCE(activity, ''), char(31))
+            {where}
+        ''', params).fetchone()
+        columns = [np.fromstring(values or '', dtype=np.int64, sep=',') for values in (ids, starts, ends)]
+        projects = projects.split(LABEL_SEPARATOR) if count else []
+        activities = activities.split(LABEL_SEPARATOR) if count else []
+        if len(projects) != count or len(activities) != count:
+            # A label contains the separator; read row by row instead
+            rows = conn.execute(f'''
+                SELECT id, CAST(start_time AS INTEGER), COALESCE(CAST(end_time AS INTEGER), -1), project, activity
+                {where}
+            ''', params).fetchall()
+            columns = [np.array([row[i] for row in rows], dtype=np.int64) for i in range(3)]
+            projects = [row[3] for row in rows]
+            activities = [row[4] for row in rows]
+    finally:
+        conn.close()
+
+    ids, starts, ends = columns
+    is_open = ends < 0
+    ends[is_open] = now
+
+    project_codes, project_labels = factorize(projects)
+    activity_codes, activity_labels = factorize(activities)
+    # Closed entries do not depend on now, so repeated reports can share cached billing
+    data_version = (version, start, end, now if is_open.any() else None)
+    return EntryColumns(ids, starts, ends, is_open, project_codes, activity_codes,
+                        project_labels, activity_labels, data_version)
+
+
+def group_totals(codes, labels, billed):
+    """Sum billed seconds per group code, returning [(label, hours, entries)]"""
+    size = len(labels)
+    totals = np.bincount(codes, weights=billed, minlength=size)
+    counts = np.bincount(codes, minlength=size)
+    return [(labels[i], totals[i] / 3600.0, int(counts[i])) for i in range(size) if counts[i]]
+
+
+def totals_by_project(entries, policies=None):
+    """Billed hours per matter"""
+    return group_totals(entries.project_codes, entries.projects, entries.billed_seconds(policies))
+
+
+def totals_by_activity(entries, policies=None):
+    """Billed hours per activity"""
+    return group_totals(entries.activity_codes, entries.activities, entries.billed_seconds(policies))
+
+
+def totals_by_client(entries, clients, policies=None):
+    """Billed hours per client, given a {project: client} mapping
+
+    Projects without a client are reported under their own name.
+    """
+    client_names = [clients.get(p, p) for p in entries.projects]
+    client_of_project, labels = factorize(client_names)
+    if not len(entries):
+        return []
+    codes = client_of_project[entries.project_codes]
+    return group_totals(codes, labels, entries.billed_seconds(policies))
+
+
+def totals_by_day(entries, policies=None):
+    """Billed hours per local calendar day"""
+    days = entries.day_codes()
+    if not len(days):
+        return []
+    unique_days, codes = np.unique(days, return_inverse=True)
+    labels = [(datetime(1970, 1, 1) + timedelta(days=int(d))).strftime('%Y-%m-%d') for d in unique_days]
+    return group_totals(codes, labels, entries.billed_seconds(policies))
+
+
+def load_clients():
+    """Load the project-to-client mapping from the config folder
+
+    Each line of ~/.config/timetracker/clients reads "project=client".
+    """
+    config_file = Path.home() / ".config" / "timetracker" / "clients"
+    clients = {}
+    try:
+        if config_file.exists():
+            for line in config_file.read_text().splitlines():
+                if '=' in line:
+                    project, client = line.split('=', 1)
+                    clients[project.strip()] = client.strip()
+    except Exception as e:
+        log.error("Error loading clients: %s", e)
+    return clients
+
+
+def parse_date(text):
+    """Parse YYYY-MM-DD as local midnight in epoch seconds"""
+    return int(datetime.strptime(text, '%Y-%m-%d').timestamp())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Billing totals from the time tracker database")
+    parser.add_argument('--from', dest='start', help="First day to include (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', help="Day after the last day to include (YYYY-MM-DD)")
+    parser.add_argument('--by', choices=['project', 'client', 'activity', 'day'], default='project')
+    parser.add_argument('--db', help="Database file (defaults to the configured data folder)")
+    args = parser.parse_args(argv)
+
+    db_file = args.db or database_path(get_data_folder())
+    entries = load_entries(db_file,
+                           parse_date(args.start) if args.start else None,
+                           parse_date(args.end) if args.end else None)
+
+    policies = shared_policies()
+    if args.by == 'project':
+        rows = totals_by_project(entries, policies)
+    elif args.by == 'activity':
+        rows = totals_by_activity(entries, policies)
+    elif args.by == 'client':
+        rows = totals_by_client(entries, load_clients(), policies)
+    else:
+        rows = totals_by_day(entries, policies)
+
+    total = 0.0
+    for label, hours, count in sorted(rows):
+        print(f"{label or '(none)'}\t{format_hours(hours)}\t{count}")
+        total += hours
+    print(f"Total\t{format_hours(total)}\t{len(entries)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Billing rounding policies.
+
+A policy is a small declarative rule (mode, increment, minimum, scope)
+evaluated as a vectorized transform over an array of durations. Policies
+are assigned per project in ~/.config/timetracker/rounding.json, e.g.
+
+    {
+        "default": "ceil-6",
+        "policies": {"court": {"mode": "nearest", "increment": 6, "minimum": 12}},
+        "projects": {"State v. Smith": "court"}
+    }
+"""
+
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from applog import get_logger
+
+log = get_logger("rounding")
+
+CONFIG_FILE = Path.home() / ".config" / "timetracker" / "rounding.json"
+MODES = ('ceil', 'floor', 'nearest')
+SCOPES = ('entry', 'day')
+
+
+class RoundingPolicy:
+    """Declarative rounding rule for billed durations"""
+
+    def __init__(self, name, mode='ceil', increment=6, minimum=0, scope='entry'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown rounding mode: {mode}")
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown rounding scope: {scope}")
+        if increment <= 0:
+            raise ValueError("Rounding increment must be positive")
+        self.name = name
+        self.mode = mode
+        self.increment = increment  # minutes
+        self.minimum = minimum  # minutes
+        self.scope = scope
+
+    @classmethod
+    def from_spec(cls, name, spec):
+        """Build a policy from a config dict"""
+        return cls(name,
+                   mode=spec.get('mode', 'ceil'),
+                   increment=spec.get('increment', 6),
+                   minimum=spec.get('minimum', 0),
+                   scope=spec.get('scope', 'entry'))
+
+    @property
+    def key(self):
+        return (self.mode, self.increment, self.minimum, self.scope)
+
+    def round_seconds(self, seconds):
+        """Round each duration in seconds according to mode, increment and minimum"""
+        seconds = np.asarray(seconds, dtype=np.int64)
+        step = int(self.increment * 60)
+        if self.mode == 'ceil':
+            rounded = -(-seconds // step) * step
+        elif self.mode == 'floor':
+            rounded = seconds // step * step
+        else:
+            # Half rounds up
+            rounded = (seconds + step // 2) // step * step
+        if self.minimum:
+            rounded = np.where(seconds > 0, np.maximum(rounded, int(self.minimum * 60)), rounded)
+        return rounded
+
+    def apply(self, seconds, day_codes, project_codes):
+        """Billed seconds per entry
+
+        Entry-scoped policies round each entry on its own. Day-scoped
+        policies round the total per (project, day) and scale that day's
+        entries to it in proportion to their length; the few seconds left
+        over from whole-second division go on the first entry. Totals stay
+        exact and no entry is billed below zero.
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        if self.scope == 'entry' or not len(seconds):
+            return self.round_seconds(seconds)
+
+        pairs = np.stack([project_codes, day_codes], axis=1)
+        _, first, groups = np.unique(pairs, axis=0, return_index=True, return_inverse=True)
+        groups = groups.reshape(-1)
+        sums = np.bincount(groups, weights=seconds).astype(np.int64)
+        rounded = self.round_seconds(sums)
+        billed = seconds * rounded[groups] // np.maximum(sums, 1)[groups]
+        billed[first] += rounded - np.bincount(groups, weights=billed, minlength=len(sums)).astype(np.int64)
+        return billed
+
+
+BUILTIN_POLICIES = {
+    'ceil-6': RoundingPolicy('ceil-6'),
+    'nearest-6': RoundingPolicy('nearest-6', mode='nearest'),
+    'day-ceil-6': RoundingPolicy('day-ceil-6', scope='day'),
+    'ceil-15': RoundingPolicy('ceil-15', increment=15),
+}
+
+# Historical behaviour: every entry rounded up to the next 0.1 hour
+DEFAULT_POLICY = BUILTIN_POLICIES['ceil-6']
+
+
+class PolicySet:
+    """Rounding policies assigned per project, with cached batch evaluation"""
+
+    def __init__(self, default=DEFAULT_POLICY, policies=None, assignments=None, cache_size=32):
+        self.default = default
+        self.policies = dict(BUILTIN_POLICIES)
+        self.policies.update(policies or {})
+        self.assignments = assignments or {}
+        self.cache = {}
+        self.cache_size = cache_size
+        self.cache_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, config_file=None):
+        """Load policies from the config folder, falling back to the default policy"""
+        config_file = Path(config_file or CONFIG_FILE)
+        try:
+            if not config_file.exists():
+                return cls()
+            config = json.loads(config_file.read_text())
+            policies = {name: RoundingPolicy.from_spec(name, spec)
+                        for name, spec in config.get('policies', {}).items()}
+            policy_set = cls(policies=policies, assignments=config.get('projects', {}))
+            policy_set.default = policy_set.policies.get(config.get('default', 'ceil-6'), DEFAULT_POLICY)
+            return policy_set
+        except Exception as e:
+            log.error("Error loading rounding policies: %s", e)
+            return cls()
+
+    def policy_for(self, project):
+        """Policy assigned to a project, or the default"""
+        name = self.assignments.get(project)
+        return self.policies.get(name, self.default) if name else self.default
+
+    def billed_seconds(self, seconds, day_codes, project_codes, project_labels, data_version=None):
+        """Billed seconds per entry, each project evaluated under its own policy
+
+        With a data_version, results are cached per (policy, data version).
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        day_codes = np.asarray(day_codes, dtype=np.int64)
+        project_codes = np.asarray(project_codes, dtype=np.int64)
+
+        # Group projects by policy so each policy runs once over all its rows
+        by_policy = {}
+        for code, project in enumerate(project_labels):
+            policy = self.policy_for(project)
+            by_policy.setdefault(policy.key, (policy, []))[1].append(code)
+
+        billed = np.zeros(len(seconds), dtype=np.int64)
+        for policy, codes in by_policy.values():
+            cache_key = (policy.key, tuple(project_labels[c] for c in codes), data_version)
+            if data_version is not None and cache_key in self.cache:
+                mask, result = self.cache[cache_key]
+            else:
+                if len(codes) == len(project_labels):
+                    mask = slice(None)
+                else:
+                    mask = np.isin(project_codes, codes)
+                result = policy.apply(seconds[mask], day_codes[mask], project_codes[mask])
+                if data_version is not None:
+                    self.remember(cache_key, (mask, result))
+            billed[mask] = result
+        return billed
+
+    def __getstate__(self):
+        # Sent to firm_rollup's worker processes without the cache or its lock
+        state = dict(self.__dict__)
+        state['cache'] = {}
+        del state['cache_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache_lock = threading.Lock()
+
+    def remember(self, key, value):
+        with self.cache_lock:
+            if len(self.cache) >= self.cache_size:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = value
+
+
+# One PolicySet per config file for the life of the process, so its cache is reused
+_shared = {}
+
+
+def shared_policies(config_file=None):
+    """The process-wide PolicySet, reloaded when rounding.json changes"""
+    config_file = Path(config_file or CONFIG_FILE)
+    try:
+        stamp = config_file.stat().st_mtime_ns
+    except OSError:
+        stamp = None
+    cached = _shared.get(config_file)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    policy_set = PolicySet.load(config_file)
+    _shared[config_file] = (stamp, policy_set)
+    return policy_set
+
+
+def utc_offset(epoch):
+    """Local UTC offset in seconds at one epoch"""
+    try:
+        return int(datetime.fromtimestamp(epoch, timezone.utc).astimezone().utcoffset().total_seconds())
+    except (OverflowError, OSError, ValueError):
+        return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+
+def utc_offsets(epochs):
+    """Local UTC offset at each epoch, following DST changes
+
+    The offset is looked up once per UTC day at its first and last
+    second; only entries on a day where the two differ (a DST change)
+    are looked up one by one.
+    """
+    epochs = np.asarray(epochs, dtype=np.int64)
+    if not len(epochs):
+        return np.zeros(0, dtype=np.int64)
+    days, inverse = np.unique(epochs // 86400, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    starts = np.array([utc_offset(day * 86400) for day in days.tolist()], dtype=np.int64)
+    ends = np.array([utc_offset(day * 86400 + 86399) for day in days.tolist()], dtype=np.int64)
+    offsets = starts[inverse]
+    changing = (starts != ends)[inverse]
+    if changing.any():
+        offsets[changing] = [utc_offset(epoch) for epoch in epochs[changing].tolist()]
+    return offsets
+
+
+def local_days(epochs):
+    """Local calendar day of each epoch, as days since 1970-01-01"""
+    epochs = np.asarray(epochs, dtype=np.int64)
+    return (epochs + utc_offsets(epochs)) // 86400
+
+
+def format_hours(hours):
+    """Format hours with one decimal, or two when the policy bills quarter hours"""
+    if abs(hours * 10 - round(hours * 10)) < 1e-9:
+        return f"{hours:.1f}"
+    return f"{hours:.2f}"
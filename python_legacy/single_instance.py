@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+One floating button per data folder.
+
+The running instance listens on a QLocalServer named after the data
+folder. A second launch connects before it loads Qt, sends its
+arguments (for example --start "Jones estate") and exits; the running
+instance applies them and comes to the front.
+
+The sending side only needs the standard library: on macOS and Linux a
+QLocalServer is a Unix domain socket at the path it was given, and on
+Windows a named pipe, so a forwarded launch never pays for importing
+PyQt6. Launches are serialized by a lock file, so two launches at once
+cannot both decide they are first.
+"""
+
+import sys
+import json
+import argparse
+import socket
+import hashlib
+from pathlib import Path
+
+from locking import FileLock
+
+CONFIG_DIR = Path.home() / ".config" / "timetracker"
+FORWARD_TIMEOUT = 0.5
+# Long enough for a first instance to get from launch to listening
+LAUNCH_LOCK_TIMEOUT = 10
+
+
+def configured_data_folder():
+    """Data folder from the config file, without creating anything (see tracker_core.get_data_folder)"""
+    try:
+        return (CONFIG_DIR / "config").read_text().strip()
+    except OSError:
+        return str(Path.home() / "Documents" / "TimeTracker")
+
+
+def parse_launch_arguments(argv):
+    """--start PROJECT [--activity ACTIVITY] or --stop from a launch; None if unusable"""
+    parser = argparse.ArgumentParser(add_help=False, exit_on_error=False)
+    parser.add_argument('--start', metavar='PROJECT')
+    parser.add_argument('--activity', default='')
+    parser.add_argument('--stop', action='store_true')
+    try:
+        args, _ = parser.parse_known_args(argv)
+    except (argparse.ArgumentError, SystemExit):
+        return None
+    return args
+
+
+def server_name(data_folder):
+    """QLocalServer name for a data folder: a socket path, or a pipe name on Windows"""
+    key = hashlib.sha1(str(Path(data_folder).expanduser().resolve()).encode()).hexdigest()[:16]
+    if sys.platform == "win32":
+        return f"timetracker-{key}"
+    return str(CONFIG_DIR / f"instance-{key}.sock")
+
+
+def forward(name, argv, timeout=FORWARD_TIMEOUT):
+    """Send argv to the instance listening on name; True once it acknowledged"""
+    message = (json.dumps({'argv': argv}) + "\n").encode()
+    try:
+        if sys.platform == "win32":
+            with open(rf"\\.\pipe\{name}", 'r+b', buffering=0) as pipe:
+                pipe.write(message)
+                return pipe.readline().strip() == b"ok"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(name)
+            sock.sendall(message)
+            return sock.makefile('rb').readline().strip() == b"ok"
+    except OSError:
+        return False
+
+
+class Launch:
+    """This process's claim to be the instance for a data folder"""
+
+    def __init__(self, data_folder):
+        self.name = server_name(data_folder)
+        self.lock = FileLock(CONFIG_DIR / f"{Path(self.name).stem}.lock")
+        self.server = None
+        self.on_arguments = None
+
+    def claim(self, argv):
+        """Forward argv to a running instance and return False, or return True to start up"""
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        if not self.lock.acquire(LAUNCH_LOCK_TIMEOUT):
+            # Another launch is stuck; answer through it if it got as far as listening
+            return not forward(self.name, argv)
+        if forward(self.name, argv):
+            self.lock.release()
+            return False
+        return True
+
+    def listen(self, on_arguments):
+        """Serve later launches, calling on_arguments(argv) for each; requires a QApplication"""
+        from PyQt6.QtNetwork import QLocalServer
+        self.on_arguments = on_arguments
+        try:
+            if not self.lock.file:
+                # Never held the launch lock; leave whoever listens alone
+                return False
+            # Nobody answered while we held the lock, so any socket left behind is stale
+            QLocalServer.removeServer(self.name)
+            self.server = QLocalServer()
+            self.server.newConnection.connect(self.accept)
+            return self.server.listen(self.name)
+        finally:
+            self.lock.release()
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.disconnected.connect(connection.deleteLater)
+            connection.readyRead.connect(lambda connection=connection: self.receive(connection))
+
+    def receive(self, connection):
+        if not connection.canReadLine():
+            return
+        try:
+            argv = json.loads(bytes(connection.readLine()).decode()).get('argv', [])
+        except ValueError:
+            connection.disconnectFromServer()
+            return
+        connection.write(b"ok\n")
+        connection.flush()
+        connection.disconnectFromServer()
+        self.on_arguments(argv)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Push tracking state to SketchyBar.
+
+Instead of the plugin polling the database on every update interval, the
+running tracker sends a `time_tracker_update` event with a prepared
+payload whenever the displayed text would change: on state changes and on
+minute boundaries while tracking. plugins/time_tracker.sh just renders it.
+"""
+
+import time
+
+from applog import get_logger
+
+log = get_logger("sketchybar")
+
+EVENT_NAME = "time_tracker_update"
+
+
+def format_elapsed(seconds):
+    """Elapsed time in the floating button's style: 1:05 or 12m"""
+    seconds = max(int(seconds), 0)
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    if hours > 0:
+        return f"{hours}:{minutes:02d}"
+    return f"{minutes}m"
+
+
+def build_payload(state, now=None):
+    """Environment variables handed to the plugin for a tracking state"""
+    if state and state.get('is_tracking') and state.get('project'):
+        now = now if now is not None else time.time()
+        elapsed = format_elapsed(now - state['start_time']) if state.get('start_time') else ''
+        label = f"{state['project']} ({elapsed})" if elapsed else state['project']
+        return {'TRACKING': '1', 'LABEL': label}
+    return {'TRACKING': '0', 'LABEL': ''}
+
+
+class SketchyBarPublisher:
+    """Sends trigger events only when the rendered payload changes"""
+
+    def __init__(self, executable=None):
+        if executable is None:
+            # Imported here, like subprocess below, to keep timetrack's startup short
+            import shutil
+            executable = shutil.which("sketchybar")
+        self.executable = executable
+        self.last_payload = None
+
+    def publish(self, state, now=None, force=False):
+        """Send the payload for state if it differs from the last one sent"""
+        if not self.executable:
+            return False
+        payload = build_payload(state, now)
+        if payload == self.last_payload and not force:
+            return False
+        self.last_payload = payload
+
+        import subprocess
+        args = [self.executable, "--trigger", EVENT_NAME]
+        args.extend(f"{key}={value}" for key, value in payload.items())
+        try:
+            # Fire and forget; never block the caller on the bar
+            subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL)
+        except OSError as e:
+            log.error("Error publishing to SketchyBar: %s", e)
+            return False
+        return True
@@ -0,0 +1,128 @@
+"""
+Event-loop stall detector for the floating button.
+
+A QTimer on the main thread calls beat() a few times a second; a
+watchdog thread checks how long ago the last beat was. While the loop
+is stalled past the threshold, the main thread's Python stack is sampled
+with sys._current_frames(), and when the loop recovers one compact
+report (duration plus the most frequent stacks) is appended to
+~/.config/timetracker/stalls.jsonl.
+
+The watchdog is off unless ~/.config/timetracker/stall_threshold holds
+a threshold in milliseconds (500 is a good start). Keep it above 2000
+to leave out the chime itself, which blocks the loop for 2 seconds.
+"""
+
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from pathlib import Path
+
+from applog import get_logger
+
+CONFIG_DIR = Path.home() / ".config" / "timetracker"
+
+log = get_logger("stall_watchdog")
+# Off by default; stalls are only worth recording while diagnosing one
+DEFAULT_THRESHOLD_MS = 0
+HEARTBEAT_MS = 100
+
+# Report a hang this long even if the loop never recovers
+HANG_SECONDS = 30
+
+MAX_FRAMES = 12
+
+
+def configured_threshold():
+    """Stall threshold in seconds, or None when disabled"""
+    config_file = CONFIG_DIR / "stall_threshold"
+    threshold_ms = DEFAULT_THRESHOLD_MS
+    try:
+        if config_file.exists():
+            threshold_ms = int(config_file.read_text().strip())
+    except Exception as e:
+        log.error("Error reading stall threshold: %s", e)
+    return threshold_ms / 1000.0 if threshold_ms > 0 else None
+
+
+def format_stack(frame):
+    """Innermost-last list of "file:line function" for a frame's stack"""
+    frames = []
+    while frame is not None and len(frames) < MAX_FRAMES:
+        code = frame.f_code
+        frames.append(f"{Path(code.co_filename).name}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+class StallWatchdog:
+    """Watches heartbeats from the thread that creates it"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD_MS / 1000.0, report_file=None):
+        self.threshold = threshold
+        self.report_file = Path(report_file or CONFIG_DIR / "stalls.jsonl")
+        self.thread_id = threading.get_ident()
+        self.last_beat = None
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def beat(self):
+        """Called from the event loop; a plain attribute store, safe without a lock"""
+        self.last_beat = time.monotonic()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        return format_stack(frame) if frame is not None else ()
+
+    def run(self):
+        poll = min(self.threshold / 4, HEARTBEAT_MS / 1000.0)
+        stall_beat = None
+        stacks = Counter()
+        hang_reported = False
+        while not self.stopping.wait(poll):
+            last_beat = self.last_beat
+            if last_beat is None:
+                # Event loop not running yet
+                continue
+            lag = time.monotonic() - last_beat
+            if lag > self.threshold:
+                if stall_beat != last_beat:
+                    stall_beat, stacks, hang_reported = last_beat, Counter(), False
+                stacks[self.sample()] += 1
+                if lag > HANG_SECONDS and not hang_reported:
+                    self.report(lag, stacks, ongoing=True)
+                    hang_reported = True
+            elif stall_beat is not None:
+                # Recovered: the stall lasted until the first beat after it
+                self.report(last_beat - stall_beat, stacks)
+                stall_beat = None
+
+    def report(self, duration, stacks, ongoing=False):
+        """Append a stall report and print a one-line summary"""
+        top = stacks.most_common(3)
+        record = {
+            'time': int(time.time()),
+            'duration_ms': int(duration * 1000),
+            'ongoing': ongoing,
+            'samples': sum(stacks.values()),
+            'stacks': [{'count': count, 'frames': list(frames)} for frames, count in top],
+        }
+        where = top[0][0][-1] if top and top[0][0] else 'unknown'
+        log.warning("Event loop stalled for %d ms%s in %s", record['duration_ms'],
+                    ' (still stalled)' if ongoing else '', where,
+                    extra={'fields': {'duration_ms': record['duration_ms']}})
+        try:
+            self.report_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.report_file, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except Exception as e:
+            log.error("Error writing stall report: %s", e)
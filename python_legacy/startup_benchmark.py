@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Startup and first-paint benchmark for the floating button.
+
+Launches floating_button.py many times under QT_QPA_PLATFORM=offscreen
+with -X importtime and a startup report (see startup_probe.py), then
+reports the median import time, time to QApplication, time to first
+paintEvent and resident memory at idle. Exits non-zero when a median is
+over its budget, so it can gate changes:
+
+    python3 startup_benchmark.py --runs 10 --entries 100000
+    python3 startup_benchmark.py --budget budgets.json -o startup.json
+
+Budgets are milliseconds (and megabytes for memory); a JSON file may
+override any of DEFAULT_BUDGETS. Each run uses a scratch HOME.
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+APP = Path(__file__).with_name("floating_button.py")
+
+DEFAULT_BUDGETS = {
+    'import_ms': 800,
+    'qapplication_ms': 1200,
+    'first_paint_ms': 2000,
+    'idle_rss_mb': 200,
+}
+
+
+def parse_importtime(stderr, top=10):
+    """Total and slowest top-level imports from -X importtime output, in ms"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        name = name.rstrip()
+        # Top-level imports have a single space of indentation
+        if name.startswith(' ') and not name.startswith('  '):
+            modules.append((name.strip(), int(cumulative) / 1000.0))
+    modules.sort(key=lambda m: m[1], reverse=True)
+    return sum(ms for _, ms in modules), modules[:top]
+
+
+def run_once(home, idle_seconds, timeout):
+    """Start the app once and return its metrics"""
+    report = Path(home) / "startup_report.json"
+    if report.exists():
+        report.unlink()
+    env = dict(os.environ, HOME=str(home), QT_QPA_PLATFORM='offscreen',
+               TIMETRACKER_STARTUP_REPORT=str(report), TIMETRACKER_STARTUP_IDLE=str(idle_seconds))
+    started = time.time()
+    process = subprocess.run([sys.executable, '-X', 'importtime', str(APP)], env=env,
+                             capture_output=True, text=True, timeout=timeout)
+    if not report.exists():
+        raise RuntimeError(f"App exited with {process.returncode} before reporting:\n{process.stderr[-2000:]}")
+
+    data = json.loads(report.read_text())
+    marks = data['marks']
+    import_ms, slowest = parse_importtime(process.stderr)
+    metrics = {
+        'import_ms': import_ms,
+        'idle_rss_mb': data['rss_bytes'] / (1024 * 1024),
+        'slowest_imports': slowest,
+    }
+    for name, mark in (('qapplication_ms', 'qapplication'), ('first_paint_ms', 'first_paint')):
+        metrics[name] = (marks[mark] - started) * 1000 if mark in marks else None
+    return metrics
+
+
+def prepare_home(home, entries):
+    """Scratch HOME whose data folder optionally holds a synthetic database"""
+    data_folder = Path(home) / "TimeTracker"
+    data_folder.mkdir(parents=True, exist_ok=True)
+    config_dir = Path(home) / ".config" / "timetracker"
+    config_dir.mkdir(parents=True, exist_ok=True)
+    (config_dir / "config").write_text(str(data_folder))
+    if entries:
+        from synthetic_db import generate
+        generate(str(data_folder / ".timetrack.db"), entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure floating button startup")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--entries', type=int, default=0, help="Synthetic entries in the database (default: empty)")
+    parser.add_argument('--idle', type=float, default=2.0, help="Seconds after first paint before measuring memory")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--budget', help="JSON file overriding the default budgets")
+    parser.add_argument('-o', '--output', help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    budgets = dict(DEFAULT_BUDGETS)
+    if args.budget:
+        budgets.update(json.loads(Path(args.budget).read_text()))
+
+    with tempfile.TemporaryDirectory(prefix="timetracker-startup-") as home:
+        prepare_home(home, args.entries)
+        runs = []
+        for i in range(args.runs):
+            runs.append(run_once(home, args.idle, args.timeout))
+            print(f"run {i + 1}: first paint {runs[-1]['first_paint_ms'] or float('nan'):.0f} ms", file=sys.stderr)
+
+    summary = {}
+    failures = []
+    for metric, budget in budgets.items():
+        values = [run[metric] for run in runs if run.get(metric) is not None]
+        median = statistics.median(values) if values else None
+        summary[metric] = {'median': median, 'min': min(values, default=None),
+                           'max': max(values, default=None), 'budget': budget}
+        if median is None or median > budget:
+            failures.append(metric)
+        shown = 'missing' if median is None else f"{median:.1f}"
+        print(f"{metric}\t{shown}\t(budget {budget})\t{'FAIL' if metric in failures else 'ok'}")
+
+    print("Slowest imports (first run):")
+    for name, ms in runs[0]['slowest_imports']:
+        print(f"  {name}\t{ms:.1f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({'entries': args.entries, 'summary': summary,
+                                                 'runs': runs}, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
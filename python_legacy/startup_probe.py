@@ -0,0 +1,64 @@
+"""
+Startup timing marks for startup_benchmark.py.
+
+Everything here is a no-op unless TIMETRACKER_STARTUP_REPORT names a file;
+then the floating button records wall-clock marks (imports done,
+QApplication ready, first paint), waits for the app to go idle, writes
+the marks and resident memory to that file as JSON and quits.
+"""
+
+import os
+import sys
+import json
+import time
+
+REPORT = os.environ.get('TIMETRACKER_STARTUP_REPORT')
+IDLE_SECONDS = float(os.environ.get('TIMETRACKER_STARTUP_IDLE', '2'))
+TIMEOUT_SECONDS = 30
+
+_marks = {}
+
+
+def mark(name):
+    """Record the first time a startup milestone is reached"""
+    if REPORT and name not in _marks:
+        _marks[name] = time.time()
+
+
+def rss_bytes():
+    """Current resident set size (peak size where the current one is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def write_report():
+    with open(REPORT, 'w') as f:
+        json.dump({'marks': _marks, 'rss_bytes': rss_bytes()}, f)
+
+
+def quit_when_idle(app):
+    """Once painted and idle for IDLE_SECONDS, write the report and quit"""
+    if not REPORT:
+        return
+    from PyQt6.QtCore import QTimer
+    deadline = time.time() + TIMEOUT_SECONDS
+
+    def finish():
+        write_report()
+        app.quit()
+
+    def poll():
+        if 'first_paint' in _marks:
+            QTimer.singleShot(int(IDLE_SECONDS * 1000), finish)
+        elif time.time() > deadline:
+            finish()
+        else:
+            QTimer.singleShot(50, poll)
+
+    QTimer.singleShot(0, poll)
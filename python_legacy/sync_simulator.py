@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Load test for several instances sharing one data folder.
+
+Starts N worker processes against a fresh data folder, each standing in
+for one floating button (or a script on another machine) with its own
+HOME and command journal. Every worker issues random start, stop and
+change commands through TrackerCore, replays its journal right away as
+the button does, and runs the buttons' shared 2-second sync tick,
+TrackerCore.sync, updating its display when that reports a change. The
+leader lease is renewed on its own thread exactly as the buttons do it
+(LeaderLease.start, see leader.py), so the leader exports the CSV and
+republishes the state file.
+
+Afterwards the run is scored from the workers' logs and the database:
+
+    lock wait     acquire time of the state-file flock, and timeouts
+    leader        lease acquisitions, and any time two workers both led
+    lost updates  commands never applied, commands applied after a
+                  later-issued one, and whether the final database
+                  matches the commands replayed in issue order
+    convergence   time until every other instance displays a command's
+                  result; commands superseded first are counted apart,
+                  and displays still wrong after the settle period are stale
+
+    python3 sync_simulator.py --workers 4 --duration 60 -o sync.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+from journal import CommandJournal, ensure_journal_schema
+from tracker_core import TrackerCore, open_database
+from leader import LeaderLease
+
+PROJECTS = ['State v. Smith', 'Jones estate', 'Acme merger', 'Pro bono', 'Admin']
+ACTIVITIES = ['Research', 'Drafting', 'Call', 'Review', 'Email']
+SYNC_INTERVAL = 2.0
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {'count': 0}
+    return {
+        'count': len(ordered),
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 2),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 2),
+    }
+
+
+def displayed(state):
+    """What a button shows for a state: (is_tracking, project, activity)"""
+    if not state or not state.get('is_tracking'):
+        return (False, None, None)
+    return (True, state.get('project'), state.get('activity') or '')
+
+
+class Worker:
+    """One simulated instance driving the real TrackerCore and StateManager"""
+
+    def __init__(self, worker_id, data_folder, seed, think_time, sync_interval):
+        self.worker_id = worker_id
+        self.rng = random.Random(seed)
+        self.think_time = think_time
+        self.sync_interval = sync_interval
+        self.core = TrackerCore(data_folder)
+        self.display = (False, None, None)
+        self.commands = []
+        self.views = []
+        self.conn = open_database(self.core.db_file)
+        self.leadership = []
+        # Workers have their own HOME but stand in for instances on one host,
+        # which share one lease (see leader.py)
+        self.lease = LeaderLease(self.core.db_file, on_change=self.leadership_changed,
+                                 lease_file=Path(data_folder).parent / "leader.db")
+        self.lock_waits = []
+        self.lock_timeouts = 0
+        self.replay_errors = 0
+
+        # Time every state-file lock acquisition, including the ones inside save_state
+        acquire_lock = self.core.state_manager.acquire_lock
+
+        def timed_acquire(timeout=5):
+            started = time.perf_counter()
+            acquired = acquire_lock(timeout)
+            self.lock_waits.append(time.perf_counter() - started)
+            if not acquired:
+                self.lock_timeouts += 1
+            return acquired
+        self.core.state_manager.acquire_lock = timed_acquire
+
+        # Keep the journaled events so the run can be checked against the database
+        record = self.core.journal.record
+        self.events = []
+
+        def tracked_record(command, timestamp=None, **fields):
+            event = record(command, timestamp, **fields)
+            self.events.append(event)
+            return event
+        self.core.journal.record = tracked_record
+
+    def set_display(self, display):
+        if display != self.display:
+            self.display = display
+            self.views.append((time.time_ns(), list(display)))
+
+    def replay(self):
+        try:
+            self.core.replay()
+        except Exception:
+            self.replay_errors += 1
+
+    def command(self):
+        """Issue one random command, as a click on this instance's button would"""
+        status = self.core.status()
+        if not status.get('is_tracking'):
+            name = 'start'
+        else:
+            name = self.rng.choices(['stop', 'change_activity', 'change_project'], [2, 1, 1])[0]
+
+        self.events = []
+        issued = time.time_ns()
+        if name == 'start':
+            state = self.core.start(self.rng.choice(PROJECTS), self.rng.choice(ACTIVITIES))
+        elif name == 'stop':
+            state = self.core.stop()
+        elif name == 'change_activity':
+            state = self.core.change_activity(self.rng.choice(ACTIVITIES))
+        else:
+            state = self.core.change_project(self.rng.choice(PROJECTS), self.rng.choice(ACTIVITIES))
+        # The issuing button shows its own command immediately
+        self.set_display(displayed(state))
+        self.commands.append({
+            'issued_ns': issued,
+            'command': name,
+            'events': self.events,
+            'display': list(displayed(state)),
+        })
+        self.replay()
+
+    def sync_tick(self):
+        """FloatingButton.sync_state without the widget"""
+        db_state, transition = self.core.sync(*self.display, self.lease.is_leader, self.conn)
+        if transition:
+            self.set_display(displayed(db_state))
+        elif db_state is None and self.core.journal.has_pending():
+            self.replay()
+
+    def leadership_changed(self, leading):
+        # Called on the lease thread
+        self.leadership.append((time.time_ns(), leading))
+
+    def run(self, start_at, commands_until, settle_until):
+        time.sleep(max(0, start_at - time.time()))
+        self.lease.start()
+        next_tick = time.time() + self.rng.uniform(0, self.sync_interval)
+        next_command = time.time() + self.rng.expovariate(1 / self.think_time)
+        while True:
+            now = time.time()
+            if now >= settle_until:
+                break
+            if now >= next_tick:
+                self.sync_tick()
+                next_tick += self.sync_interval
+            elif now >= next_command and now < commands_until:
+                self.command()
+                next_command = time.time() + self.rng.expovariate(1 / self.think_time)
+            else:
+                upcoming = next_tick if next_command >= commands_until else min(next_tick, next_command)
+                time.sleep(max(0, min(upcoming, settle_until) - now))
+        self.lease.stop()
+        self.conn.close()
+        return {
+            'worker': self.worker_id,
+            'commands': self.commands,
+            'views': self.views,
+            'leadership': self.leadership,
+            'ended_ns': time.time_ns(),
+            'lock_waits': self.lock_waits,
+            'lock_timeouts': self.lock_timeouts,
+            'replay_errors': self.replay_errors,
+            'pending_at_end': self.core.journal.has_pending(),
+        }
+
+
+def run_worker(args):
+    worker = Worker(args.worker, args.data_folder, args.seed, args.think_time, args.sync_interval)
+    result = worker.run(args.start_at, args.start_at + args.duration, args.start_at + args.duration + args.settle)
+    Path(args.output).write_text(json.dumps(result))
+    return 0
+
+
+def prepare_data_folder(workdir):
+    data_folder = Path(workdir) / "data"
+    data_folder.mkdir(parents=True)
+    conn = sqlite3.connect(str(data_folder / ".timetrack.db"))
+    try:
+        ensure_journal_schema(conn)
+    finally:
+        conn.close()
+    return data_folder
+
+
+def reference_entries(events):
+    """Entries the database would hold with events applied one by one in issue order"""
+    conn = sqlite3.connect(':memory:')
+    try:
+        ensure_journal_schema(conn)
+        journal = CommandJournal(os.devnull)
+        for event in events:
+            journal.apply_event(conn, event)
+        return entry_rows(conn)
+    finally:
+        conn.close()
+
+
+def entry_rows(conn):
+    return {row[0]: row[1:] for row in conn.execute(
+        'SELECT uid, project, activity, start_time, end_time FROM time_entries')}
+
+
+def current_display(rows):
+    open_rows = sorted((row for row in rows.values() if row[3] is None), key=lambda row: row[2])
+    if not open_rows:
+        return (False, None, None)
+    return (True, open_rows[-1][0], open_rows[-1][1] or '')
+
+
+def convergence(commands, results):
+    """Seconds until every other instance displayed each command's result"""
+    latencies = []
+    superseded = 0
+    for index, command in enumerate(commands):
+        issued = command['issued_ns']
+        deadline = commands[index + 1]['issued_ns'] if index + 1 < len(commands) else float('inf')
+        reached = issued
+        for result in results:
+            if result['worker'] == command['worker']:
+                continue
+            # The display in effect when the command was issued, then each later change
+            shown = [False, None, None]
+            seen = None
+            for when, view in result['views']:
+                if when > issued:
+                    if shown == command['display']:
+                        break
+                    if view == command['display']:
+                        seen = when
+                        break
+                shown = view
+            if shown == command['display'] and seen is None:
+                seen = issued
+            if seen is None or seen > deadline:
+                reached = None
+                break
+            reached = max(reached, seen)
+        if reached is None:
+            superseded += 1
+        else:
+            latencies.append((reached - issued) / 1e9)
+    return latencies, superseded
+
+
+def leadership(results):
+    """Leader changes, and seconds during which more than one worker believed it led"""
+    edges = []
+    for result in results:
+        leading_since = None
+        for when, leading in result['leadership']:
+            if leading:
+                leading_since = when
+            elif leading_since is not None:
+                edges += [(leading_since, 1), (when, -1)]
+                leading_since = None
+        if leading_since is not None:
+            edges += [(leading_since, 1), (result['ended_ns'], -1)]
+    overlap = 0
+    leaders = 0
+    last = None
+    for when, step in sorted(edges):
+        if leaders > 1:
+            overlap += when - last
+        leaders += step
+        last = when
+    return {'acquisitions': sum(1 for _, step in edges if step > 0), 'overlap_seconds': round(overlap / 1e9, 3)}
+
+
+def score(results, data_folder):
+    commands = sorted((dict(c, worker=r['worker']) for r in results for c in r['commands']),
+                      key=lambda c: c['issued_ns'])
+    events = [event for command in commands for event in command['events']]
+    issue_rank = {event['event_id']: rank for rank, event in enumerate(events)}
+
+    conn = sqlite3.connect(str(data_folder / ".timetrack.db"))
+    try:
+        applied = [row[0] for row in conn.execute('SELECT event_id FROM journal_events ORDER BY rowid')]
+        actual = entry_rows(conn)
+    finally:
+        conn.close()
+
+    # Events applied after one that was issued later
+    overtaken = 0
+    latest = -1
+    for event_id in applied:
+        rank = issue_rank.get(event_id, -1)
+        if rank < latest:
+            overtaken += 1
+        latest = max(latest, rank)
+
+    expected = reference_entries(events)
+    diverged = sum(1 for uid in set(actual) | set(expected) if actual.get(uid) != expected.get(uid))
+
+    final_display = current_display(actual)
+    stale = [r['worker'] for r in results
+             if (r['views'][-1][1] if r['views'] else [False, None, None]) != list(final_display)]
+
+    state_file = data_folder / ".app_state.json"
+    state = json.loads(state_file.read_text()) if state_file.exists() else None
+
+    latencies, superseded = convergence(commands, results)
+    return {
+        'commands': len(commands),
+        'events': len(events),
+        'lock_wait': percentiles([wait for r in results for wait in r['lock_waits']]),
+        'lock_timeouts': sum(r['lock_timeouts'] for r in results),
+        'replay_errors': sum(r['replay_errors'] for r in results),
+        'lost_updates': {
+            'unapplied': len(set(issue_rank) - set(applied)),
+            'overtaken': overtaken,
+            'diverged_entries': diverged,
+            'state_file_matches_db': displayed(state) == final_display,
+        },
+        'convergence': dict(percentiles(latencies), superseded=superseded),
+        'stale_displays': stale,
+        'leader': leadership(results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate several instances sharing one data folder")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=60, help="Seconds of random commands")
+    parser.add_argument('--settle', type=float, default=3 * SYNC_INTERVAL,
+                        help="Seconds of sync ticks after the last command")
+    parser.add_argument('--think-time', type=float, default=10.0, help="Mean seconds between a worker's commands")
+    parser.add_argument('--sync-interval', type=float, default=SYNC_INTERVAL)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Keep the data folder and worker homes here")
+    parser.add_argument('-o', '--output', help="Write JSON results here")
+    # Internal: run one worker process
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--data-folder', help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        return run_worker(args)
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="timetracker-sync-"))
+    os.environ['HOME'] = str(workdir / "home")
+    data_folder = prepare_data_folder(workdir)
+
+    # Each worker is its own instance: own HOME, so its own journal and config
+    start_at = time.time() + 1 + 0.2 * args.workers
+    processes = []
+    for worker in range(args.workers):
+        home = workdir / f"home-{worker}"
+        (home / ".config" / "timetracker").mkdir(parents=True)
+        (home / ".config" / "timetracker" / "config").write_text(str(data_folder))
+        output = workdir / f"worker-{worker}.json"
+        processes.append((output, subprocess.Popen(
+            [sys.executable, __file__, '--worker', str(worker), '--data-folder', str(data_folder),
+             '--start-at', str(start_at), '--duration', str(args.duration), '--settle', str(args.settle),
+             '--think-time', str(args.think_time), '--sync-interval', str(args.sync_interval),
+             '--seed', str(args.seed * 1000 + worker), '--output', str(output)],
+            env=dict(os.environ, HOME=str(home)))))
+    results = []
+    for output, process in processes:
+        if process.wait() != 0:
+            print(f"Worker exited with {process.returncode}", file=sys.stderr)
+            return 1
+        results.append(json.loads(output.read_text()))
+
+    report = {
+        'parameters': {k: v for k, v in vars(args).items() if k not in ('worker', 'data_folder', 'start_at')},
+        'results': score(results, data_folder),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Synthetic time tracker databases for benchmarking.
+
+Entries follow one another over a span of years with a Zipf-skewed
+project distribution (a few busy matters, a long tail of small ones),
+the base activity types, and a handful of sessions left open the way
+concurrent instances leave them.
+
+    python3 synthetic_db.py /tmp/bench.db --entries 1000000
+"""
+
+import sys
+import sqlite3
+import argparse
+import time
+
+import numpy as np
+
+from journal import ensure_journal_schema
+
+ACTIVITIES = ["Legal research", "Investigation", "Discovery Review", "File Review", "Client Communication"]
+
+
+def generate(db_file, entries, projects=200, open_sessions=3, years=5, skew=1.2, seed=0, batch_size=100000):
+    """Write a database with the given number of entries; returns db_file"""
+    rng = np.random.default_rng(seed)
+    end = int(time.time())
+    start = end - int(years * 365 * 86400)
+    spacing = (end - start) / max(entries, 1)
+
+    # Zipf weights over project ranks
+    weights = 1.0 / np.arange(1, projects + 1) ** skew
+    weights /= weights.sum()
+    project_names = [f"Matter {i + 1:04d}" for i in range(projects)]
+
+    conn = sqlite3.connect(str(db_file))
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS time_entries (
+                id INTEGER PRIMARY KEY,
+                project TEXT,
+                activity TEXT,
+                start_time TIMESTAMP,
+                end_time TIMESTAMP,
+                uid TEXT,
+                hlc INTEGER
+            )
+        ''')
+        for offset in range(0, entries, batch_size):
+            count = min(batch_size, entries - offset)
+            index = np.arange(offset, offset + count)
+            starts = (start + index * spacing + rng.uniform(0, 0.2, count) * spacing).astype(np.int64)
+            durations = (rng.uniform(0.3, 0.8, count) * spacing).astype(np.int64)
+            project_codes = rng.choice(projects, size=count, p=weights)
+            activity_codes = rng.integers(0, len(ACTIVITIES), size=count)
+            ends = (starts + durations).tolist()
+            # The last few entries stay open
+            for i in range(max(entries - open_sessions - offset, 0), count):
+                ends[i] = None
+            rows = zip(([project_names[c] for c in project_codes.tolist()]),
+                       ([ACTIVITIES[c] for c in activity_codes.tolist()]),
+                       starts.tolist(), ends,
+                       (f"bench-{i}" for i in index.tolist()),
+                       ((s * 1000) << 16 for s in starts.tolist()))
+            conn.executemany('''
+                INSERT INTO time_entries (project, activity, start_time, end_time, uid, hlc)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+        # Triggers and side tables come last so the bulk load stays fast
+        ensure_journal_schema(conn)
+        conn.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        conn.close()
+    return db_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic time tracker database")
+    parser.add_argument('db', help="Database file to create")
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--projects', type=int, default=200)
+    parser.add_argument('--open', dest='open_sessions', type=int, default=3, help="Sessions left open")
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    generate(args.db, args.entries, args.projects, args.open_sessions, args.years, seed=args.seed)
+    print(f"Wrote {args.entries} entries to {args.db} in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
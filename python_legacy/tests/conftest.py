@@ -0,0 +1,34 @@
+"""
+Shared test setup.
+
+The modules under test live flat in python_legacy/ and read their config
+paths from the home folder at import time, so HOME is pointed at a
+scratch folder before any of them is imported.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+os.environ['HOME'] = os.environ['USERPROFILE'] = tempfile.mkdtemp(prefix="timetracker-tests-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tracker_core import TrackerCore, open_database  # noqa: E402
+
+
+@pytest.fixture
+def data_folder(tmp_path):
+    folder = tmp_path / "data"
+    folder.mkdir()
+    return folder
+
+
+@pytest.fixture
+def core(data_folder):
+    """A TrackerCore on a fresh data folder with the schema in place"""
+    tracker = TrackerCore(data_folder)
+    open_database(tracker.db_file).close()
+    return tracker
@@ -0,0 +1,97 @@
+import json
+import time
+import asyncio
+
+from api_server import APIServer
+from tracker_core import open_database
+
+
+def run_requests(core, *requests):
+    """Send raw requests, each on its own connection, returning (status, body) per request"""
+    api = APIServer(core)
+
+    async def exchange(port, request):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+        body = await reader.readexactly(int(headers.get('Content-Length', 0)))
+        writer.close()
+        return int(lines[0].split(' ')[1]), json.loads(body) if body else None
+
+    async def main():
+        server = await asyncio.start_server(api.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [await exchange(port, request) for request in requests]
+
+    return api, asyncio.run(main())
+
+
+def post(path, body):
+    return (f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+
+def get(target):
+    return f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode()
+
+
+def test_bad_requests_get_400(core):
+    _, responses = run_requests(
+        core,
+        b"GARBAGE\r\n\r\n",
+        b"GET /status\r\n\r\n",
+        b"POST /start HTTP/1.1\r\nContent-Length: lots\r\n\r\n",
+        b"POST /start HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+        post('/start', b'{not json'),
+        post('/start', b'[1, 2]'),
+        post('/start', b'{}'),
+        get('/logs?limit=many'),
+        get('/totals?from=yesterday'),
+    )
+    assert [status for status, _ in responses] == [400] * 9
+    assert all('error' in body for _, body in responses)
+
+
+def test_unknown_endpoint_and_method(core):
+    _, responses = run_requests(core, get('/nowhere'), b"DELETE /stop HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert [status for status, _ in responses] == [404, 405]
+
+
+def test_start_and_stop(core):
+    _, responses = run_requests(
+        core,
+        post('/start', b'{"project": "Jones estate", "activity": "Drafting"}'),
+        get('/status'),
+        post('/start', b'{"project": "Acme merger"}'),
+        post('/stop', b''),
+        get('/status'),
+    )
+    statuses = [status for status, _ in responses]
+    assert statuses == [200, 200, 400, 200, 200]
+    assert responses[1][1]['project'] == 'Jones estate'
+    assert responses[1][1]['activity'] == 'Drafting'
+    assert responses[4][1]['is_tracking'] is False
+
+
+def add_entry(core, project, start, end):
+    conn = open_database(core.db_file)
+    with conn:
+        conn.execute('INSERT INTO time_entries (project, activity, start_time, end_time) VALUES (?, ?, ?, ?)',
+                     (project, '', start, end))
+    conn.close()
+
+
+def test_totals_cached_only_without_open_entries(core):
+    now = int(time.time())
+    add_entry(core, 'Jones estate', now - 7200, now - 3600)
+    api, responses = run_requests(core, get('/totals'))
+    assert responses == [(200, [{'key': 'Jones estate', 'hours': 1.0, 'entries': 1}])]
+    assert '/totals' in api.cache.entries
+
+    add_entry(core, 'Acme merger', now - 60, None)
+    api, responses = run_requests(core, get('/totals'), get('/totals'))
+    assert responses[0][0] == 200
+    assert '/totals' not in api.cache.entries
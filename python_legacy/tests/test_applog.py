@@ -0,0 +1,51 @@
+import time
+import logging
+
+from applog import RepeatFilter
+
+
+def record(level, message, created):
+    rec = logging.LogRecord('timetracker.test', level, __file__, 0, message, None, None)
+    rec.created = created
+    return rec
+
+
+def test_only_warnings_and_errors_are_collapsed():
+    repeats = RepeatFilter(window=60)
+    assert all(repeats.filter(record(logging.INFO, "tick", 1000 + i)) for i in range(3))
+    assert repeats.filter(record(logging.ERROR, "Error syncing", 1000))
+    assert not repeats.filter(record(logging.ERROR, "Error syncing", 1010))
+    assert not repeats.filter(record(logging.ERROR, "Error syncing", 1020))
+
+    later = record(logging.ERROR, "Error syncing", 1070)
+    assert repeats.filter(later)
+    assert later.getMessage() == "Error syncing (repeated 2 times)"
+
+
+def test_held_back_repeats_are_flushed():
+    emitted = []
+    repeats = RepeatFilter(window=3600, emit=emitted.append)
+    now = time.time()
+    for _ in range(4):
+        repeats.filter(record(logging.WARNING, "Folder unavailable", now))
+    repeats.filter(record(logging.ERROR, "Other", now))
+
+    # Still inside the window: nothing to report yet
+    repeats.flush()
+    assert emitted == []
+
+    repeats.flush(final=True)
+    assert [(r.levelno, r.getMessage()) for r in emitted] == [(logging.WARNING, "Folder unavailable (repeated 3 times)")]
+    assert repeats.timer is None
+    repeats.flush(final=True)
+    assert len(emitted) == 1
+
+
+def test_window_end_flushes_on_a_timer():
+    emitted = []
+    repeats = RepeatFilter(window=0.05, emit=emitted.append)
+    now = time.time()
+    repeats.filter(record(logging.ERROR, "Error syncing", now))
+    repeats.filter(record(logging.ERROR, "Error syncing", now))
+    repeats.timer.join(5)
+    assert [r.getMessage() for r in emitted] == ["Error syncing (repeated 1 times)"]
@@ -0,0 +1,81 @@
+import sqlite3
+
+import numpy as np
+
+from audit import apply_plan, audit, find_gaps
+from reports import EntryColumns, load_entries
+from tracker_core import open_database
+
+H = 3600
+
+
+def columns(rows, now):
+    """EntryColumns for (id, project, start, end or None) rows"""
+    ids, projects, starts, ends = zip(*rows)
+    labels = sorted(set(projects))
+    return EntryColumns(np.array(ids, dtype=np.int64), np.array(starts, dtype=np.int64),
+                        np.array([now if e is None else e for e in ends], dtype=np.int64),
+                        np.array([r[3] is None for r in rows]),
+                        np.array([labels.index(p) for p in projects], dtype=np.int64),
+                        np.zeros(len(rows), dtype=np.int64), labels, [''])
+
+
+def kinds(findings):
+    return sorted((f['kind'], f.get('id')) for f in findings)
+
+
+def test_overlap_is_repaired_by_shortening():
+    entries = columns([(1, 'A', 0, 2 * H), (2, 'B', H, 3 * H)], now=10 * H)
+    findings, repairs = audit(entries, now=10 * H)
+    assert kinds(findings) == [('overlap', 1)]
+    assert repairs == [(1, 0, 2 * H, H)]
+
+
+def test_forgotten_open_entry_is_closed_at_the_next_start():
+    entries = columns([(1, 'A', 0, None), (2, 'B', H, 2 * H)], now=3 * H)
+    findings, repairs = audit(entries, now=3 * H)
+    assert kinds(findings) == [('overlap', 1)]
+    assert repairs == [(1, 0, None, H)]
+
+
+def test_containment_and_equal_starts_are_only_reported():
+    now = 10 * H
+    entries = columns([
+        (1, 'A', 0, 3 * H), (2, 'B', H, 2 * H),     # 1 contains 2
+        (3, 'A', 4 * H, 5 * H), (4, 'B', 4 * H, 6 * H),  # same start, 3 ends first
+        (5, 'A', 7 * H, None), (6, 'B', 7 * H, 8 * H),   # same start, 5 left open
+    ], now=now)
+    findings, repairs = audit(entries, now=now, max_open=12 * H)
+    assert kinds(findings) == [('contains', 1), ('contains', 3), ('contains', 5)]
+    assert repairs == []
+
+
+def test_stale_open_session_and_gaps():
+    now = 20 * H
+    entries = columns([(1, 'A', 0, None)], now=now)
+    findings, _ = audit(entries, now=now, max_open=12 * H)
+    assert kinds(findings) == [('stale_open', 1)]
+
+    starts = np.array([H, 4 * H], dtype=np.int64)
+    ends = np.array([2 * H, 5 * H], dtype=np.int64)
+    windows = (np.array([0]), np.array([6 * H]))
+    gap_starts, gap_ends = find_gaps(starts, ends, windows, min_gap=15 * 60)
+    assert list(zip(gap_starts.tolist(), gap_ends.tolist())) == [(0, H), (2 * H, 4 * H), (5 * H, 6 * H)]
+
+
+def test_plan_applies_once_and_skips_changed_rows(core):
+    conn = open_database(core.db_file)
+    with conn:
+        conn.executemany('INSERT INTO time_entries (project, start_time, end_time) VALUES (?, ?, ?)',
+                         [('A', 0, 2 * H), ('B', H, 3 * H), ('C', 4 * H, 6 * H), ('D', 5 * H, 7 * H)])
+    conn.close()
+    _, repairs = audit(load_entries(core.db_file, now=10 * H), now=10 * H)
+    assert len(repairs) == 2
+
+    conn = sqlite3.connect(str(core.db_file))
+    with conn:
+        conn.execute('UPDATE time_entries SET end_time = ? WHERE id = 3', (5 * H + 60,))
+    conn.close()
+    assert apply_plan(core.db_file, repairs) == 1
+    assert apply_plan(core.db_file, repairs) == 0
+    assert audit(load_entries(core.db_file, now=10 * H), now=10 * H)[1] == [(3, 4 * H, 5 * H + 60, 5 * H)]
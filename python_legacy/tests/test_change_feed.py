@@ -0,0 +1,87 @@
+from change_feed import ChangeConsumer, compact, install_triggers, latest_seq
+from tracker_core import open_database
+
+
+def ops(conn):
+    return conn.execute('SELECT entry_id, op FROM changes ORDER BY seq').fetchall()
+
+
+def test_each_write_is_captured_once(core):
+    conn = open_database(core.db_file)
+    with conn:
+        conn.execute("INSERT INTO time_entries (project, activity, start_time) VALUES ('A', 'x', '2024-01-01 09:00:00')")
+        conn.execute("UPDATE time_entries SET end_time = '2024-01-01 10:00:00' WHERE id = 1")
+        conn.execute('DELETE FROM time_entries WHERE id = 1')
+    assert ops(conn) == [(1, 'I'), (1, 'U'), (1, 'D')]
+    conn.close()
+
+
+def test_old_capture_trigger_is_replaced(core):
+    conn = open_database(core.db_file)
+    conn.execute('DROP TRIGGER time_entries_capture_update')
+    conn.execute('''
+        CREATE TRIGGER time_entries_capture_update
+        AFTER UPDATE ON time_entries
+        BEGIN
+            INSERT INTO changes (entry_id, op) VALUES (NEW.id, 'U');
+        END
+    ''')
+    install_triggers(conn)
+    with conn:
+        conn.execute("INSERT INTO time_entries (project, start_time) VALUES ('A', '2024-01-01 09:00:00')")
+    assert ops(conn) == [(1, 'I')]
+    conn.close()
+
+
+def test_consumer_reads_batches_and_keeps_its_cursor(core):
+    conn = open_database(core.db_file)
+    with conn:
+        for hour in range(5):
+            conn.execute('INSERT INTO time_entries (project, start_time, end_time) VALUES (?, ?, ?)',
+                         ('A', f'2024-01-01 0{hour}:00:00', f'2024-01-01 0{hour}:30:00'))
+        conn.execute('DELETE FROM time_entries WHERE id = 2')
+
+    consumer = ChangeConsumer(core.db_file, 'test')
+    seen = [change for batch in consumer.batches(batch_size=2) for change in batch]
+    assert [(op, entry_id) for _, op, entry_id, _ in seen] == [('I', 1), ('I', 2), ('I', 3), ('I', 4), ('I', 5), ('D', 2)]
+    assert seen[0][3]['project'] == 'A'
+    # The deleted entry's insert is joined with nothing, like its delete
+    assert seen[1][3] is None and seen[5][3] is None
+    assert consumer.cursor == latest_seq(conn) == 6
+    assert consumer.fetch() == []
+    consumer.close()
+
+    consumer = ChangeConsumer(core.db_file, 'test')
+    assert consumer.cursor == 6
+    consumer.close()
+    conn.close()
+
+
+def test_compact_keeps_the_latest_change_per_entry(core):
+    conn = open_database(core.db_file)
+    with conn:
+        conn.execute("INSERT INTO time_entries (project, start_time) VALUES ('A', '2024-01-01 09:00:00')")
+        conn.execute("UPDATE time_entries SET project = 'B' WHERE id = 1")
+        conn.execute("UPDATE time_entries SET project = 'C' WHERE id = 1")
+    ChangeConsumer(core.db_file, 'test').close()
+
+    assert compact(conn) == 2
+    assert ops(conn) == [(1, 'U')]
+    # Sequence numbers are never reused after compaction
+    assert latest_seq(conn) == 3
+    conn.close()
+
+
+def test_lagging_consumer_needs_resync(core):
+    conn = open_database(core.db_file)
+    with conn:
+        conn.execute("INSERT INTO time_entries (project, start_time) VALUES ('A', '2024-01-01 09:00:00')")
+        conn.execute('UPDATE changes SET changed_at = 0')
+    assert compact(conn, retention_days=1) == 1
+
+    consumer = ChangeConsumer(core.db_file, 'late')
+    assert consumer.needs_resync()
+    consumer.commit(latest_seq(conn))
+    assert not consumer.needs_resync()
+    consumer.close()
+    conn.close()
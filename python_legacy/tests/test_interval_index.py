@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from change_feed import ChangeConsumer, compact
+from interval_index import IntervalIndex
+from tracker_core import open_database
+
+
+def write(db_file, sql, params=()):
+    conn = open_database(db_file)
+    with conn:
+        conn.execute(sql, params)
+    conn.close()
+
+
+def brute_at(rows, moment):
+    return sorted(i for i, (s, e) in rows.items() if s <= moment and (e is None or e > moment))
+
+
+def brute_overlapping(rows, start, end):
+    return sorted(i for i, (s, e) in rows.items() if s < end and (e is None or e > start))
+
+
+def ids(entries):
+    return sorted(e['id'] for e in entries)
+
+
+@pytest.fixture
+def random_entries(core):
+    rng = random.Random(0)
+    rows = {}
+    conn = open_database(core.db_file)
+    with conn:
+        for entry_id in range(1, 301):
+            start = rng.randrange(0, 100000)
+            end = None if rng.random() < 0.02 else start + rng.randrange(1, 5000)
+            conn.execute('INSERT INTO time_entries (id, project, start_time, end_time) VALUES (?, ?, ?, ?)',
+                         (entry_id, f"P{entry_id % 7}", start, end))
+            rows[entry_id] = (start, end)
+    conn.close()
+    return rows
+
+
+def test_queries_match_a_scan(core, random_entries):
+    index = IntervalIndex(core.db_file)
+    rng = random.Random(1)
+    for _ in range(200):
+        moment = rng.randrange(-10, 110000)
+        assert ids(index.at(moment)) == brute_at(random_entries, moment)
+        start = rng.randrange(0, 100000)
+        end = start + rng.randrange(1, 10000)
+        assert ids(index.overlapping(start, end)) == brute_overlapping(random_entries, start, end)
+    index.close()
+
+
+@pytest.mark.parametrize('threshold', [1024, 2])
+def test_refresh_follows_writes(core, random_entries, threshold):
+    index = IntervalIndex(core.db_file, rebuild_threshold=threshold)
+    assert index.refresh() == 0
+
+    write(core.db_file, 'INSERT INTO time_entries (id, project, start_time, end_time) VALUES (999, ?, ?, ?)',
+          ('New', 200000, 200100))
+    write(core.db_file, 'UPDATE time_entries SET start_time = 300000, end_time = 300100 WHERE id = 1')
+    write(core.db_file, 'DELETE FROM time_entries WHERE id = 2')
+    assert index.refresh() == 3
+    random_entries[999] = (200000, 200100)
+    random_entries[1] = (300000, 300100)
+    del random_entries[2]
+
+    for moment in (200050, 300050) + tuple(s for s, _ in random_entries.values())[:50]:
+        assert ids(index.at(moment)) == brute_at(random_entries, moment)
+    assert ids(index.overlapping(0, 400000)) == sorted(random_entries)
+    index.close()
+
+
+def test_rebuilds_when_retention_dropped_unseen_changes(core):
+    write(core.db_file, "INSERT INTO time_entries (project, start_time, end_time) VALUES ('A', 10, 20)")
+    index = IntervalIndex(core.db_file)
+
+    write(core.db_file, "INSERT INTO time_entries (project, start_time, end_time) VALUES ('B', 30, 40)")
+    ChangeConsumer(core.db_file, 'billing').commit(10**6)
+    conn = open_database(core.db_file)
+    with conn:
+        conn.execute('UPDATE changes SET changed_at = 0')
+    compact(conn, retention_days=1)
+    conn.close()
+
+    assert index.refresh() == 0
+    assert ids(index.at(35)) == [2]
+    index.close()
@@ -0,0 +1,65 @@
+import json
+import sqlite3
+
+import pytest
+
+import journal
+from journal import CommandJournal, adopt_legacy_journal, journal_path
+
+
+def entries(db_file):
+    conn = sqlite3.connect(str(db_file))
+    try:
+        return conn.execute('SELECT project, activity, start_time, end_time FROM time_entries ORDER BY id').fetchall()
+    finally:
+        conn.close()
+
+
+def test_replay_applies_each_event_once(tmp_path):
+    db_file = tmp_path / ".timetrack.db"
+    log = CommandJournal(tmp_path / "journal.jsonl")
+    events = [log.record('start', timestamp=100, project='A', activity='x'),
+              log.record('change_activity', activity='y'),
+              log.record('stop', timestamp=200)]
+    assert log.replay(db_file) == 3
+    assert not log.has_pending()
+    assert entries(db_file) == [('A', 'y', 100, 200)]
+
+    # A crash between commit and compaction leaves the events journaled
+    with open(log.journal_file, 'w') as f:
+        f.writelines(json.dumps(event) + "\n" for event in events)
+    assert log.replay(db_file) == 0
+    assert not log.has_pending()
+    assert entries(db_file) == [('A', 'y', 100, 200)]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    log = CommandJournal(tmp_path / "journal.jsonl")
+    log.record('start', timestamp=100, project='A', activity='')
+    with open(log.journal_file, 'a') as f:
+        f.write('{"event_id": "torn", "comm')
+    assert [event['command'] for event in log.pending()] == ['start']
+    assert log.replay(tmp_path / ".timetrack.db") == 1
+
+
+def test_unreachable_folder_keeps_commands_queued(tmp_path):
+    log = CommandJournal(tmp_path / "journal.jsonl")
+    log.record('start', timestamp=100, project='A', activity='')
+    with pytest.raises(sqlite3.OperationalError):
+        log.replay(tmp_path / "missing" / ".timetrack.db")
+    assert len(log.pending()) == 1
+
+
+def test_journals_are_kept_per_folder(tmp_path, monkeypatch):
+    first, second = tmp_path / "one", tmp_path / "two"
+    assert journal_path(first) != journal_path(second)
+    assert journal_path(first / ".." / "one") == journal_path(first)
+
+    legacy = tmp_path / "journal.jsonl"
+    legacy.write_text('{"event_id": "1", "command": "stop", "timestamp": 1}\n')
+    monkeypatch.setattr(journal, 'LEGACY_JOURNAL', legacy)
+    monkeypatch.setattr(journal, 'JOURNAL_DIR', tmp_path / "journals")
+    (tmp_path / "journals").mkdir()
+    adopt_legacy_journal(first)
+    assert not legacy.exists()
+    assert len(CommandJournal(journal_path(first)).pending()) == 1
@@ -0,0 +1,34 @@
+import leader
+from clock import VirtualClock
+from leader import LeaderLease, lease_path
+
+
+def test_lease_is_kept_outside_the_data_folder(data_folder):
+    db_file = data_folder / ".timetrack.db"
+    path = lease_path(db_file)
+    assert path.parent == leader.LEASE_DIR
+    assert data_folder not in path.parents
+    assert lease_path(data_folder / "." / ".timetrack.db") == path
+
+
+def test_one_leader_until_release_or_expiry(data_folder):
+    clock = VirtualClock(start=1000)
+    db_file = data_folder / ".timetrack.db"
+    first, second = (LeaderLease(db_file, ttl=15, clock=clock) for _ in range(2))
+    assert first.renew()
+    assert not second.renew()
+    assert not list(data_folder.iterdir())
+
+    clock.advance(10)
+    assert first.renew()
+    clock.advance(10)
+    assert not second.renew()
+
+    # The leader stops renewing: the other takes over once the lease runs out
+    clock.advance(16)
+    assert second.renew()
+    assert not first.renew()
+
+    second.release()
+    assert first.renew()
+    first.release()
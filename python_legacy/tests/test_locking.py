@@ -0,0 +1,47 @@
+import os
+import time
+import threading
+
+import pytest
+
+import locking
+from locking import FileLock, PosixBackend
+
+posix = pytest.mark.skipif(os.name != 'posix', reason="flock backend")
+
+
+@posix
+def test_timeouts_do_not_pile_up_helper_threads(tmp_path):
+    path = tmp_path / "state.lock"
+    holder = FileLock(path, backend=PosixBackend())
+    assert holder.acquire(timeout=0)
+
+    backend = PosixBackend()
+    threads = threading.active_count()
+    for _ in range(locking.MAX_KERNEL_WAITERS * 3):
+        assert not FileLock(path, backend=backend).acquire(timeout=0.01)
+    assert backend.waiters == locking.MAX_KERNEL_WAITERS
+    assert threading.active_count() - threads <= locking.MAX_KERNEL_WAITERS
+
+    # Once the holder lets go, the queued helpers take and drop the lock and exit
+    holder.release()
+    waiter = FileLock(path, backend=backend)
+    assert waiter.acquire(timeout=5)
+    waiter.release()
+    deadline = time.monotonic() + 5
+    while backend.waiters and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert backend.waiters == 0
+
+
+@posix
+def test_timed_lock_waits_for_release(tmp_path):
+    path = tmp_path / "state.lock"
+    holder = FileLock(path, backend=PosixBackend())
+    assert holder.acquire()
+    timer = threading.Timer(0.05, holder.release)
+    timer.start()
+    waiter = FileLock(path, backend=PosixBackend())
+    assert waiter.acquire(timeout=5)
+    waiter.release()
+    timer.join()
@@ -0,0 +1,90 @@
+import shutil
+import sqlite3
+
+from merge import merge_databases
+from tracker_core import open_database
+
+
+def entries(db_file):
+    conn = sqlite3.connect(str(db_file))
+    try:
+        return conn.execute('''
+            SELECT uid, project, activity, start_time, end_time FROM time_entries ORDER BY uid
+        ''').fetchall()
+    finally:
+        conn.close()
+
+
+def write(db_file, *statements):
+    conn = open_database(db_file)
+    with conn:
+        for sql, params in statements:
+            conn.execute(sql, params)
+    conn.close()
+
+
+def diverge(core, tmp_path):
+    """A shared history, then concurrent edits on a laptop and a desktop copy"""
+    write(core.db_file,
+          ("INSERT INTO time_entries (project, start_time, end_time) VALUES ('A', '2024-01-01 09:00:00', '2024-01-01 10:00:00')", ()),
+          ("INSERT INTO time_entries (project, start_time, end_time) VALUES ('B', '2024-01-01 10:00:00', '2024-01-01 11:00:00')", ()))
+    laptop, desktop = tmp_path / "laptop.db", tmp_path / "desktop.db"
+    shutil.copy(core.db_file, laptop)
+    shutil.copy(core.db_file, desktop)
+    write(laptop,
+          ("UPDATE time_entries SET project = 'A2' WHERE project = 'A'", ()),
+          ("INSERT INTO time_entries (project, start_time, end_time) VALUES ('L', '2024-01-02 09:00:00', '2024-01-02 10:00:00')", ()))
+    write(desktop,
+          ("DELETE FROM time_entries WHERE project = 'B'", ()),
+          ("INSERT INTO time_entries (project, start_time, end_time) VALUES ('D', '2024-01-03 09:00:00', '2024-01-03 10:00:00')", ()))
+    return laptop, desktop
+
+
+def test_merge_converges_in_either_order(core, tmp_path):
+    laptop, desktop = diverge(core, tmp_path)
+    laptop_first, desktop_first = tmp_path / "one.db", tmp_path / "two.db"
+    shutil.copy(laptop, laptop_first)
+    merge_databases(laptop_first, [desktop])
+    shutil.copy(desktop, desktop_first)
+    merge_databases(desktop_first, [laptop])
+
+    merged = entries(laptop_first)
+    assert merged == entries(desktop_first)
+    assert sorted(row[1] for row in merged) == ['A2', 'D', 'L']
+
+
+def test_merge_is_idempotent(core, tmp_path):
+    laptop, desktop = diverge(core, tmp_path)
+    merge_databases(laptop, [desktop])
+    merged = entries(laptop)
+    assert merge_databases(laptop, [desktop]) == (0, 0)
+    assert entries(laptop) == merged
+
+
+def test_newest_edit_wins(core, tmp_path):
+    laptop, desktop = diverge(core, tmp_path)
+    # The desktop renames the shared entry after the laptop did
+    write(desktop, ("UPDATE time_entries SET project = 'A3' WHERE project = 'A'", ()))
+    merge_databases(laptop, [desktop])
+    assert sorted(row[1] for row in entries(laptop)) == ['A3', 'D', 'L']
+
+
+def test_same_interval_under_two_uids_is_kept_once(core, tmp_path):
+    other = tmp_path / "other.db"
+    insert = ("INSERT INTO time_entries (project, start_time, end_time) VALUES ('A', '2024-01-01 09:00:00', '2024-01-01 10:00:00')", ())
+    write(core.db_file, insert)
+    write(other, insert)
+    merge_databases(core.db_file, [other])
+    assert len(entries(core.db_file)) == 1
+
+
+def test_stamping_does_not_add_changes(core):
+    write(core.db_file,
+          ("INSERT INTO time_entries (project, start_time) VALUES ('A', '2024-01-01 09:00:00')", ()),
+          ("UPDATE time_entries SET end_time = '2024-01-01 10:00:00' WHERE id = 1", ()))
+    conn = sqlite3.connect(str(core.db_file))
+    uid, hlc = conn.execute('SELECT uid, hlc FROM time_entries').fetchone()
+    changes = conn.execute('SELECT entry_id, op FROM changes ORDER BY seq').fetchall()
+    conn.close()
+    assert uid and hlc
+    assert changes == [(1, 'I'), (1, 'U')]
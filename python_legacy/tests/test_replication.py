@@ -0,0 +1,51 @@
+import sqlite3
+
+from replication import Replicator, backup_database
+from tracker_core import database_version, open_database
+
+
+def projects(db_file):
+    conn = sqlite3.connect(str(db_file))
+    try:
+        return sorted(row[0] for row in conn.execute('SELECT project FROM time_entries'))
+    finally:
+        conn.close()
+
+
+def insert(db_file, project, start_time):
+    conn = open_database(db_file)
+    with conn:
+        conn.execute('INSERT INTO time_entries (project, start_time) VALUES (?, ?)', (project, start_time))
+    conn.close()
+
+
+def test_foreign_writes_are_merged_before_replacing(tmp_path):
+    local, shared = tmp_path / "local.db", tmp_path / ".timetrack.db"
+    insert(local, 'Local', '2024-01-01 09:00:00')
+    replicator = Replicator(local, shared)
+    assert replicator.replicate_once() is not None
+    assert projects(shared) == ['Local']
+    assert replicator.replicate_once() is None
+
+    # A plugin script (or the sync client) writes the shared copy directly
+    insert(shared, 'Plugin', '2024-01-01 10:00:00')
+    assert replicator.replicate_once() is not None
+    assert projects(local) == projects(shared) == ['Local', 'Plugin']
+
+
+def test_first_run_keeps_entries_only_in_the_shared_copy(tmp_path):
+    local, shared = tmp_path / "local.db", tmp_path / ".timetrack.db"
+    insert(shared, 'Other device', '2024-01-01 08:00:00')
+    insert(local, 'Local', '2024-01-01 09:00:00')
+    Replicator(local, shared).replicate_once()
+    assert projects(shared) == ['Local', 'Other device']
+
+
+def test_snapshot_is_discarded_if_target_changed(tmp_path):
+    local, shared = tmp_path / "local.db", tmp_path / ".timetrack.db"
+    insert(local, 'Local', '2024-01-01 09:00:00')
+    insert(shared, 'Plugin', '2024-01-01 10:00:00')
+    stale = database_version(local)
+    assert not backup_database(local, shared, expected=stale)
+    assert projects(shared) == ['Plugin']
+    assert not (tmp_path / ".timetrack.db.replicating").exists()
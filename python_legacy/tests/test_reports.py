@@ -0,0 +1,46 @@
+import pytest
+
+from reports import load_entries, totals_by_activity, totals_by_project
+from tracker_core import open_database
+
+ROWS = [
+    ('A', 'Legal research', 1000, 4600),
+    ('B', None, 2000, 5600),
+    ('A', 'File Review', 3000.5, 6600),
+    ('A', 'Legal research', 7000, None),
+    # Skipped: start_time is not a number
+    ('C', 'Legal research', '2024-01-01 09:00:00', None),
+]
+
+
+def write_entries(db_file, rows):
+    conn = open_database(db_file)
+    with conn:
+        conn.executemany('INSERT INTO time_entries (project, activity, start_time, end_time) VALUES (?, ?, ?, ?)', rows)
+    conn.close()
+
+
+@pytest.mark.parametrize('project_a', ['A', 'A\x1fsplit'])
+def test_load_entries_columns(core, project_a):
+    write_entries(core.db_file, [(project_a if p == 'A' else p, *rest) for p, *rest in ROWS])
+    entries = load_entries(core.db_file, now=9000)
+
+    assert entries.ids.tolist() == [1, 2, 3, 4]
+    assert entries.starts.tolist() == [1000, 2000, 3000, 7000]
+    assert entries.ends.tolist() == [4600, 5600, 6600, 9000]
+    assert entries.is_open.tolist() == [False, False, False, True]
+    assert [entries.projects[c] for c in entries.project_codes] == [project_a, 'B', project_a, project_a]
+    assert [entries.activities[c] for c in entries.activity_codes] == ['Legal research', '', 'File Review', 'Legal research']
+    assert entries.data_version[-1] == 9000
+
+    assert dict((label, count) for label, _, count in totals_by_project(entries)) == {project_a: 3, 'B': 1}
+    assert len(totals_by_activity(entries)) == 3
+
+
+def test_load_entries_range_and_empty(core):
+    write_entries(core.db_file, ROWS)
+    entries = load_entries(core.db_file, start=2000, end=7000, now=9000)
+    assert entries.ids.tolist() == [2, 3]
+    # Nothing open in range, so billing caches do not depend on now
+    assert entries.data_version[-1] is None
+    assert len(load_entries(core.db_file, start=10000)) == 0
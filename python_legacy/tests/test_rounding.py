@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import pickle
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from rounding import PolicySet, RoundingPolicy, local_days, shared_policies
+
+M = 60
+
+
+@pytest.mark.parametrize('mode, expected', [
+    ('ceil', [0, 6, 6, 12, 12]),
+    ('floor', [0, 0, 6, 6, 12]),
+    ('nearest', [0, 0, 6, 6, 12]),
+])
+def test_entry_modes(mode, expected):
+    policy = RoundingPolicy('test', mode=mode)
+    seconds = np.array([0, 1, 6 * M, 8 * M + 59, 12 * M])
+    assert (policy.round_seconds(seconds) // M).tolist() == expected
+
+
+def test_minimum_applies_only_to_time_worked():
+    policy = RoundingPolicy('test', minimum=12)
+    assert (policy.round_seconds([0, 30, 13 * M]) // M).tolist() == [0, 12, 18]
+
+
+def test_bad_policies_are_rejected():
+    for kwargs in ({'mode': 'up'}, {'scope': 'week'}, {'increment': 0}):
+        with pytest.raises(ValueError):
+            RoundingPolicy('bad', **kwargs)
+
+
+def test_day_scope_rounds_the_total_and_spreads_it():
+    policy = RoundingPolicy('day', scope='day')
+    seconds = np.array([10 * M, 1 * M, 20 * M, 7 * M])
+    days = np.array([0, 0, 0, 1])
+    projects = np.array([0, 0, 1, 0])
+    billed = policy.apply(seconds, days, projects)
+    # Project 0 on day 0: 11 minutes billed as 12, split 10:1
+    assert billed[0] + billed[1] == 12 * M
+    assert billed[0] > billed[1] > 0
+    assert billed[2] == 24 * M and billed[3] == 12 * M
+    assert (billed >= seconds).all()
+
+
+def test_projects_use_their_assigned_policy(tmp_path):
+    config = tmp_path / "rounding.json"
+    config.write_text(json.dumps({
+        'default': 'ceil-15',
+        'policies': {'court': {'mode': 'nearest', 'increment': 6, 'minimum': 12}},
+        'projects': {'State v. Smith': 'court'},
+    }))
+    policies = PolicySet.load(config)
+    billed = policies.billed_seconds([5 * M, 5 * M], [0, 0], [0, 1], ['State v. Smith', 'Jones estate'])
+    assert (billed // M).tolist() == [12, 15]
+
+    # Cached results are reused for the same data version, also after pickling
+    first = policies.billed_seconds([5 * M], [0], [0], ['Jones estate'], data_version=1)
+    assert policies.cache
+    copy = pickle.loads(pickle.dumps(policies))
+    assert copy.cache == {}
+    assert (copy.billed_seconds([5 * M], [0], [0], ['Jones estate'], data_version=1) == first).all()
+
+
+def test_broken_config_falls_back_to_the_default(tmp_path):
+    config = tmp_path / "rounding.json"
+    config.write_text("{not json")
+    assert PolicySet.load(config).policy_for('anything').name == 'ceil-6'
+
+
+def test_shared_policies_reload_when_the_file_changes(tmp_path):
+    config = tmp_path / "rounding.json"
+    config.write_text(json.dumps({'default': 'ceil-6'}))
+    first = shared_policies(config)
+    assert shared_policies(config) is first
+
+    config.write_text(json.dumps({'default': 'ceil-15'}))
+    stamp = config.stat().st_mtime_ns + 1000000
+    os.utime(config, ns=(stamp, stamp))
+    second = shared_policies(config)
+    assert second is not first
+    assert second.default.name == 'ceil-15'
+
+
+@pytest.mark.skipif(not hasattr(time, 'tzset'), reason="needs time.tzset")
+def test_local_days_follow_dst(monkeypatch):
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    try:
+        # 23:30 local on the day before and the day after the spring change
+        epochs = [datetime(2024, 3, 9, 23, 30).timestamp(), datetime(2024, 3, 10, 23, 30).timestamp(),
+                  datetime(2024, 3, 10, 1, 30).timestamp(), datetime(2024, 3, 10, 3, 30).timestamp()]
+        days = local_days(np.array(epochs, dtype=np.int64))
+        day = (datetime(2024, 3, 9) - datetime(1970, 1, 1)).days
+        assert days.tolist() == [day, day + 1, day + 1, day + 1]
+    finally:
+        monkeypatch.delenv('TZ')
+        time.tzset()
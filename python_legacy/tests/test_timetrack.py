@@ -0,0 +1,27 @@
+import timetrack
+
+
+def run(data_folder, *argv):
+    return timetrack.main(['--data-folder', str(data_folder), *argv])
+
+
+def test_click_plugin_commands(core, data_folder, capsys):
+    assert run(data_folder, 'start', 'A', '-a', 'Legal research') == 0
+    assert run(data_folder, 'activity', 'File Review') == 0
+    assert run(data_folder, 'switch', '--amend', 'B', '-a', 'Investigation') == 0
+    assert core.status()['project'] == 'B'
+    assert run(data_folder, 'stop') == 0
+    assert run(data_folder, 'activity', 'File Review') == 1
+    assert run(data_folder, 'start', 'C') == 0
+    assert run(data_folder, 'stop') == 0
+    assert sorted(row[1:3] for row in core.recent()) == [('B', 'Investigation'), ('C', '')]
+
+    capsys.readouterr()
+    assert run(data_folder, 'projects', '--hide', 'C') == 0
+    assert capsys.readouterr().out.split() == ['B']
+    assert run(data_folder, 'projects', '--delete', 'B') == 0
+    assert capsys.readouterr().out == ''
+    assert [row[1] for row in core.recent()] == ['[HIDDEN]C']
+
+    assert run(data_folder, 'export') == 0
+    assert (data_folder / "time_entries.csv").read_text().count('\n') == 2
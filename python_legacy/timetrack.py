@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+timetrack - headless start/stop/status for the time tracker.
+
+Built on tracker_core, so it never imports Qt or pandas and starts fast
+enough to bind to hotkeys and SketchyBar clicks:
+
+    timetrack start "State v. Smith" -a "Legal research"
+    timetrack switch "Jones estate"
+    timetrack stop
+    timetrack activity "File Review"
+    timetrack status [--json]
+    timetrack projects [--hide NAME | --delete NAME]
+    timetrack export
+    timetrack recent [-n 20]
+    timetrack log --after 120
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+from tracker_core import TrackerCore
+from sketchybar import SketchyBarPublisher, format_elapsed
+
+
+def format_timestamp(value):
+    return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def replay(core, state):
+    """Push journaled commands into the database, leaving them queued if the folder is unreachable"""
+    try:
+        core.replay()
+    except Exception as e:
+        print(f"Data folder unavailable, command queued: {e}", file=sys.stderr)
+    SketchyBarPublisher().publish(state)
+
+
+def cmd_start(core, args):
+    if core.status().get('is_tracking'):
+        print("Already tracking; use 'switch' to change project", file=sys.stderr)
+        return 1
+    replay(core, core.start(args.project, args.activity))
+    print(f"Started {args.project}")
+    return 0
+
+
+def cmd_stop(core, args):
+    if not core.status().get('is_tracking'):
+        print("Not tracking")
+        return 0
+    replay(core, core.stop())
+    print("Stopped")
+    return 0
+
+
+def cmd_switch(core, args):
+    current = core.status()
+    if args.amend and current.get('is_tracking'):
+        # Rewrite the open entry, as the button's Change Project does
+        state = core.change_project(args.project, args.activity or current.get('activity'))
+    else:
+        now = int(time.time())
+        if current.get('is_tracking'):
+            core.stop(now)
+        state = core.start(args.project, args.activity or current.get('activity') or '', now)
+    replay(core, state)
+    print(f"Switched to {args.project}")
+    return 0
+
+
+def cmd_activity(core, args):
+    if not core.status().get('is_tracking'):
+        print("Not tracking", file=sys.stderr)
+        return 1
+    replay(core, core.change_activity(args.activity))
+    print(f"Activity changed to {args.activity}")
+    return 0
+
+
+def cmd_status(core, args):
+    state = core.status()
+    if args.json:
+        print(json.dumps(state))
+    elif state.get('is_tracking'):
+        activity = f" [{state['activity']}]" if state.get('activity') else ''
+        print(f"{state['project']}{activity} {format_elapsed(time.time() - state['start_time'])}")
+    else:
+        print("Not tracking")
+    return 0
+
+
+def cmd_recent(core, args):
+    rows = core.recent(args.limit)
+    if args.json:
+        keys = ('id', 'project', 'activity', 'start_time', 'end_time')
+        print(json.dumps([dict(zip(keys, row)) for row in rows]))
+        return 0
+    for id_val, project, activity, start_time, end_time in rows:
+        end_str = format_timestamp(end_time) if end_time else '(ongoing)'
+        print(f"{id_val}\t{format_timestamp(start_time)}\t{end_str}\t{project or ''}\t{activity or ''}")
+    return 0
+
+
+def cmd_projects(core, args):
+    if args.hide:
+        core.hide_project(args.hide)
+    elif args.delete:
+        core.delete_project(args.delete)
+    for project in core.get_projects(order='recent'):
+        print(project)
+    return 0
+
+
+def cmd_export(core, args):
+    core.export_csv()
+    print(f"Exported {core.csv_path()}")
+    return 0
+
+
+def cmd_log(core, args):
+    events = core.read_events(args.after, args.limit)
+    if args.json:
+        print(json.dumps(events))
+        return 0
+    for event in events:
+        detail = ' '.join(str(event[k]) for k in ('project', 'activity') if event.get(k))
+        print(f"{event['seq']}\t{format_timestamp(event['timestamp'])}\t{event['type']}\t{detail}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='timetrack', description="Headless time tracker control")
+    parser.add_argument('--data-folder', help="Override the configured data folder")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    start = commands.add_parser('start', help="Start tracking a project")
+    start.add_argument('project')
+    start.add_argument('-a', '--activity', default='')
+    start.set_defaults(func=cmd_start)
+
+    stop = commands.add_parser('stop', help="Stop tracking")
+    stop.set_defaults(func=cmd_stop)
+
+    switch = commands.add_parser('switch', help="Stop the current entry and start another project")
+    switch.add_argument('project')
+    switch.add_argument('-a', '--activity')
+    switch.add_argument('--amend', action='store_true',
+                        help="Change the project of the open entry instead of starting a new one")
+    switch.set_defaults(func=cmd_switch)
+
+    activity = commands.add_parser('activity', help="Change the activity of the open entry")
+    activity.add_argument('activity')
+    activity.set_defaults(func=cmd_activity)
+
+    status = commands.add_parser('status', help="Show what is being tracked")
+    status.add_argument('--json', action='store_true')
+    status.set_defaults(func=cmd_status)
+
+    recent = commands.add_parser('recent', help="List recent entries")
+    recent.add_argument('-n', '--limit', type=int, default=10)
+    recent.add_argument('--json', action='store_true')
+    recent.set_defaults(func=cmd_recent)
+
+    projects = commands.add_parser('projects', help="List visible projects, most recently used first")
+    manage = projects.add_mutually_exclusive_group()
+    manage.add_argument('--hide', metavar='PROJECT', help="Drop a project from the list, keeping its entries")
+    manage.add_argument('--delete', metavar='PROJECT', help="Delete a project and all its entries")
+    projects.set_defaults(func=cmd_projects)
+
+    export = commands.add_parser('export', help="Regenerate time_entries.csv")
+    export.set_defaults(func=cmd_export)
+
+    log = commands.add_parser('log', help="Tail the event log (event storage mode)")
+    log.add_argument('--after', type=int, default=0, help="Only events after this seq")
+    log.add_argument('-n', '--limit', type=int, default=1000)
+    log.add_argument('--json', action='store_true')
+    log.set_defaults(func=cmd_log)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    core = TrackerCore(args.data_folder)
+    return args.func(core, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Qt-free tracking core shared by both floating buttons and the timetrack CLI.
+
+Only standard-library modules are imported here so command-line tools
+start quickly; the CSV export (csv_export.py, which needs numpy) is
+imported on first use. Anything UI-related stays in the front ends,
+floating_button.py and floating_button_windows.py.
+"""
+
+import sqlite3
+import json
+import os
+import time
+import threading
+from pathlib import Path
+
+from applog import get_logger
+from metrics import LOCK_WAIT, LOCK_TIMEOUTS, STATE_QUERY, STATE_SAVE
+from journal import CommandJournal, ensure_journal_schema, journal_path, adopt_legacy_journal
+from clock import SYSTEM_CLOCK
+from locking import FileLock
+from change_feed import latest_seq
+
+CONFIG_DIR = Path.home() / ".config" / "timetracker"
+
+log = get_logger("tracker_core")
+
+# Live database location in local-first mode (see replication.py)
+LOCAL_DB = Path.home() / ".local" / "share" / "timetracker" / ".timetrack.db"
+
+
+def get_data_folder():
+    """Data folder from ~/.config/timetracker/config, created with a default on first run"""
+    config_file = CONFIG_DIR / "config"
+
+    if config_file.exists():
+        # Read existing config
+        data_folder = config_file.read_text().strip()
+    else:
+        # First run - use default location
+        data_folder = str(Path.home() / "Documents" / "TimeTracker")
+        # Create config directory and save choice
+        config_file.parent.mkdir(parents=True, exist_ok=True)
+        config_file.write_text(data_folder)
+
+    # Ensure data directory exists
+    Path(data_folder).mkdir(parents=True, exist_ok=True)
+    return data_folder
+
+
+def database_version(db_file):
+    """Cheap fingerprint of the database contents, for result caching"""
+    version = []
+    for path in (Path(db_file), Path(f"{db_file}-wal")):
+        try:
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+
+def storage_mode():
+    """'events' for event-sourced storage, otherwise 'table' (the default)"""
+    config_file = CONFIG_DIR / "storage"
+    try:
+        if config_file.exists() and config_file.read_text().strip() == 'events':
+            return 'events'
+    except Exception:
+        pass
+    return 'table'
+
+
+def local_first_enabled():
+    """True when ~/.config/timetracker/local_first exists"""
+    return (CONFIG_DIR / "local_first").exists()
+
+
+def database_path(data_folder):
+    """Live database: the local copy in local-first mode, otherwise the data folder's"""
+    shared_db = Path(data_folder) / ".timetrack.db"
+    if not local_first_enabled():
+        return shared_db
+    # Imported here because replication builds on this module
+    from replication import seed_local
+    try:
+        seed_local(LOCAL_DB, shared_db)
+    except Exception as e:
+        log.error("Error seeding local database: %s", e)
+    LOCAL_DB.parent.mkdir(parents=True, exist_ok=True)
+    return LOCAL_DB
+
+
+def open_database(db_file, timeout=2.0):
+    """Connect to the tracker database, creating or migrating its schema"""
+    conn = sqlite3.connect(str(db_file), timeout=timeout)
+    try:
+        ensure_journal_schema(conn)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def state_transition(db_state, is_tracking, project, activity):
+    """How db_state differs from what a front end shows: 'started', 'stopped', 'changed' or None"""
+    if db_state['is_tracking'] != is_tracking:
+        return 'started' if db_state['is_tracking'] else 'stopped'
+    if db_state['is_tracking'] and (db_state['project'] != project
+                                    or (db_state.get('activity') or '') != (activity or '')):
+        return 'changed'
+    return None
+
+
+class StateManager:
+    """Manages shared state between different time tracking apps with file locking"""
+
+    def __init__(self, data_folder, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.data_folder = Path(data_folder)
+        self.state_file = self.data_folder / ".app_state.json"
+        self.lock_file = self.data_folder / ".app_state.lock"
+        self.db_file = database_path(self.data_folder)
+
+    def acquire_lock(self, timeout=5):
+        """Acquire exclusive lock on state file, returning the held lock or None
+
+        Each call gets its own lock, so threads sharing this StateManager
+        (the API server and the UI) never release each other's.
+        """
+        # Lock waits are real time even under a virtual clock
+        start_time = time.time()
+        lock = FileLock(self.lock_file)
+        acquired = lock.acquire(timeout)
+        LOCK_WAIT.observe(time.time() - start_time)
+        if acquired:
+            return lock
+        LOCK_TIMEOUTS.inc()
+        return None
+
+    def release_lock(self, lock):
+        """Release a lock returned by acquire_lock"""
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+    @STATE_QUERY.timed
+    def get_current_state(self):
+        """Get current tracking state from database"""
+        try:
+            conn = sqlite3.connect(str(self.db_file))
+            cursor = conn.cursor()
+            cursor.execute("SELECT project, activity, start_time FROM time_entries WHERE end_time IS NULL ORDER BY start_time DESC LIMIT 1")
+            result = cursor.fetchone()
+            conn.close()
+
+            if result:
+                return {
+                    'is_tracking': True,
+                    'project': result[0],
+                    'activity': result[1] if len(result) > 1 else '',
+                    'start_time': result[2] if len(result) > 2 else result[1],
+                    'last_updated': int(self.clock.time())
+                }
+            else:
+                return {
+                    'is_tracking': False,
+                    'project': None,
+                    'activity': None,
+                    'start_time': None,
+                    'last_updated': int(self.clock.time())
+                }
+        except Exception:
+            return None
+
+    @STATE_SAVE.timed
+    def save_state(self, state):
+        """Save current state to file with locking"""
+        lock = self.acquire_lock()
+        if lock:
+            try:
+                state['last_updated'] = int(self.clock.time())
+                with open(self.state_file, 'w') as f:
+                    json.dump(state, f)
+                return True
+            except Exception:
+                return False
+            finally:
+                self.release_lock(lock)
+        return False
+
+    def load_state(self):
+        """Load state from file with locking"""
+        lock = self.acquire_lock()
+        if lock:
+            try:
+                if self.state_file.exists():
+                    with open(self.state_file, 'r') as f:
+                        state = json.load(f)
+                    return state
+                return None
+            except Exception:
+                return None
+            finally:
+                self.release_lock(lock)
+        return None
+
+    def sync_with_database(self):
+        """Synchronize state file with database state"""
+        db_state = self.get_current_state()
+        if db_state:
+            self.save_state(db_state)
+            return db_state
+        return None
+
+
+class TrackerCore:
+    """Tracking commands against the shared data folder, without any UI
+
+    Commands are journaled first (see journal.py) and published to the
+    state file; callers decide whether to replay the journal right away
+    (the CLI) or in the background (the floating button).
+    """
+
+    def __init__(self, data_folder=None, journal=None, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.data_folder = Path(data_folder or get_data_folder())
+        self.state_manager = StateManager(self.data_folder, self.clock)
+        self.db_file = self.state_manager.db_file
+        self.journal = journal or self.default_journal()
+        self.use_event_log = storage_mode() == 'events'
+        self.replay_thread = None
+        # Change feed position of the last CSV export (see sync)
+        self.exported_seq = None
+
+    def default_journal(self):
+        """This data folder's journal; the configured folder inherits the old shared one"""
+        config_file = CONFIG_DIR / "config"
+        if config_file.exists() and Path(config_file.read_text().strip()).resolve() == self.data_folder.resolve():
+            adopt_legacy_journal(self.data_folder)
+        return CommandJournal(journal_path(self.data_folder))
+
+    def start(self, project, activity, timestamp=None):
+        """Start tracking a project with activity"""
+        start_time = int(timestamp if timestamp is not None else self.clock.time())
+        self.journal.record('start', timestamp=start_time, project=project, activity=activity)
+        state = {
+            'is_tracking': True,
+            'project': project,
+            'activity': activity,
+            'start_time': start_time
+        }
+        self.state_manager.save_state(state)
+        return state
+
+    def stop(self, timestamp=None):
+        """Stop tracking, closing every open entry"""
+        self.journal.record('stop', timestamp=timestamp if timestamp is not None else self.clock.time())
+        state = {
+            'is_tracking': False,
+            'project': None,
+            'activity': None,
+            'start_time': None
+        }
+        self.state_manager.save_state(state)
+        return state
+
+    def change_activity(self, activity, start_time=None):
+        """Change the activity of the current tracking session"""
+        current = self.status()
+        self.journal.record('change_activity', activity=activity)
+        state = {
+            'is_tracking': True,
+            'project': current.get('project'),
+            'activity': activity,
+            'start_time': start_time if start_time is not None else current.get('start_time')
+        }
+        self.state_manager.save_state(state)
+        return state
+
+    def change_project(self, project, activity, start_time=None):
+        """Change the project and activity of the current tracking session"""
+        if start_time is None:
+            start_time = self.status().get('start_time')
+        self.journal.record('change_project', project=project, activity=activity)
+        state = {
+            'is_tracking': True,
+            'project': project,
+            'activity': activity,
+            'start_time': start_time
+        }
+        self.state_manager.save_state(state)
+        return state
+
+    def replay(self):
+        """Replay journaled commands into the database now"""
+        return self.journal.replay(self.db_file, use_event_log=self.use_event_log)
+
+    def replay_in_background(self, on_applied=None):
+        """Replay on a worker thread unless one is running; on_applied is called there after changes"""
+        if not self.journal.has_pending():
+            return
+        if self.replay_thread and self.replay_thread.is_alive():
+            return
+
+        def worker():
+            try:
+                if self.replay() and on_applied:
+                    on_applied()
+            except Exception as e:
+                log.error("Error replaying journal: %s", e)
+        self.replay_thread = threading.Thread(target=worker, daemon=True)
+        self.replay_thread.start()
+
+    def sync(self, is_tracking, project, activity, is_leader, conn=None, export=None, publish=True):
+        """One sync tick for a front end showing (is_tracking, project, activity)
+
+        Returns (db_state, transition) as state_transition reports it, or
+        (None, None) while local commands are still journaled (they are
+        newer than the database) or the database cannot be read. The
+        leader calls export() (default: export_csv on conn) once per change
+        feed position and, with publish, rewrites the state file.
+        """
+        if self.journal.has_pending():
+            return None, None
+        if is_leader and conn is not None:
+            # Any instance's writes move the change feed; export once per change
+            seq = latest_seq(conn)
+            if seq != self.exported_seq:
+                self.exported_seq = seq
+                if export is not None:
+                    export()
+                else:
+                    self.export_csv(conn)
+
+        db_state = self.state_manager.get_current_state()
+        if not db_state:
+            return None, None
+        transition = state_transition(db_state, is_tracking, project, activity)
+        if is_leader and publish:
+            self.state_manager.save_state(db_state)
+        return db_state, transition
+
+    def csv_path(self):
+        return self.data_folder / "time_entries.csv"
+
+    def export_csv(self, conn=None):
+        """Regenerate time_entries.csv, on conn if the caller keeps one open"""
+        # Imported here so the CLI never loads numpy
+        from csv_export import export_csv
+        if conn is not None:
+            return export_csv(conn, self.csv_path(), self.clock.time())
+        conn = sqlite3.connect(str(self.db_file))
+        try:
+            return export_csv(conn, self.csv_path(), self.clock.time())
+        finally:
+            conn.close()
+
+    def read_events(self, after=0, limit=1000):
+        """Tail the event log from an offset (empty unless event storage is enabled)"""
+        import event_log
+        conn = sqlite3.connect(str(self.db_file))
+        try:
+            event_log.ensure_event_schema(conn)
+            return event_log.read_events(conn, after, limit)
+        finally:
+            conn.close()
+
+    def status(self):
+        """Current tracking state; the state file wins while commands are still journaled"""
+        if not self.journal.has_pending():
+            state = self.state_manager.get_current_state()
+            if state:
+                return state
+        return self.state_manager.load_state() or {
+            'is_tracking': False,
+            'project': None,
+            'activity': None,
+            'start_time': None
+        }
+
+    def recent(self, limit=10):
+        """Most recent entries as (id, project, activity, start_time, end_time) rows"""
+        conn = sqlite3.connect(str(self.db_file))
+        try:
+            cursor = conn.execute('''
+                SELECT id, project, activity, start_time, end_time
+                FROM time_entries
+                ORDER BY start_time DESC
+                LIMIT ?
+            ''', (limit,))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def get_projects(self, order='name'):
+        """Visible project names, alphabetical or with order='recent' most recently used first"""
+        conn = sqlite3.connect(str(self.db_file))
+        try:
+            if order == 'recent':
+                cursor = conn.execute('SELECT project FROM time_entries WHERE project NOT LIKE "[HIDDEN]%" GROUP BY project ORDER BY MAX(start_time) DESC')
+            else:
+                cursor = conn.execute('SELECT DISTINCT project FROM time_entries WHERE project NOT LIKE "[HIDDEN]%" ORDER BY project')
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def hide_project(self, project):
+        """Leave a project's entries in place but drop it from project lists"""
+        conn = open_database(self.db_file)
+        try:
+            with conn:
+                conn.execute("UPDATE time_entries SET project = '[HIDDEN]' || project WHERE project = ?", (project,))
+        finally:
+            conn.close()
+
+    def delete_project(self, project):
+        """Delete every entry of a project"""
+        conn = open_database(self.db_file)
+        try:
+            with conn:
+                conn.execute('DELETE FROM time_entries WHERE project = ?', (project,))
+        finally:
+            conn.close()